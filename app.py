@@ -1,31 +1,29 @@
+import time
+_T_IMPORT = time.perf_counter()
 import chainlit as cl
 import os
+import sys
+import asyncio
+import functools
+import importlib
 import re
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from dotenv import load_dotenv
-from openai import AzureOpenAI
-from retrivers.internal_search import hybrid_search
-from retrivers.agents_web_qa import ask_via_agent, ask_via_agent_with_sources
 from rag.prompst import QA_PROMPT, IA_SUMMARY_PROMPT
+from rag import index_generation, clients
+from rag.env import env_int
+from rag.relevance import is_relevant_hits, NO_HITS, OFF_TOPIC
 from pathlib import Path
-from pypdf import PdfReader
-import importlib
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from ingest.build_chunks import simple_chunks, embed_batch
 from urllib.parse import urlparse
-from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
-from azure.identity import DefaultAzureCredential
+# Search/LLM SDKs, pypdf, Blob/identity, the ingest pipeline and LangGraph are imported
+# on first use so the server starts serving without them (see _preload / STARTUP_PROFILE)
 
 USE_LANGGRAPH = os.getenv("USE_LANGGRAPH", "false").lower() in ("1", "true", "yes")
-_LG_AVAILABLE = False
-if USE_LANGGRAPH:
-    try:
-        from graphs.orchestrator import run_query as lg_run_query
-        _LG_AVAILABLE = True
-    except Exception as _e:
-        _LG_AVAILABLE = False
+_lg_run_query = None  # graphs.orchestrator.run_query; False once it failed to import
+
+# STARTUP_PROFILE=true: log the app import time and the first request's latency
+STARTUP_PROFILE = os.getenv("STARTUP_PROFILE", "false").lower() in ("1", "true", "yes")
 
 load_dotenv()
 
@@ -90,27 +88,87 @@ AOAI_ENDPOINT=os.getenv("AZURE_OPENAI_ENDPOINT")
 AOAI_KEY=os.getenv("AZURE_OPENAI_API_KEY")
 AOAI_VER=os.getenv("AZURE_OPENAI_API_VERSION")
 CHAT_DEPLOY=os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT")
-client = AzureOpenAI(azure_endpoint=AOAI_ENDPOINT, api_key=AOAI_KEY, api_version=AOAI_VER)
+
+
+def _aclient():
+    # Chat calls from the Chainlit handlers go through the async client so one request
+    # in flight does not block the event loop (and every other session)
+    return clients.async_openai_client(AOAI_ENDPOINT, AOAI_KEY, AOAI_VER)
+
 
 # Search client for upserting uploaded chunks
 SEARCH_ENDPOINT=os.getenv("SEARCH_ENDPOINT")
 SEARCH_API_KEY=os.getenv("SEARCH_API_KEY")
 INDEX_CHUNKS=os.getenv("INDEX_CHUNKS","ia-chunks")
-_search_chunks = SearchClient(SEARCH_ENDPOINT, INDEX_CHUNKS, AzureKeyCredential(SEARCH_API_KEY))
+_uploader = None
+
+
+def _chunk_uploader():
+    global _uploader
+    if _uploader is None:
+        from ingest.bulk_upload import uploader_from_env
+        _uploader = uploader_from_env(clients.chunk_search_client(SEARCH_ENDPOINT, INDEX_CHUNKS, SEARCH_API_KEY))
+    return _uploader
+
+
+def _langgraph():
+    """graphs.orchestrator.run_query, imported on first use; None when LangGraph is off or unavailable."""
+    global _lg_run_query
+    if USE_LANGGRAPH and _lg_run_query is None:
+        try:
+            from graphs.orchestrator import run_query
+            _lg_run_query = run_query
+        except Exception as e:
+            print(f"WARN: LangGraph 사용 불가, 일반 모드로 처리합니다 — {e}")
+            _lg_run_query = False
+    return _lg_run_query or None
+
+
+_search_mod = None
 
-# UI snippet preview length (configurable via env)
-def _env_int(name: str, default: int) -> int:
-    try:
-        return int(os.getenv(name, str(default)) or default)
-    except Exception:
-        return default
 
-SNIPPET_PREVIEW_CHARS = _env_int("SNIPPET_PREVIEW_CHARS", 400)
+async def _search_api():
+    """retrivers.internal_search, imported in a worker thread on first use."""
+    global _search_mod
+    if _search_mod is None:
+        _search_mod = await cl.make_async(importlib.import_module)("retrivers.internal_search")
+    return _search_mod
+
+
+def _preload():
+    # Import the search stack while the user is still typing the first question
+    importlib.import_module("retrivers.internal_search")
+    _langgraph()
+
+
+def _profile_first_request(handler):
+    """STARTUP_PROFILE: log how long the first message took and which packages it had to import."""
+    if not STARTUP_PROFILE:
+        return handler
+    pending = True
+
+    @functools.wraps(handler)
+    async def wrapper(msg):
+        nonlocal pending
+        if not pending:
+            return await handler(msg)
+        pending = False
+        before, t0 = set(sys.modules), time.perf_counter()
+        try:
+            return await handler(msg)
+        finally:
+            loaded = sorted({m.split(".")[0] for m in set(sys.modules) - before})
+            print(f"[startup] first request {(time.perf_counter() - t0) * 1000:.0f}ms "
+                  f"({t0 - _T_READY:.1f}s after app import); imported then: {', '.join(loaded) or '-'}")
+    return wrapper
+
+# UI snippet preview length (configurable via env)
+SNIPPET_PREVIEW_CHARS = env_int("SNIPPET_PREVIEW_CHARS", 400)
 
 
 def _uploads_page_size() -> int:
     # Page size for uploads list; defaults to 10
-    return _env_int("UPLOADS_PAGE_SIZE", 10)
+    return env_int("UPLOADS_PAGE_SIZE", 10)
 
 
 async def _send_uploads_list(page: int = 0):
@@ -177,17 +235,17 @@ def _strip_inline_source_markers(text: str) -> str:
 
 """In-chat history panel features removed for a cleaner UI."""
 
+def _snippet_line(h):
+    title = h.get("title", "")
+    chunk = (h.get("chunk") or "").replace("\n", " ")
+    # Keep prompt context clean: exclude raw source refs and page indicators
+    return f"- {title}: {chunk}" if title else f"- {chunk}"
+
+
 def _format_snippets(hits):
-    rows = []
-    for h in hits:
-        title = h.get("title", "")
-        chunk = (_preview_text(h.get("chunk", ""), 500)).replace("\n", " ")
-        # Keep prompt context clean: exclude raw source refs and page indicators
-        if title:
-            rows.append(f"- {title}: {chunk}")
-        else:
-            rows.append(f"- {chunk}")
-    return "\n".join(rows)
+    # Adjacent chunks merged, overlap kept once, filled up to CONTEXT_TOKEN_BUDGET in score order
+    from rag.context_pack import pack_context
+    return pack_context(hits, _snippet_line)
 
 
 def _sanitize_hits_for_log(hits):
@@ -227,36 +285,6 @@ def _highlight(text: str, query: str) -> str:
     except Exception:
         return text
 
-def _query_tokens(q: str) -> List[str]:
-    if not q:
-        return []
-    try:
-        # Extract words and Korean blocks; drop very short tokens
-        toks = re.findall(r"[\w가-힣]+", q, flags=re.IGNORECASE)
-        toks = [t.lower() for t in toks if len(t) >= 2 and not t.startswith('/')]
-        # de-dup while preserving length-based relevance
-        return sorted(set(toks), key=len, reverse=True)
-    except Exception:
-        return [t for t in (q or '').split() if len(t) >= 2]
-
-def _is_relevant_hits(hits: List[dict], query: str, k: int = 3) -> bool:
-    """Heuristic guard: require token overlap in at least 2 of the top-k hits.
-    Returns True if >= 2 hits contain any query token.
-    """
-    toks = _query_tokens(query)
-    if not toks:
-        return False
-    k = max(1, k)
-    match_hits = 0
-    for h in hits[:k]:
-        title = (h.get('title') or '').lower()
-        chunk = (h.get('chunk') or '').lower()
-        blob = f"{title}\n{chunk}"
-        if any(t in blob for t in toks):
-            match_hits += 1
-    return match_hits >= 2 or (match_hits >= 1 and k == 1)
-
-
 def _group_hits_by_doc(hits: List[dict]) -> List[dict]:
     groups: Dict[str, dict] = {}
     order: List[str] = []
@@ -278,8 +306,12 @@ def _hits_table_markdown(hits: List[dict], max_rows: int = 5, preview_chars: int
         title = (g.get("title") or "(제목없음)").replace("|"," ")
         src = _format_source_for_table(g.get("source_uri",""))
         first = g.get("items", [{}])[0]
-        preview = _preview_text(first.get("chunk",""), preview_chars).replace("\n"," ")
-        preview = _highlight(preview, query)
+        if first.get("chunk") is None and first.get("snippet"):
+            # Snippet-only hit: fragments already carry the service's highlights
+            preview = _preview_text(first["snippet"], preview_chars).replace("\n"," ").replace("|"," ")
+        else:
+            preview = _preview_text(first.get("chunk") or "", preview_chars).replace("\n"," ")
+            preview = _highlight(preview, query)
         rows.append(f"| {i} | {title} | {src} | {preview} |")
         action_map.append((f"전체 보기 #{i}", str(first.get("id") or os.urandom(8).hex())))
     return "\n".join(rows), action_map
@@ -301,6 +333,7 @@ def _render_log_entry(idx: int, entry: dict) -> str:
 
 
 def _read_pdf(path: str) -> str:
+    from pypdf import PdfReader
     reader = PdfReader(path)
     texts = []
     for i, page in enumerate(reader.pages, start=1):
@@ -315,14 +348,12 @@ def _read_txt(path: str) -> str:
 
 
 def _read_docx(path: str) -> str:
+    from ingest.extract import read_docx_text
     try:
-        docx_mod = importlib.import_module("docx")
-        _Docx = getattr(docx_mod, "Document")
-    except Exception:
+        return read_docx_text(Path(path))
+    except ModuleNotFoundError:
+        # Only the DOCX_BACKEND=python-docx backend needs the package
         raise RuntimeError("DOCX 지원을 위해 'python-docx' 패키지를 설치하세요 (requirements.txt).")
-    doc = _Docx(path)
-    paras = [p.text.strip() for p in doc.paragraphs if p.text and p.text.strip()]
-    return "\n\n".join(paras)
 
 
 # ===== Azure Blob helpers =====
@@ -335,6 +366,8 @@ def _get_blob_container_client():
     Returns (client, container_url) or (None, None) if not configured.
     """
     try:
+        from azure.storage.blob import BlobServiceClient
+        from azure.identity import DefaultAzureCredential
         container = os.getenv("BLOB_CONTAINER", "ia-source")
         conn = os.getenv("BLOB_CONNECTION_STRING")
         if conn:
@@ -389,6 +422,8 @@ def _build_blob_sas_url(container_client, blob_name: str) -> str | None:
     Expiry defaults to 1 hour and can be tuned via BLOB_SAS_TTL_MIN (minutes).
     """
     try:
+        from azure.storage.blob import BlobServiceClient, generate_blob_sas, BlobSasPermissions
+        from azure.identity import DefaultAzureCredential
         # Determine expiry
         ttl_min = 60
         try:
@@ -561,17 +596,20 @@ async def _summarize_and_keywords(text: str) -> Dict[str, Any]:
     kw_prompt = (
         "다음 문서의 핵심 키워드 8개만 콤마로 나열해 주세요 (짧고 보편적인 형태).\n\n" + sample
     )
-    s_resp = client.chat.completions.create(
-        model=CHAT_DEPLOY,
-        messages=[{"role":"system","content":"You are a concise summarizer."},{"role":"user","content":sum_prompt}],
-        temperature=0.2
+    # Summary and keywords are independent; request both at once
+    s_resp, k_resp = await asyncio.gather(
+        _aclient().chat.completions.create(
+            model=CHAT_DEPLOY,
+            messages=[{"role":"system","content":"You are a concise summarizer."},{"role":"user","content":sum_prompt}],
+            temperature=0.2
+        ),
+        _aclient().chat.completions.create(
+            model=CHAT_DEPLOY,
+            messages=[{"role":"system","content":"Extract keywords."},{"role":"user","content":kw_prompt}],
+            temperature=0
+        ),
     )
     summary = s_resp.choices[0].message.content
-    k_resp = client.chat.completions.create(
-        model=CHAT_DEPLOY,
-        messages=[{"role":"system","content":"Extract keywords."},{"role":"user","content":kw_prompt}],
-        temperature=0
-    )
     kws_raw = k_resp.choices[0].message.content
     # normalize keywords → hashtags
     parts = [p.strip().lstrip("-•").strip() for p in (kws_raw or "").replace("\n", ",").split(",")]
@@ -580,14 +618,55 @@ async def _summarize_and_keywords(text: str) -> Dict[str, Any]:
     return {"summary": summary, "hashtags": hashtags}
 
 
-def _recommend_similar(doc_id: str, top: int = 5):
+async def _stream_answer(prompt: str) -> str:
+    """Stream the chat completion into a new message token by token; returns the full answer."""
+    out = cl.Message(content="")
+    stream = await _aclient().chat.completions.create(
+        model=CHAT_DEPLOY,
+        messages=[
+            {"role":"system","content":"You are a helpful, factual assistant."},
+            {"role":"user","content": prompt}
+        ],
+        temperature=0.2,
+        stream=True,
+    )
+    async for chunk in stream:
+        # Azure sends a leading chunk without choices (prompt filter results)
+        delta = chunk.choices[0].delta.content if chunk.choices else None
+        if delta:
+            await out.stream_token(delta)
+    await out.send()
+    return out.content
+
+
+async def _run_langgraph_streamed(lg_run_query, mode: str, question: str, out: cl.Message):
+    """Run the graph in a worker thread and relay its generate-node tokens into `out`."""
+    loop = asyncio.get_running_loop()
+    tokens: asyncio.Queue = asyncio.Queue()
+
+    def run():
+        try:
+            return lg_run_query(mode, question, on_token=lambda t: loop.call_soon_threadsafe(tokens.put_nowait, t))
+        finally:
+            loop.call_soon_threadsafe(tokens.put_nowait, None)
+
+    task = asyncio.ensure_future(cl.make_async(run)())
+    while (tok := await tokens.get()) is not None:
+        await out.stream_token(tok)
+    return await task
+
+
+async def _recommend_similar(doc_id: str, top: int = 5):
     try:
-        return hybrid_search("이 문서와 유사한 내용", top=top, filter=f"doc_id ne '{doc_id}'")
+        # Only titles/sources are kept for recommendations
+        return await (await _search_api()).hybrid_search_async("이 문서와 유사한 내용", top=top, filter=f"doc_id ne '{doc_id}'", lite=True)
     except Exception:
         return []
 
 
 def _upsert_chunks(doc_id: str, title: str, source_uri: str, text: str, system: str = "upload") -> int:
+    from ingest.chunker import simple_chunks
+    from ingest.build_chunks import embed_batch
     # Tuned chunk size/overlap for better precision
     parts = simple_chunks(text, 900, 220)
     if not parts:
@@ -606,8 +685,15 @@ def _upsert_chunks(doc_id: str, title: str, source_uri: str, text: str, system:
             "system": system,
             "year": year,
         })
-    _search_chunks.upload_documents(batch)
-    return len(batch)
+    res = _chunk_uploader().upload(batch)
+    if res.succeeded:
+        index_generation.bump(INDEX_CHUNKS)  # cached search results no longer reflect the index
+    if res.failed:
+        err = next(iter(res.failed.values()))
+        if not res.succeeded:
+            raise RuntimeError(f"청크 업로드 실패 ({len(res.failed)}개): {err}")
+        print(f"WARN: 일부 청크 업로드 실패: {title} ({len(res.failed)}/{len(batch)}개) — {err}")
+    return len(res.succeeded)
 
 @cl.on_chat_start
 async def start():
@@ -626,11 +712,14 @@ async def start():
     cl.user_session.set("settings", settings)
     cl.user_session.set("history", [])
     cl.user_session.set("uploads", [])
+    if _search_mod is None:
+        asyncio.get_running_loop().run_in_executor(None, _preload)
     # Minimal intro message without panel references
     await cl.Message(content=(
         "질문을 입력하면 검색과 요약을 수행합니다.\n"
         "- /업로드 : 문서 업로드 및 분석\n- /업로드목록 : 업로드 목록\n"
         "- /기록시각화 : IA 검색 히스토리 시각화\n"
+        "- /캐시 : 임베딩·검색 캐시 적중률, 검색 플랜\n"
         "- /기록 : 최근 검색 목록\n- /보기 N : N번째 검색 로그"
     )).send()
 
@@ -655,6 +744,7 @@ def _normalize_command(text: str) -> str:
         "/업로드목록": "uploads",
         "/기록": "history",
         "/보기": "show",
+        "/캐시": "cache",
     # CSV viz removed
     "/기록시각화": "viz_history",
     }
@@ -664,12 +754,42 @@ def _normalize_command(text: str) -> str:
         "/uploads": "uploads",
         "/history": "history",
     "/show": "show",
+    "/cache": "cache",
     # CSV viz removed
     "/viz-history": "viz_history",
     "/history-viz": "viz_history",
     }
     return ko_map.get(head) or en_map.get(head) or ""
 
+def _cache_text() -> str:
+    from retrivers.internal_search import query_embed_cache_stats, search_cache_stats, chunk_cache_stats, search_plan
+    from rag.embed_cache import get_embedding_cache
+    q = query_embed_cache_stats()
+    lines = [
+        "캐시 상태 (프로세스 기준):",
+        f"- 질의 임베딩(메모리): 적중 {q['hits']} / 미스 {q['misses']} (적중률 {q['hit_rate']:.1%}), "
+        f"항목 {q['entries']}/{q['max_size']}, 만료 {q['expired']}, 축출 {q['evictions']}",
+    ]
+    r = search_cache_stats()
+    lines.append(f"- 검색 결과: 적중 {r['hits']} / 미스 {r['misses']} (적중률 {r['hit_rate']:.1%}), "
+                 f"항목 {r['entries']}/{r['max_size']}, 인덱스 변경으로 무효화 {r['invalidated']} (세대 {r['generation']})")
+    c = chunk_cache_stats()
+    lines.append(f"- 청크 본문(메모리): 적중 {c['hits']} / 미스 {c['misses']} (적중률 {c['hit_rate']:.1%}), "
+                 f"항목 {c['entries']}/{c['max_size']}")
+    plan = search_plan()
+    lines.append(f"- 검색 플랜: {plan['name']} ({plan['vector_api']})" if plan else "- 검색 플랜: 첫 검색 시 결정")
+    for name, p in sorted(clients.pool_stats().items()):
+        lines.append(f"- HTTP 연결({name}): 요청 {p['requests']}, 새 연결 {p['connections']}, "
+                     f"재사용 {p['reused']} ({p['reuse_rate']:.1%})")
+    disk = get_embedding_cache()
+    if disk is not None:
+        d = disk.stats()
+        lines.append(f"- 임베딩(디스크): 적중 {d['hits']} / 미스 {d['misses']} (적중률 {d['hit_rate']:.1%}), "
+                     f"항목 {d['entries']}, {d['bytes'] / 1e6:.1f}MB")
+    else:
+        lines.append("- 임베딩(디스크): 비활성화(EMBED_CACHE=off)")
+    return "\n".join(lines)
+
 def _help_text() -> str:
     return (
         "사용 가능한 명령:\n"
@@ -681,11 +801,14 @@ def _help_text() -> str:
     )
 
 @cl.on_message
+@_profile_first_request
 async def on_message(msg: cl.Message):
     # quick commands to inspect history (Korean aliases supported)
     cmd = _normalize_command(msg.content)
     if cmd == "help":
         await cl.Message(content=_help_text()).send(); return
+    if cmd == "cache":
+        await cl.Message(content=_cache_text()).send(); return
     # IA search history visualization
     if cmd == "viz_history":
         history = cl.user_session.get("history", [])
@@ -732,12 +855,13 @@ async def on_message(msg: cl.Message):
             path = f.path; name = f.name
             ext = Path(name).suffix.lower()
             try:
+                # File parsing, blob upload and indexing are blocking; run them in worker threads
                 if ext == ".pdf":
-                    text = _read_pdf(path)
+                    text = await cl.make_async(_read_pdf)(path)
                 elif ext == ".txt":
-                    text = _read_txt(path)
+                    text = await cl.make_async(_read_txt)(path)
                 elif ext == ".docx":
-                    text = _read_docx(path)
+                    text = await cl.make_async(_read_docx)(path)
                 else:
                     await cl.Message(content=f"지원하지 않는 형식: {name}").send(); continue
             except Exception as e:
@@ -748,12 +872,12 @@ async def on_message(msg: cl.Message):
             blob_url = None
             try:
                 safe_name = f"uploads/{doc_id}{ext}"
-                blob_url = _upload_to_blob(path, safe_name)
+                blob_url = await cl.make_async(_upload_to_blob)(path, safe_name)
             except Exception:
                 blob_url = None
             source_uri = blob_url or f"upload://{name}"
             try:
-                n_chunks = _upsert_chunks(doc_id, name, source_uri, text, system="upload")
+                n_chunks = await cl.make_async(_upsert_chunks)(doc_id, name, source_uri, text, system="upload")
             except Exception as e:
                 await cl.Message(content=f"인덱싱 실패: {name} — {e}").send(); continue
 
@@ -764,7 +888,7 @@ async def on_message(msg: cl.Message):
                 sk = {"summary": "(요약 실패)", "hashtags": []}
 
             # similar docs (best effort)
-            sim = _recommend_similar(doc_id, top=5)
+            sim = await _recommend_similar(doc_id, top=5)
             sim_safe = _sanitize_hits_for_log(sim)
 
 
@@ -835,18 +959,22 @@ async def on_message(msg: cl.Message):
     show_log = bool(settings.get("show_log", False))
     await cl.Message(content=f"🔎 검색 중… ({mode_label})").send()
 
-    if _LG_AVAILABLE and mode != "web_qa":
+    lg_run_query = await cl.make_async(_langgraph)() if mode != "web_qa" else None
+    if lg_run_query:
+        streamed = cl.Message(content="")
         try:
-            answer, hits = lg_run_query(mode, msg.content)
+            answer, hits, verdict = await _run_langgraph_streamed(lg_run_query, mode, msg.content, streamed)
         except Exception as e:
+            if streamed.content:
+                await streamed.remove()
             await cl.Message(content=f"LangGraph 실행 오류: {e}\n일반 모드로 재시도합니다.").send()
             # fall back to non-LangGraph path
             _lg = False
         else:
             _lg = True
-        if _LG_AVAILABLE and '_lg' in locals() and _lg:
-            # Guard: if no hits, or hits irrelevant, avoid answering
-            if not hits:
+        if '_lg' in locals() and _lg:
+            # The graph's relevance gate ended the run before the LLM on no / off-topic hits
+            if verdict == NO_HITS:
                 await cl.Message(content="📭 관련 근거를 찾지 못했습니다.\n- 검색어를 바꾸거나 필터를 조정해 보세요.").send()
                 # log empty and return
                 history = cl.user_session.get("history", [])
@@ -861,8 +989,7 @@ async def on_message(msg: cl.Message):
                 if show_log:
                     await cl.Message(content=_render_log_entry(len(history)-1, history[-1])).send()
                 return
-            _relevant = _is_relevant_hits(hits, msg.content)
-            if not _relevant:
+            if verdict == OFF_TOPIC:
                 tips = [
                     "질문과 근거의 관련성이 낮습니다.",
                     "- 질문에 문서의 핵심 키워드나 용어를 더 포함해 보세요.",
@@ -871,7 +998,10 @@ async def on_message(msg: cl.Message):
                 # 오프토픽: 근거 표시는 하지 않습니다.
                 await cl.Message(content="\n".join(tips)).send()
             else:
-                await cl.Message(content=answer).send()
+                if streamed.content:
+                    await streamed.send()  # finalize the streamed answer
+                else:
+                    await cl.Message(content=answer).send()
                 if hits:
                     # cache last hits for full-view actions
                     last_hits_map = {}
@@ -914,7 +1044,8 @@ async def on_message(msg: cl.Message):
             )).send()
             return
         try:
-            answer, sources = ask_via_agent_with_sources(msg.content)
+            from retrivers.agents_web_qa import ask_via_agent_with_sources
+            answer, sources = await cl.make_async(ask_via_agent_with_sources)(msg.content)
             answer = _strip_inline_source_markers(answer)
             await cl.Message(content=answer).send()
             hits = []
@@ -963,7 +1094,9 @@ async def on_message(msg: cl.Message):
             await cl.Message(content=f"에이전트(웹 검색) 호출 실패: {e}").send()
             return
     else:
-        hits = hybrid_search(msg.content, top=top_k, filter=filter_str)
+        search_api = await _search_api()
+        hits = await search_api.hybrid_search_async(msg.content, top=top_k, filter=filter_str,
+                                                    lite=search_api.LITE_RESULTS)
         # If no hits, avoid hallucination by not calling the LLM
         if not hits:
             msg_lines = [
@@ -987,7 +1120,7 @@ async def on_message(msg: cl.Message):
                 await cl.Message(content=_render_log_entry(idx, history[idx])).send()
             return
         # Build prompt only when hits exist AND look relevant
-        if not _is_relevant_hits(hits, msg.content):
+        if not is_relevant_hits(hits, msg.content):
             # 오프토픽: LLM 호출도, 근거 표시도 하지 않음. 가이드만 출력.
             tips = [
                 "질문과 근거의 관련성이 낮습니다.",
@@ -1008,21 +1141,15 @@ async def on_message(msg: cl.Message):
             if show_log:
                 await cl.Message(content=_render_log_entry(len(history)-1, history[-1])).send()
             return
+        # Snippet-only hits (SEARCH_LITE_RESULTS=true) get all chunk bodies in one lookup
+        await search_api.fetch_chunks_async(hits)
         snippets = _format_snippets(hits)
         prompt = (IA_SUMMARY_PROMPT if mode=="ia_summary" else QA_PROMPT).format(
             question=msg.content, snippets=snippets
         )
 
-    resp = client.chat.completions.create(
-        model=CHAT_DEPLOY,
-        messages=[
-            {"role":"system","content":"You are a helpful, factual assistant."},
-            {"role":"user","content": prompt}
-        ],
-        temperature=0.2
-    )
-    answer = resp.choices[0].message.content
-    await cl.Message(content=answer).send()
+    # Tokens reach the user as they are generated (time to first token, not full completion)
+    answer = await _stream_answer(prompt)
 
     if hits:
         # cache and compact evidence rendering
@@ -1136,3 +1263,9 @@ async def uploads_page_next(action):
     except Exception:
         page = (cl.user_session.get("uploads_page", 0) or 0) + 1
     await _send_uploads_list(page=page)
+
+
+_T_READY = time.perf_counter()
+if STARTUP_PROFILE:
+    print(f"[startup] app import {(_T_READY - _T_IMPORT) * 1000:.0f}ms "
+          f"(heavy SDKs deferred; per-module breakdown: python scripts/profile_startup.py)")
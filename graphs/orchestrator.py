@@ -1,18 +1,22 @@
 import os
-from typing import TypedDict, List, Optional, Dict, Any
+from typing import TypedDict, List, Optional, Dict, Any, Callable
 from dotenv import load_dotenv
 
 load_dotenv()
 
 from openai import AzureOpenAI
-from retrivers.internal_search import hybrid_search
+from retrivers.internal_search import hybrid_search, fetch_chunks, LITE_RESULTS
 from rag.prompst import QA_PROMPT, IA_SUMMARY_PROMPT, WEB_QA_PROMPT
+from rag import clients
+from rag.relevance import relevance_verdict, RELEVANT
+from rag.context_pack import pack_context
 
 
 class State(TypedDict, total=False):
     question: str
     mode: str
     hits: List[Dict[str, Any]]
+    verdict: str  # relevance gate: relevant | no_hits | off_topic
     snippets: str
     prompt: str
     answer: str
@@ -31,20 +35,24 @@ _graph = None
 def _get_client() -> AzureOpenAI:
     global _client
     if _client is None:
-        _client = AzureOpenAI(azure_endpoint=AOAI_ENDPOINT, api_key=AOAI_KEY, api_version=AOAI_VER)
+        _client = clients.openai_client(AOAI_ENDPOINT, AOAI_KEY, AOAI_VER)
     return _client
 
 
+def _snippet_line(h: Dict[str, Any]) -> str:
+    title = h.get("title", "")
+    page, page_end = h.get("page"), h.get("page_end")
+    uri = h.get("source_uri", "")
+    chunk = (h.get("chunk") or "").replace("\n", " ")
+    page_part = f" p.{page}" if page not in (None, "") else ""
+    if page_part and page_end not in (None, "", page):
+        page_part += f"-{page_end}"
+    return f"- {title}{page_part}: {chunk} [src: {uri}]"
+
+
 def _format_snippets(hits: List[Dict[str, Any]]) -> str:
-    rows = []
-    for h in hits:
-        title = h.get("title", "")
-        page = h.get("page")
-        uri = h.get("source_uri", "")
-        chunk = (h.get("chunk", "")[:500]).replace("\n", " ")
-        page_part = f" p.{page}" if page not in (None, "") else ""
-        rows.append(f"- {title}{page_part}: {chunk} [src: {uri}]")
-    return "\n".join(rows)
+    # Merged adjacent chunks within CONTEXT_TOKEN_BUDGET (see rag/context_pack.py)
+    return pack_context(hits, _snippet_line)
 
 
 def _route(state: State) -> str:
@@ -55,14 +63,23 @@ def _route(state: State) -> str:
 
 
 def _retrieve_internal(state: State) -> State:
-    hits = hybrid_search(state["question"], top=8)
+    hits = hybrid_search(state["question"], top=8, lite=LITE_RESULTS)
     return {"hits": hits}
 
 
+def _check_relevance(state: State) -> State:
+    """Gate before the LLM call: no hits / off-topic hits end the run (snippet-only hits are judged by snippet)."""
+    return {"verdict": relevance_verdict(state.get("hits", []), state["question"])}
+
+
+def _after_check(state: State) -> str:
+    return "make_prompt" if state.get("verdict") == RELEVANT else "end"
+
 
 def _make_prompt(state: State) -> State:
     mode = state.get("mode", "qa")
-    hits = state.get("hits", [])
+    # Snippet-only hits (SEARCH_LITE_RESULTS=true) get all chunk bodies in one lookup
+    hits = fetch_chunks(list(state.get("hits", [])))
     snippets = _format_snippets(hits)
     if mode == "web_qa":
         prompt = WEB_QA_PROMPT.format(question=state["question"], snippets=snippets or "(근거 없음)")
@@ -70,10 +87,13 @@ def _make_prompt(state: State) -> State:
         prompt = IA_SUMMARY_PROMPT.format(question=state["question"], snippets=snippets or "(근거 없음)")
     else:
         prompt = QA_PROMPT.format(question=state["question"], snippets=snippets or "(근거 없음)")
-    return {"snippets": snippets, "prompt": prompt}
+    return {"hits": hits, "snippets": snippets, "prompt": prompt}
 
 
-def _generate(state: State) -> State:
+def _generate(state: State, config: Optional[Dict[str, Any]] = None) -> State:
+    """Chat completion for the prompt. With an `on_token` callable in config["configurable"]
+    the completion is streamed and every content delta is passed to it as it arrives."""
+    on_token = ((config or {}).get("configurable") or {}).get("on_token")
     client = _get_client()
     try:
         resp = client.chat.completions.create(
@@ -83,9 +103,18 @@ def _generate(state: State) -> State:
                 {"role": "user", "content": state["prompt"]},
             ],
             temperature=0.2,
+            stream=on_token is not None,
         )
-        answer = resp.choices[0].message.content
-        return {"answer": answer}
+        if on_token is None:
+            return {"answer": resp.choices[0].message.content}
+        parts = []
+        for chunk in resp:
+            # Azure sends a leading chunk without choices (prompt filter results)
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                parts.append(delta)
+                on_token(delta)
+        return {"answer": "".join(parts)}
     except Exception as e:  # pragma: no cover
         return {"error": str(e)}
 
@@ -99,22 +128,27 @@ def build_graph():
         )
     sg = StateGraph(State)
     sg.add_node("retrieve_internal", _retrieve_internal)
+    sg.add_node("check_relevance", _check_relevance)
     sg.add_node("make_prompt", _make_prompt)
     sg.add_node("generate", _generate)
 
     # web_qa는 app.py에서 직접 처리하므로 LangGraph에서는 제외
     sg.add_edge(START, "retrieve_internal")
-    sg.add_edge("retrieve_internal", "make_prompt")
+    sg.add_edge("retrieve_internal", "check_relevance")
+    sg.add_conditional_edges("check_relevance", _after_check, {"make_prompt": "make_prompt", "end": END})
     sg.add_edge("make_prompt", "generate")
     sg.add_edge("generate", END)
     return sg.compile()
 
 
-def run_query(mode: str, question: str):
+def run_query(mode: str, question: str, on_token: Optional[Callable[[str], None]] = None):
+    """Run the graph; `on_token` receives the answer's tokens while the generate node streams them.
+    Returns (answer, hits, verdict); the answer is empty unless the verdict is "relevant"."""
     global _graph
     if _graph is None:
         _graph = build_graph()
-    result: State = _graph.invoke({"mode": mode, "question": question})
+    config = {"configurable": {"on_token": on_token}} if on_token else None
+    result: State = _graph.invoke({"mode": mode, "question": question}, config=config)
     if result.get("error"):
         raise RuntimeError(result["error"])  # surface error to caller
-    return result.get("answer", ""), result.get("hits", [])
+    return result.get("answer", ""), result.get("hits", []), result.get("verdict", RELEVANT)
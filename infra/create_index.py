@@ -34,6 +34,17 @@ if not parsed.scheme or not parsed.netloc:
 if not re.search(r"\.search\.windows\.net$", parsed.netloc):
     print(f"WARN: SEARCH_ENDPOINT host looks unusual: {parsed.netloc}")
 
+# Vector storage options (see README "벡터 차원 축소·양자화")
+EMBED_DIMENSIONS = int(os.getenv("EMBED_DIMENSIONS", "0") or 0)
+VECTOR_COMPRESSION = os.getenv("VECTOR_COMPRESSION", "none").strip().lower()
+VECTOR_RESCORE = os.getenv("VECTOR_RESCORE", "true").lower() not in ("0", "false", "no", "off")
+VECTOR_STORED = os.getenv("VECTOR_STORED", "true").lower() not in ("0", "false", "no", "off")
+_COMPRESSION_KINDS = {"scalar": "scalarQuantization", "binary": "binaryQuantization"}
+_DEFAULT_OVERSAMPLING = {"scalar": 4.0, "binary": 10.0}
+
+if VECTOR_COMPRESSION not in ("none", "") and VECTOR_COMPRESSION not in _COMPRESSION_KINDS:
+    fail(f"VECTOR_COMPRESSION must be none, scalar or binary: {VECTOR_COMPRESSION}")
+
 headers = {
     "api-key": key,
     "Content-Type": "application/json",
@@ -44,7 +55,36 @@ def load_index_schema(p: Path) -> dict:
     with open(p, "r", encoding="utf-8") as f:
         return json.load(f)
 
-schema = load_index_schema(index_def_path)
+def apply_vector_options(schema: dict) -> dict:
+    """Embedding width, quantized vector storage with oversampled rescoring, and the stored copy."""
+    vec = next(f for f in schema["fields"] if f["name"] == "contentVector")
+    if EMBED_DIMENSIONS:
+        vec["dimensions"] = EMBED_DIMENSIONS
+    if not VECTOR_STORED:
+        # Drops the retrievable full-precision copy; search and rescoring are unaffected
+        vec["stored"] = False
+        vec["retrievable"] = False
+    kind = _COMPRESSION_KINDS.get(VECTOR_COMPRESSION)
+    if kind:
+        vs = schema["vectorSearch"]
+        comp = {
+            "name": VECTOR_COMPRESSION,
+            "kind": kind,
+            "rerankWithOriginalVectors": VECTOR_RESCORE,
+            "defaultOversampling": float(os.getenv("VECTOR_OVERSAMPLING", "") or _DEFAULT_OVERSAMPLING[VECTOR_COMPRESSION])
+                                   if VECTOR_RESCORE else None,
+        }
+        if kind == "scalarQuantization":
+            comp["scalarQuantizationParameters"] = {"quantizedDataType": "int8"}
+        vs["compressions"] = [{k: v for k, v in comp.items() if v is not None}]
+        for prof in vs["profiles"]:
+            if prof["name"] == vec["vectorSearchProfile"]:
+                prof["compression"] = VECTOR_COMPRESSION
+    print(f"contentVector: dimensions={vec['dimensions']} compression={VECTOR_COMPRESSION or 'none'} "
+          f"rescore={VECTOR_RESCORE if kind else '-'} stored={VECTOR_STORED}")
+    return schema
+
+schema = apply_vector_options(load_index_schema(index_def_path))
 index_name = schema.get("name", "ia-chunks")
 
 base = endpoint.rstrip("/")
@@ -1,16 +1,8 @@
-import os, uuid, re, unicodedata
+import os, sys, argparse, threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from dotenv import load_dotenv
-from openai import AzureOpenAI
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
-from pypdf import PdfReader
-import importlib
-try:
-    from pdfminer.high_level import extract_text as _pdfminer_extract_text
-    _HAS_PDFMINER = True
-except Exception:
-    _HAS_PDFMINER = False
 
 load_dotenv()
 SEARCH_ENDPOINT=os.getenv("SEARCH_ENDPOINT")
@@ -24,181 +16,545 @@ _data_dir_str = os.getenv("DATA_DIR","./data")
 DATA_DIR = Path(_data_dir_str)
 if not DATA_DIR.is_absolute():
     DATA_DIR = _ROOT / _data_dir_str
+# Allow `python ingest/build_chunks.py` as well as `import ingest.build_chunks`
+if str(_ROOT) not in sys.path:
+    sys.path.insert(0, str(_ROOT))
+from ingest.manifest import IngestManifest, RawCheckpoint, file_sha256
+from ingest.extract import extract_item_parallel, clean_item, chunk_item
+from ingest.pipeline import Pipeline
+from rag import index_generation, clients
+from rag.env import env_int
+from rag.embed_cache import get_embedding_cache, embed_dimensions, embed_request_kwargs, model_cache_key
+from ingest.embed_scheduler import scheduler_from_env, estimate_tokens
+from ingest.bulk_upload import uploader_from_env
+from ingest.dedup import DedupIndex, DedupReport
+
+# Per-index record of source file hashes and the chunk IDs written for them
+_manifest_str = os.getenv("INGEST_MANIFEST", f".cache/ingest-manifest-{INDEX_CHUNKS}.json")
+INGEST_MANIFEST = Path(_manifest_str)
+if not INGEST_MANIFEST.is_absolute():
+    INGEST_MANIFEST = _ROOT / _manifest_str
+
+# Near-duplicate chunk detection before embedding (local ingest). Chunks whose estimated
+# Jaccard similarity to an indexed chunk reaches the threshold are linked, not embedded.
+DEDUP = os.getenv("DEDUP", "on").lower() not in ("0", "off", "false", "no")
+try:
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.97"))
+except ValueError:
+    DEDUP_THRESHOLD = 0.97
+_dedup_str = os.getenv("DEDUP_INDEX", f".cache/dedup-{INDEX_CHUNKS}.sqlite")
+DEDUP_INDEX = Path(_dedup_str)
+if not DEDUP_INDEX.is_absolute():
+    DEDUP_INDEX = _ROOT / _dedup_str
+
+# ia-raw paging: sortable+filterable key for keyset paging, and the resume checkpoint
+RAW_SORT_FIELD = os.getenv("RAW_SORT_FIELD", "id")
+_raw_ckpt_str = os.getenv("INGEST_RAW_CHECKPOINT", f".cache/ingest-raw-checkpoint-{INDEX_RAW}-{INDEX_CHUNKS}.json")
+INGEST_RAW_CHECKPOINT = Path(_raw_ckpt_str)
+if not INGEST_RAW_CHECKPOINT.is_absolute():
+    INGEST_RAW_CHECKPOINT = _ROOT / _raw_ckpt_str
 
 AOAI_ENDPOINT=os.getenv("AZURE_OPENAI_ENDPOINT")
 AOAI_KEY=os.getenv("AZURE_OPENAI_API_KEY")
 AOAI_VER=os.getenv("AZURE_OPENAI_API_VERSION")
 EMBED_DEPLOY=os.getenv("AZURE_OPENAI_EMBED_DEPLOYMENT")
 
-search_chunks = SearchClient(SEARCH_ENDPOINT, INDEX_CHUNKS, AzureKeyCredential(SEARCH_API_KEY))
-search_raw    = SearchClient(SEARCH_ENDPOINT, INDEX_RAW,   AzureKeyCredential(SEARCH_API_KEY))
-aoai          = AzureOpenAI(azure_endpoint=AOAI_ENDPOINT, api_key=AOAI_KEY, api_version=AOAI_VER)
-
-def clean_text(text: str) -> str:
-    # Unicode normalize (fix ligatures like ﬂ → fl, normalize widths)
-    t = unicodedata.normalize("NFKC", text)
-    # Remove control characters except newlines and tabs
-    t = "".join(ch for ch in t if (ch in "\n\t" or unicodedata.category(ch)[0] != "C"))
-    # Replace non-breaking spaces and weird spaces with normal space
-    t = t.replace("\xa0", " ").replace("\u200b", " ")
-    # Collapse long runs of punctuation artifacts
-    t = re.sub(r"[\uFFFD]+", " ", t)  # replacement char → space
-    # Trim overly long repeated punctuation
-    t = re.sub(r"([\-=_*#~])\1{3,}", r"\1\1", t)
-    # Normalize whitespace inside lines
-    t = re.sub(r"[ \t]+", " ", t)
-    # De-hyphenate at line breaks: "exam-\nple" → "example"
-    t = re.sub(r"(\w)-\n(\w)", r"\1\2", t)
-    # Convert single newlines (within paragraphs) to spaces, keep paragraph breaks
-    t = re.sub(r"(?<!\n)\n(?!\n)", " ", t)
-    return t
-
-
-def simple_chunks(text: str, max_len=900, overlap=220):
-    paras = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
-    out, buf = [], ""
-    for p in paras:
-        if len(buf)+len(p)+1 <= max_len: buf = (buf+"\n\n"+p).strip()
-        else:
-            if buf: out.append(buf)
-            keep = buf[-overlap:] if len(buf)>overlap else ""
-            buf = (keep+"\n\n"+p).strip()
-    if buf: out.append(buf)
-    return out
+# SEARCH_BACKEND=local writes chunks to the in-process index (raw documents stay in Azure)
+search_chunks = clients.chunk_search_client(SEARCH_ENDPOINT, INDEX_CHUNKS, SEARCH_API_KEY)
+search_raw    = clients.search_client(SEARCH_ENDPOINT, INDEX_RAW, SEARCH_API_KEY)
+aoai          = clients.openai_client(AOAI_ENDPOINT, AOAI_KEY, AOAI_VER)
 
-from typing import List
+from typing import Dict, List, Optional
 
 
-def embed_batch(texts: List[str]) -> List[List[float]]:
-    resp = aoai.embeddings.create(model=EMBED_DEPLOY, input=texts)
+EMBED_DIMENSIONS = embed_dimensions()
+_EMBED_KW = embed_request_kwargs(EMBED_DIMENSIONS)
+_EMBED_CACHE_KEY = model_cache_key(EMBED_DEPLOY, EMBED_DIMENSIONS)
+
+
+def _embed_request(texts: List[str]) -> List[List[float]]:
+    # Retries (429 Retry-After / back-off) are handled by the scheduler
+    resp = aoai.with_options(max_retries=0).embeddings.create(model=EMBED_DEPLOY, input=texts, **_EMBED_KW)
     return [d.embedding for d in resp.data]
 
 
-def _quality_score(t: str) -> float:
-    t2 = t.strip()
-    if not t2:
-        return 0.0
-    # penalize replacement chars and very short content
-    bad = t2.count("\uFFFD")
-    letters = sum(ch.isalnum() for ch in t2)
-    score = letters / max(len(t2), 1)
-    if bad:
-        score *= 1.0 / (1 + bad)
-    # longer text gets slight bonus
-    score *= min(len(t2) / 500.0, 1.0) * 0.2 + 0.8
-    return score
-
-def ingest_local():
-    batch=[]
-    # 1) PDF
-    for pdf in DATA_DIR.glob("*.pdf"):
-        reader = PdfReader(str(pdf))
-        full_text = ""
-        for i, page in enumerate(reader.pages, start=1):
-            # First try PyPDF
-            t = page.extract_text() or ""
-            t = clean_text(t)
-            sc = _quality_score(t)
-            # If bad quality and pdfminer is available, try pdfminer per page
-            if sc < 0.25 and _HAS_PDFMINER:
-                try:
-                    t2 = _pdfminer_extract_text(str(pdf), page_numbers=[i-1]) or ""
-                    t2 = clean_text(t2)
-                    if _quality_score(t2) > sc:
-                        t = t2
-                        sc = _quality_score(t2)
-                except Exception:
-                    pass
-            full_text += f"\n\n[Page {i}]\n{t}"
-        parts = simple_chunks(full_text, 1200, 150)
-        if not parts: continue
-        vecs = embed_batch(parts)
-        for t, v in zip(parts, vecs):
+_embed_scheduler = scheduler_from_env(_embed_request)
+_uploader = uploader_from_env(search_chunks)
+
+
+class _CachedEmbedJob:
+    def __init__(self, texts: List[str]):
+        self._texts = texts
+        self._cache = get_embedding_cache()
+        self._out = self._cache.get_many(_EMBED_CACHE_KEY, texts) if self._cache else [None] * len(texts)
+        self._miss = [i for i, v in enumerate(self._out) if v is None]
+        self._job = _embed_scheduler.submit([texts[i] for i in self._miss]) if self._miss else None
+
+    def result(self) -> List[List[float]]:
+        if self._job is not None:
+            vecs = self._job.result()
+            if self._cache:
+                self._cache.put_many(_EMBED_CACHE_KEY, [self._texts[i] for i in self._miss], vecs)
+            for i, v in zip(self._miss, vecs):
+                self._out[i] = v
+            self._job = None
+        return self._out
+
+
+def embed_batch_submit(texts: List[str]) -> _CachedEmbedJob:
+    """Start embedding `texts` without blocking; cache hits skip the AOAI call entirely."""
+    return _CachedEmbedJob(list(texts))
+
+
+def embed_batch(texts: List[str]) -> List[List[float]]:
+    return embed_batch_submit(texts).result()
+
+
+_LOCAL_KINDS = [("*.pdf", "PDF"), ("*.docx", "DOCX"), ("*.txt", "TXT")]
+
+
+def _delete_chunk_ids(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), 500):
+        search_chunks.delete_documents([{"id": k} for k in ids[i:i+500]])
+    if ids:
+        index_generation.bump(INDEX_CHUNKS)
+
+
+def ingest_local(force: bool = False):
+    """Incremental local ingest (pdf/docx/txt → ia-chunks) as a streaming pipeline.
+
+    extract → clean → chunk run in a process pool, embed and upload in threads;
+    bounded queues between stages give backpressure so parsing, embedding and
+    uploading overlap. Files whose content hash matches the manifest are skipped;
+    for changed files only chunks with a new content-addressed ID are embedded
+    and uploaded, stale chunk IDs and deleted files are removed from the index.
+    With DEDUP on, new chunks that are near-duplicates of chunks already in the
+    index are linked to them in the manifest instead of being embedded; when a
+    linked-to chunk is removed, the linking files are re-checked in a second pass
+    through the same pipeline (one report and one set of counters for both passes).
+    `force=True` ignores the manifest and re-embeds everything. Returns the run's
+    counters and the Pipeline (per-stage stats) for benchmarks.
+    """
+    manifest = IngestManifest(INGEST_MANIFEST, INDEX_CHUNKS, _EMBED_CACHE_KEY)
+    stats = {"skipped": 0, "changed": 0, "embedded": 0, "kept": 0, "linked": 0, "deleted": 0, "failed": 0}
+    seen, skipped = set(), set()
+    removed = set()  # chunk IDs deleted from the index in this run
+    dedup = DedupIndex(DEDUP_INDEX, DEDUP_THRESHOLD) if DEDUP else None
+    if dedup is not None and force:
+        dedup.clear()
+    dedup_report = DedupReport()
+
+    def source(only=None):
+        for pattern, kind in _LOCAL_KINDS:
+            for path in sorted(DATA_DIR.glob(pattern)):
+                name = path.name
+                if only is not None and name not in only:
+                    continue
+                seen.add(name)
+                sha = file_sha256(path)
+                if not force and manifest.is_unchanged(name, sha):
+                    stats["skipped"] += 1
+                    skipped.add(name)
+                    continue
+                yield {"name": name, "path": str(path), "kind": kind, "sha": sha, "doc_id": path.stem,
+                       "dedup": dedup is not None}
+
+    def warn(item, e):
+        # Per-file failures are reported and skipped, as before
+        print(f"WARN: {item['kind']} 읽기 실패: {item['name']} — {e}")
+        with state_lock:
+            resolved[item["name"]] = False
+            if dedup is not None:
+                dedup.discard_doc(item["name"])
+            drain()
+
+    def plan(item):
+        # Which chunks are new for this file, which are stale, and which new ones
+        # only duplicate a chunk that is already indexed
+        ids, parts = item["ids"], item["parts"]
+        old_ids = set() if force else set(manifest.chunk_ids_for(item["name"]))
+        new_idx = [k for k, cid in enumerate(ids) if cid not in old_ids]
+        item["stale"] = set(manifest.chunk_ids_for(item["name"])) - set(ids)
+        # Kept chunks that were only linked stay linked (they are not in the index themselves)
+        item["links"] = {} if force else {cid: dup for cid, dup in manifest.links_for(item["name"]).items()
+                                          if cid not in item["stale"]}
+        new_links = 0
+        item["link_docs"] = set()  # files of this run whose new chunks this file links to
+        planned.add(item["name"])
+        sigs = item.pop("sigs", None)
+        if dedup is not None and sigs is not None:
+            keep, dups = [], []
+            for k in new_idx:
+                hit = dedup.find(sigs[k], exclude=item["stale"] | {ids[k]})
+                if hit is None:
+                    dedup.add(ids[k], item["name"], sigs[k])
+                    keep.append(k)
+                else:
+                    item["links"][ids[k]] = hit[0]
+                    new_links += 1
+                    if hit[1] != item["name"] and hit[1] in planned:
+                        item["link_docs"].add(hit[1])
+                    dups.append((hit[1], estimate_tokens(parts[k]), len(parts[k])))
+            dedup_report.add_doc(item["name"], len(new_idx), dups)
+            new_idx = keep
+        item["new_idx"] = new_idx
+        item["new_links"] = new_links
+        return item
+
+    def embed(item):
+        parts, new_idx = item["parts"], item["new_idx"]
+        item["vecs"] = embed_batch([parts[k] for k in new_idx]) if new_idx else []
+        return item
+
+    batch, pending = [], []  # manifest updates become valid once `batch` is uploaded
+    inflight = deque()  # (upload job, its manifest updates) in submit order
+    # A file whose new chunks were linked to another file's new chunks is recorded only
+    # after that file's upload went through; if it failed, the linking file fails too.
+    planned = set()
+    resolved: Dict[str, bool] = {}  # file → upload committed (True) / failed (False) in this run
+    waiting = []  # manifest updates whose linked-to files are not resolved yet
+    state_lock = threading.RLock()
+
+    def fail(name, msg):
+        stats["failed"] += 1
+        resolved[name] = False
+        if dedup is not None:
+            dedup.discard_doc(name)
+        print(msg)
+
+    def commit(rec):
+        name, sha, doc_id, ids, hashes, stale, links, _ = rec
+        if stale:
+            _delete_chunk_ids(stale)
+            stats["deleted"] += len(stale)
+            removed.update(stale)
+            if dedup is not None:
+                dedup.remove(stale)
+        if dedup is not None:
+            dedup.commit_doc(name)
+        manifest.record(name, sha, doc_id, ids, hashes, links)
+        resolved[name] = True
+
+    def resolve(rec) -> bool:
+        """Commit or fail an uploaded file once the files it links to are resolved; False = keep waiting."""
+        if any(resolved.get(d) is False for d in rec[-1]):
+            fail(rec[0], f"WARN: 연결된 원본 문서의 업로드 실패, 다음 실행에서 재시도: {rec[0]}")
+        elif all(d in resolved for d in rec[-1]):
+            commit(rec)
+        else:
+            return False
+        return True
+
+    def drain():
+        while True:
+            ready = [rec for rec in waiting if resolve(rec)]
+            if not ready:
+                return
+            for rec in ready:
+                waiting.remove(rec)
+
+    def settle(wait_all: bool = False):
+        # Apply manifest updates of finished uploads; a file with any failed chunk keeps
+        # its old manifest entry, so the next run retries it.
+        with state_lock:
+            while inflight and (wait_all or inflight[0][0].done() or len(inflight) > 2):
+                job, recs = inflight.popleft()
+                res = job.result()
+                for rec in recs:
+                    bad = [k for k in rec[3] if k in res.failed]
+                    if bad:
+                        fail(rec[0], f"WARN: 청크 업로드 실패, 다음 실행에서 재시도: {rec[0]} ({len(bad)}개) — {res.failed[bad[0]]}")
+                    elif not resolve(rec):
+                        waiting.append(rec)
+                drain()
+                if res.succeeded:
+                    index_generation.bump(INDEX_CHUNKS)  # invalidates cached search results
+            if wait_all:
+                # Every file is resolved by now; anything left links to a file that never finished
+                for rec in waiting:
+                    fail(rec[0], f"WARN: 연결된 원본 문서가 처리되지 않아 다음 실행에서 재시도: {rec[0]}")
+                waiting.clear()
+            manifest.save()
+
+    def flush(final: bool = False):
+        if batch or pending:
+            inflight.append((_uploader.submit(list(batch)), list(pending)))
+            batch.clear(); pending.clear()
+        settle(final)
+
+    def upload(item):
+        name, doc_id, ids, parts = item["name"], item["doc_id"], item["ids"], item["parts"]
+        stats["changed"] += 1
+        stats["embedded"] += len(item["new_idx"])
+        stats["linked"] += item["new_links"]
+        stats["kept"] += len(ids) - len(item["new_idx"]) - item["new_links"]
+        for k, v in zip(item["new_idx"], item["vecs"]):
+            page, page_end, char_start, char_end = item["spans"][k]
             batch.append({
-                "id": str(uuid.uuid4()),
-                "doc_id": pdf.stem,
-                "title": pdf.name,
-                "chunk": t,
+                "id": ids[k],
+                "doc_id": doc_id,
+                "title": name,
+                "chunk": parts[k],
                 "contentVector": v,
-                "source_uri": f"local://{pdf.name}",
+                "source_uri": f"local://{name}",
+                "page": page,
+                "page_end": page_end,
+                "char_start": char_start,
+                "char_end": char_end,
             })
+        pending.append((name, item["sha"], doc_id, ids, item["hashes"], item["stale"], item["links"], item["link_docs"]))
         if len(batch) >= 500:
-            search_chunks.upload_documents(batch); batch.clear()
+            flush()
+        return item
+
+    workers = env_int("INGEST_WORKERS", os.cpu_count() or 2)
+    pdf_pages_per_task = env_int("PDF_PAGES_PER_TASK", 16)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pipe = (
+            Pipeline(queue_size=env_int("INGEST_QUEUE_SIZE", 8))
+            # PDFs fan out per page range inside the stage, so it dispatches to the pool itself
+            .stage("extract", lambda it: extract_item_parallel(it, pool, pdf_pages_per_task), workers=workers, on_error=warn,
+                   units=lambda it: len(it["pages"]), unit_name="pages")
+            .stage("clean", clean_item, workers=workers, pool=pool, on_error=warn,
+                   units=lambda it: sum(len(p) for p in it["pages"]), unit_name="chars")
+            .stage("chunk", chunk_item, workers=workers, pool=pool, on_error=warn,
+                   units=lambda it: len(it["parts"]), unit_name="chunks")
+            # Single worker: dedup lookups must see chunks added by earlier files
+            .stage("dedup", plan, workers=1,
+                   units=lambda it: it["new_links"], unit_name="linked")
+            .stage("embed", embed, workers=env_int("EMBED_MAX_INFLIGHT", 4),
+                   units=lambda it: len(it["new_idx"]), unit_name="embedded")
+            .stage("upload", upload, workers=1, close=lambda: flush(final=True),
+                   units=lambda it: len(it["new_idx"]), unit_name="docs")
+        )
+        pipe.run(source())
+
+        # Files removed from DATA_DIR since the last run
+        for name in manifest.names():
+            if name not in seen:
+                ids = manifest.chunk_ids_for(name)
+                _delete_chunk_ids(ids)
+                stats["deleted"] += len(ids)
+                removed.update(ids)
+                if dedup is not None:
+                    dedup.remove(ids)
+                manifest.forget(name)
+                print(f"INFO: 삭제된 파일의 청크 제거: {name} ({len(ids)}개)")
+        relink = manifest.unlink(removed) if removed else []
+        manifest.save()
+        if relink:
+            # Their duplicate chunks pointed at chunks removed above; links broken by this
+            # second pass are left for the next run (their files are marked changed)
+            print(f"INFO: 연결된 원본 청크가 삭제되어 다시 처리합니다: {', '.join(relink)}")
+            stats["skipped"] -= len(skipped & set(relink))  # counted as changed by the second pass
+            pipe.run(source(set(relink)))
+            manifest.unlink(removed)
+            manifest.save()
 
-    # 2) DOCX (python-docx)
-    for docx_path in DATA_DIR.glob("*.docx"):
+    print(pipe.report())
+    print(_uploader.report())
+    if dedup is not None:
+        print(dedup_report.report())
+    print(
+        f"✅ local ingest (pdf/docx/txt) → ia-chunks complete "
+        f"(skipped={stats['skipped']} changed={stats['changed']} embedded={stats['embedded']} "
+        f"kept={stats['kept']} linked={stats['linked']} deleted={stats['deleted']} failed={stats['failed']} "
+        f"embed_requests={_embed_scheduler.requests} retries={_embed_scheduler.retries})"
+    )
+    return {"stats": stats, "pipeline": pipe}
+
+def _odata_str(v) -> str:
+    return "'" + str(v).replace("'", "''") + "'"
+
+
+def iter_raw_docs(after: Optional[str] = None, page_size: int = 1000, limit: Optional[int] = None):
+    """Page through ia-raw in RAW_SORT_FIELD order (keyset paging: `field gt last`),
+    so coverage is not capped by top/skip limits and paging can resume from a key."""
+    select = ["id", "content", "metadata_storage_name", "metadata_storage_path", "page"]
+    if RAW_SORT_FIELD not in select:
+        select.append(RAW_SORT_FIELD)
+    n = 0
+    while limit is None or n < limit:
+        top = page_size if limit is None else min(page_size, limit - n)
+        flt = f"{RAW_SORT_FIELD} gt {_odata_str(after)}" if after is not None else None
         try:
-            docx_mod = importlib.import_module("docx")
-            _Docx = getattr(docx_mod, "Document")
-            doc = _Docx(str(docx_path))
-            paras = [p.text.strip() for p in doc.paragraphs if p.text and p.text.strip()]
-            text = clean_text("\n\n".join(paras))
+            page = list(search_raw.search(search_text="*", filter=flt, order_by=[f"{RAW_SORT_FIELD} asc"],
+                                          top=top, select=select))
         except Exception as e:
-            print(f"WARN: DOCX 읽기 실패: {docx_path.name} — {e}")
-            continue
-        parts = simple_chunks(text, 1200, 150)
-        if not parts: continue
-        vecs = embed_batch(parts)
-        for t, v in zip(parts, vecs):
+            print(f"ERROR: ia-raw 페이지 조회 실패 — RAW_SORT_FIELD={RAW_SORT_FIELD} 필드가 "
+                  f"sortable/filterable인지 확인하세요: {e}")
+            raise
+        for d in page:
+            yield d
+        n += len(page)
+        if len(page) < top:
+            return
+        after = page[-1][RAW_SORT_FIELD]
+
+
+def iter_raw_docs_by_key(keys: List[str], batch: int = 50):
+    """ia-raw documents whose RAW_SORT_FIELD is one of `keys` (checkpoint retries)."""
+    select = ["id", "content", "metadata_storage_name", "metadata_storage_path", "page"]
+    if RAW_SORT_FIELD not in select:
+        select.append(RAW_SORT_FIELD)
+    for i in range(0, len(keys), batch):
+        flt = " or ".join(f"{RAW_SORT_FIELD} eq {_odata_str(k)}" for k in keys[i:i + batch])
+        yield from search_raw.search(search_text="*", filter=flt, top=batch, select=select)
+
+
+def ingest_from_raw(limit: Optional[int] = None, restart: bool = False):
+    """Chunk/embed/upload every ia-raw document as a streaming pipeline, resumable.
+
+    Raw documents are paged in sort-key order; chunk runs in a process pool,
+    embed and upload in threads. After each upload batch the checkpoint advances
+    to the last key whose documents (and all before it) are processed, so a
+    re-run after a crash continues from there. Documents that failed (chunk,
+    embed or upload) are kept in the checkpoint's `failed_keys` and retried first
+    on the next run. Chunk IDs are content-addressed,
+    so documents re-processed after a resume overwrite rather than duplicate.
+    `restart=True` ignores the checkpoint; `limit` caps documents for this run.
+    """
+    ckpt = RawCheckpoint(INGEST_RAW_CHECKPOINT, INDEX_RAW, INDEX_CHUNKS, RAW_SORT_FIELD)
+    if restart:
+        ckpt.reset()
+    elif ckpt.last_key is not None:
+        print(f"INFO: checkpoint에서 재개: {RAW_SORT_FIELD} > {ckpt.last_key} (완료 {ckpt.docs}건)")
+
+    lock = threading.Lock()
+    keys: Dict[int, str] = {}  # seq → sort key, for documents not yet behind the watermark
+    done = set()
+    watermark = [0]  # next seq that is not yet complete
+    retry_keys: Dict[int, str] = {}  # negative seq → sort key of a document retried from failed_keys
+
+    def complete(seqs, failed: bool = False):
+        with lock:
+            for seq in seqs:
+                if seq < 0:
+                    # Retried documents are outside the watermark; they leave failed_keys on success
+                    if not failed:
+                        ckpt.failed_keys.remove(retry_keys[seq])
+                    continue
+                if failed:
+                    ckpt.failed_keys.append(keys[seq])
+                done.add(seq)
+            while watermark[0] in done:
+                done.discard(watermark[0])
+                ckpt.last_key = keys.pop(watermark[0])
+                ckpt.docs += 1
+                watermark[0] += 1
+
+    def content_of(d):
+        return d.get("content", "") or ""
+
+    def item(seq, d):
+        return {"seq": seq, "kind": "RAW", "doc_id": d["id"], "title": d.get("metadata_storage_name", ""),
+                "source_uri": d.get("metadata_storage_path"), "pages": [content_of(d)], "page_nos": [d.get("page")],
+                "max_len": 1200, "overlap": 150}
+
+    def source():
+        if ckpt.failed_keys:
+            print(f"INFO: 이전 실행에서 실패한 raw 문서 재시도: {len(ckpt.failed_keys)}건")
+        found = set()
+        for i, d in enumerate(iter_raw_docs_by_key(list(ckpt.failed_keys))):
+            seq = -1 - i
+            with lock:
+                retry_keys[seq] = d[RAW_SORT_FIELD]
+            found.add(d[RAW_SORT_FIELD])
+            if not content_of(d).strip():
+                complete([seq])
+            else:
+                yield item(seq, d)
+        with lock:
+            # Failed documents that were removed from ia-raw since
+            ckpt.failed_keys[:] = [k for k in ckpt.failed_keys if k in found]
+        seq = 0
+        for d in iter_raw_docs(ckpt.last_key, env_int("RAW_PAGE_SIZE", 1000), limit):
+            with lock:
+                keys[seq] = d[RAW_SORT_FIELD]
+            if not content_of(d).strip():
+                complete([seq])
+            else:
+                yield item(seq, d)
+            seq += 1
+
+    def warn(item, e):
+        print(f"WARN: raw 문서 처리 실패: {item['doc_id']} — {e}")
+        complete([item["seq"]], failed=True)
+
+    def embed(item):
+        item["vecs"] = embed_batch(item["parts"]) if item["parts"] else []
+        return item
+
+    batch, pending = [], []  # (seq, chunk ids) in `pending` are complete once `batch` is uploaded
+    inflight = deque()
+
+    def settle(wait_all: bool = False):
+        while inflight and (wait_all or inflight[0][0].done() or len(inflight) > 2):
+            job, recs = inflight.popleft()
+            res = job.result()
+            ckpt.chunks += len(res.succeeded)
+            for seq, doc_id, ids in recs:
+                bad = [k for k in ids if k in res.failed]
+                if bad:
+                    print(f"WARN: 청크 업로드 실패: {doc_id} ({len(bad)}개) — {res.failed[bad[0]]}")
+                complete([seq], failed=bool(bad))
+            if res.succeeded:
+                index_generation.bump(INDEX_CHUNKS)  # invalidates cached search results
+        ckpt.save()
+
+    def flush(final: bool = False):
+        if batch or pending:
+            inflight.append((_uploader.submit(list(batch)), list(pending)))
+            batch.clear(); pending.clear()
+        settle(final)
+
+    def upload(item):
+        for cid, c, sp, v in zip(item["ids"], item["parts"], item["spans"], item["vecs"]):
+            page, page_end, char_start, char_end = sp
             batch.append({
-                "id": str(uuid.uuid4()),
-                "doc_id": docx_path.stem,
-                "title": docx_path.name,
-                "chunk": t,
-                "contentVector": v,
-                "source_uri": f"local://{docx_path.name}",
+                "id": cid,
+                "doc_id": item["doc_id"], "title": item["title"], "chunk": c,
+                "contentVector": v, "source_uri": item["source_uri"],
+                "page": page, "page_end": page_end,
+                "char_start": char_start, "char_end": char_end,
             })
+        pending.append((item["seq"], item["doc_id"], item["ids"]))
         if len(batch) >= 500:
-            search_chunks.upload_documents(batch); batch.clear()
+            flush()
+        return item
 
-    # 3) TXT
-    for txt in DATA_DIR.glob("*.txt"):
+    workers = env_int("INGEST_WORKERS", os.cpu_count() or 2)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pipe = (
+            Pipeline(queue_size=env_int("INGEST_QUEUE_SIZE", 8))
+            .stage("chunk", chunk_item, workers=workers, pool=pool, on_error=warn,
+                   units=lambda it: len(it["parts"]), unit_name="chunks")
+            .stage("embed", embed, workers=env_int("EMBED_MAX_INFLIGHT", 4), on_error=warn,
+                   units=lambda it: len(it["parts"]), unit_name="embedded")
+            .stage("upload", upload, workers=1, close=lambda: flush(final=True),
+                   units=lambda it: len(it["parts"]), unit_name="docs")
+        )
         try:
-            text = Path(txt).read_text(encoding="utf-8", errors="ignore")
-            text = clean_text(text)
-        except Exception as e:
-            print(f"WARN: TXT 읽기 실패: {txt.name} — {e}")
-            continue
-        parts = simple_chunks(text, 1200, 150)
-        if not parts: continue
-        vecs = embed_batch(parts)
-        for t, v in zip(parts, vecs):
-            batch.append({
-                "id": str(uuid.uuid4()),
-                "doc_id": txt.stem,
-                "title": txt.name,
-                "chunk": t,
-                "contentVector": v,
-                "source_uri": f"local://{txt.name}",
-            })
-        if len(batch) >= 500:
-            search_chunks.upload_documents(batch); batch.clear()
-
-    if batch:
-        search_chunks.upload_documents(batch)
-    print("✅ local ingest (pdf/docx/txt) → ia-chunks complete")
-
-def ingest_from_raw(limit=500):
-    docs = search_raw.search(search_text="*", top=limit, select=["id","content","metadata_storage_name","metadata_storage_path","page"])
-    batch=[]
-    for d in docs:
-        doc_id = d["id"]; title = d.get("metadata_storage_name",""); content = d.get("content","") or ""
-        if not content.strip(): continue
-        parts = simple_chunks(content, 1200, 150)
-        vecs = embed_batch(parts)
-        for t, v in zip(parts, vecs):
-            batch.append({
-                "id": str(uuid.uuid4()),
-                "doc_id": doc_id, "title": title, "chunk": t,
-                "contentVector": v, "source_uri": d.get("metadata_storage_path")
-            })
-        if len(batch) >= 500:
-            search_chunks.upload_documents(batch); batch.clear()
-    if batch: search_chunks.upload_documents(batch)
-    print("✅ ia-raw → ia-chunks complete")
+            pipe.run(source())
+        finally:
+            # Keep whatever progress was fully uploaded, even when the run aborts
+            ckpt.save()
+
+    print(pipe.report())
+    print(_uploader.report())
+    print(
+        f"✅ ia-raw → ia-chunks complete (docs={ckpt.docs} chunks={ckpt.chunks} failed={ckpt.failed} "
+        f"last_key={ckpt.last_key} embed_requests={_embed_scheduler.requests} retries={_embed_scheduler.retries})"
+    )
 
 if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description="Build ia-chunks from local files or ia-raw")
+    ap.add_argument("--full", action="store_true",
+                    help="ignore the ingest manifest (local) or the resume checkpoint (search_raw) and redo everything")
+    ap.add_argument("--limit", type=int, default=None, help="search_raw: max raw documents for this run")
+    args = ap.parse_args()
     if INGEST_MODE == "search_raw":
-        ingest_from_raw()
+        ingest_from_raw(limit=args.limit, restart=args.full)
     else:
-        ingest_local()
+        ingest_local(force=args.full)
@@ -0,0 +1,174 @@
+import json, time, random, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence
+
+from ingest.embed_scheduler import _is_retryable, _retry_after_seconds
+from rag.env import env_int
+
+# Per-document status codes worth retrying (conflict, throttling, service busy)
+_RETRY_STATUS = {409, 422, 429, 503}
+
+
+def doc_bytes(doc: dict) -> int:
+    """Approximate serialized size of one document in the indexing request."""
+    return len(json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def split_by_size(docs: Sequence[dict], max_bytes: int, max_docs: int,
+                  sizes: Optional[Sequence[int]] = None) -> List[List[dict]]:
+    """Greedy split into batches under a serialized-bytes and a document-count budget.
+    A single document larger than `max_bytes` is sent alone."""
+    if sizes is None:
+        sizes = [doc_bytes(d) for d in docs]
+    batches, cur, cur_bytes = [], [], 0
+    for d, size in zip(docs, sizes):
+        n = size + 1
+        if cur and (cur_bytes + n > max_bytes or len(cur) >= max_docs):
+            batches.append(cur); cur, cur_bytes = [], 0
+        cur.append(d); cur_bytes += n
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+class BulkResult:
+    def __init__(self):
+        self.succeeded: List[str] = []
+        self.failed: Dict[str, str] = {}  # key → last error message
+
+    def merge(self, other: "BulkResult"):
+        self.succeeded.extend(other.succeeded)
+        self.failed.update(other.failed)
+
+
+class BulkJob:
+    """Handle for submitted documents; `result()` waits for every batch."""
+
+    def __init__(self, futs: List[Future]):
+        self._futs = futs
+
+    def done(self) -> bool:
+        return all(f.done() for f in self._futs)
+
+    def result(self) -> BulkResult:
+        out = BulkResult()
+        for f in self._futs:
+            out.merge(f.result())
+        return out
+
+
+class BulkUploader:
+    """Uploads documents to a SearchClient in byte-size-bounded batches, up to
+    `max_inflight` requests at once. Per-document results are inspected and only
+    the failed keys are retried (throttling/conflict/5xx, with back-off); a 413
+    splits the batch in half. Tracks docs/sec over the time requests were running.
+    """
+
+    def __init__(self, client, max_bytes: int = 8 * 1024 * 1024, max_docs: int = 1000, max_inflight: int = 4,
+                 max_retries: int = 5, backoff_base: float = 1.0, key_field: str = "id"):
+        self.client = client
+        self.max_bytes = max_bytes
+        self.max_docs = max_docs
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.key_field = key_field
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_inflight), thread_name_prefix="upload")
+        self._lock = threading.Lock()
+        self._active = 0
+        self._active_since = 0.0
+        self.busy = 0.0  # wall time with at least one request running
+        self.docs = 0
+        self.bytes = 0
+        self.requests = 0
+        self.retries = 0
+        self.failed = 0
+
+    def _sleep(self, attempt: int, exc: Optional[Exception] = None):
+        wait = _retry_after_seconds(exc) if exc is not None else None
+        if wait is None:
+            wait = random.uniform(0, self.backoff_base * (2 ** attempt))
+        with self._lock:
+            self.retries += 1
+        time.sleep(min(wait, 60.0))
+
+    def _send(self, batch: List[dict]):
+        with self._lock:
+            self.requests += 1
+        return self.client.upload_documents(batch)
+
+    def _run_batch(self, batch: List[dict]) -> BulkResult:
+        with self._lock:
+            if self._active == 0:
+                self._active_since = time.perf_counter()
+            self._active += 1
+        try:
+            return self._upload(batch)
+        finally:
+            with self._lock:
+                self._active -= 1
+                if self._active == 0:
+                    self.busy += time.perf_counter() - self._active_since
+
+    def _upload(self, batch: List[dict]) -> BulkResult:
+        res = BulkResult()
+        by_key = {d[self.key_field]: d for d in batch}
+        todo, attempt = batch, 0
+        while todo:
+            try:
+                results = self._send(todo)
+            except Exception as e:
+                status = getattr(e, "status_code", None)
+                if status == 413 and len(todo) > 1:
+                    mid = len(todo) // 2
+                    for half in (todo[:mid], todo[mid:]):
+                        res.merge(self._upload(half))
+                    return res
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    for d in todo:
+                        res.failed[d[self.key_field]] = str(e)
+                    break
+                self._sleep(attempt, e); attempt += 1
+                continue
+            retry = []
+            for r in results:
+                if r.succeeded:
+                    res.succeeded.append(r.key)
+                    res.failed.pop(r.key, None)
+                    continue
+                res.failed[r.key] = f"{r.status_code}: {r.error_message}"
+                if r.status_code in _RETRY_STATUS or (r.status_code or 0) >= 500:
+                    retry.append(by_key[r.key])
+            if not retry or attempt >= self.max_retries:
+                break
+            todo = retry
+            self._sleep(attempt); attempt += 1
+        with self._lock:
+            self.docs += len(res.succeeded)
+            self.failed += len(res.failed)
+        return res
+
+    def submit(self, docs: Sequence[dict]) -> BulkJob:
+        docs = list(docs)
+        sizes = [doc_bytes(d) for d in docs]
+        batches = split_by_size(docs, self.max_bytes, self.max_docs, sizes)
+        with self._lock:
+            self.bytes += sum(sizes)
+        return BulkJob([self._pool.submit(self._run_batch, b) for b in batches])
+
+    def upload(self, docs: Sequence[dict]) -> BulkResult:
+        return self.submit(docs).result()
+
+    def report(self) -> str:
+        rate = (self.docs / self.busy) if self.busy > 0 else 0.0
+        return (f"upload docs={self.docs} failed={self.failed} MB={self.bytes / 1e6:.1f} requests={self.requests} "
+                f"retries={self.retries} busy={self.busy:.2f}s docs/s={rate:.1f}")
+
+
+def uploader_from_env(client) -> BulkUploader:
+    return BulkUploader(
+        client,
+        max_bytes=env_int("BULK_UPLOAD_MAX_MB", 8) * 1024 * 1024,
+        max_docs=env_int("BULK_UPLOAD_MAX_DOCS", 1000),
+        max_inflight=env_int("BULK_UPLOAD_INFLIGHT", 4),
+        max_retries=env_int("BULK_UPLOAD_MAX_RETRIES", 5),
+    )
@@ -0,0 +1,121 @@
+"""Streaming, page-aware chunker.
+
+Consumes (page_no, text) pairs lazily and yields chunks with their page span and
+character offsets. Work per chunk is proportional to the chunk, so total time is
+linear in the document and memory is bounded by one page plus one chunk.
+
+Packing follows the original `simple_chunks` rules (paragraphs split on blank
+lines, greedy fill up to `max_len`, `overlap` tail carried into the next chunk),
+so for documents without oversized paragraphs the chunk texts are identical.
+Paragraphs longer than the budget are split at whitespace instead of becoming a
+single oversized chunk.
+"""
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from ingest.embed_scheduler import estimate_tokens
+
+_PARA_SEP = re.compile(r"(\n\s*\n)")  # captured so offsets can be accumulated
+
+
+class Chunk(NamedTuple):
+    text: str
+    page_start: Optional[int]
+    page_end: Optional[int]
+    char_start: int  # offsets into the pages joined with "\n\n"
+    char_end: int
+
+
+def _paragraphs(pages: Iterable[Tuple[Optional[int], str]]) -> Iterator[Tuple[Optional[int], int, str]]:
+    """Yield (page, doc_offset, paragraph) with surrounding whitespace stripped."""
+    base = 0
+    for page, text in pages:
+        parts = _PARA_SEP.split(text)
+        pos = 0
+        for i in range(0, len(parts), 2):
+            raw = parts[i]
+            p = raw.strip()
+            if p:
+                # everything before p[0] in raw is whitespace, so find() is the strip offset
+                yield page, base + pos + raw.find(p[0]), p
+            pos += len(raw) + (len(parts[i + 1]) if i + 1 < len(parts) else 0)
+        base += len(text) + 2
+
+
+def _split_long(page, off, p: str, limit: int):
+    """Split an oversized paragraph into pieces of at most `limit` chars at whitespace."""
+    i, n = 0, len(p)
+    while n - i > limit:
+        cut = p.rfind(" ", i + limit // 2, i + limit)
+        if cut <= i:
+            cut = i + limit
+        piece = p[i:cut].rstrip()
+        if piece:
+            yield page, off + i, piece
+        i = cut
+        while i < n and p[i].isspace():
+            i += 1
+    if i < n:
+        yield page, off + i, p[i:]
+
+
+def stream_chunks(pages: Iterable[Tuple[Optional[int], str]], max_len: int = 900, overlap: int = 220,
+                  max_tokens: Optional[int] = None) -> Iterator[Chunk]:
+    """Yield Chunk objects for `pages` under a `max_len` char (and optional `max_tokens`) budget."""
+    # buffer of (page, doc_offset, text) segments; the chunk text is "\n\n".join(texts)
+    buf: List[Tuple[Optional[int], int, str]] = []
+    blen = 0
+    btok = 0
+    split_at = max(1, max_len - overlap - 2)
+
+    def emit() -> Chunk:
+        text = "\n\n".join(s[2] for s in buf)
+        last = buf[-1]
+        return Chunk(text, buf[0][0], last[0], buf[0][1], last[1] + len(last[2]))
+
+    def tail():
+        # Segments covering the last `overlap` chars of the chunk, leading whitespace dropped
+        if blen <= overlap:
+            return []
+        need, out = overlap, []
+        for page, off, t in reversed(buf):
+            if need <= 0:
+                break
+            if len(t) >= need:
+                j = len(t) - need
+                while j < len(t) and t[j].isspace():
+                    j += 1
+                if j < len(t):
+                    out.append((page, off + j, t[j:]))
+                need = 0
+            else:
+                out.append((page, off, t))
+                need -= len(t) + 2  # the separator in front of this segment
+        out.reverse()
+        return out
+
+    for page, off, p in _paragraphs(pages):
+        pieces = _split_long(page, off, p, split_at) if len(p) > max_len else ((page, off, p),)
+        for seg in pieces:
+            n = len(seg[2])
+            ntok = estimate_tokens(seg[2]) if max_tokens else 0
+            fits = blen + n + 1 <= max_len and (not max_tokens or btok + ntok <= max_tokens)
+            if not buf or fits:
+                blen = blen + 2 + n if buf else n
+                btok += ntok
+                buf.append(seg)
+                continue
+            yield emit()
+            buf = tail()
+            blen = sum(len(s[2]) for s in buf) + 2 * max(0, len(buf) - 1)
+            btok = sum(estimate_tokens(s[2]) for s in buf) if max_tokens else 0
+            blen = blen + 2 + n if buf else n
+            btok += ntok
+            buf.append(seg)
+    if buf:
+        yield emit()
+
+
+def simple_chunks(text: str, max_len=900, overlap=220):
+    """Backwards-compatible list-of-strings API over stream_chunks."""
+    return [c.text for c in stream_chunks([(None, text)], max_len, overlap)]
@@ -0,0 +1,178 @@
+"""Near-duplicate chunk detection (MinHash + LSH) for ingest.
+
+Chunks get a MinHash signature over character 5-gram shingles (computed in the
+chunk stage, so it runs in the process pool). Before embedding, each new chunk
+is looked up in an LSH index of the chunks already in the corpus; when the
+estimated Jaccard similarity reaches the threshold the chunk is linked to the
+existing one instead of being embedded and uploaded.
+"""
+import re, sqlite3, threading, unicodedata, zlib
+from array import array
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+NUM_PERM = 64
+BANDS = 16  # 16 bands x 4 rows: candidate pairs from ~0.5 Jaccard, verified against the threshold
+SHINGLE = 5
+_PRIME = (1 << 61) - 1
+_MASK = (1 << 32) - 1
+# Fixed coefficients so signatures are comparable across runs and processes
+_PERMS = [((0x9E3779B97F4A7C15 * (i + 1)) % _PRIME | 1, (0xC2B2AE3D27D4EB4F * (i + 7)) % _PRIME)
+          for i in range(NUM_PERM)]
+_WS = re.compile(r"\s+")
+
+
+def _shingles(text: str) -> Set[int]:
+    t = _WS.sub(" ", unicodedata.normalize("NFKC", text).lower()).strip()
+    if len(t) <= SHINGLE:
+        return {zlib.crc32(t.encode("utf-8"))}
+    return {zlib.crc32(t[i:i + SHINGLE].encode("utf-8")) for i in range(len(t) - SHINGLE + 1)}
+
+
+def minhash(text: str) -> List[int]:
+    hs = _shingles(text)
+    return [min(((a * h + b) % _PRIME) & _MASK for h in hs) for a, b in _PERMS]
+
+
+def similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(x == y for x, y in zip(a, b)) / len(a)
+
+
+def _band_keys(sig: List[int]) -> List[Tuple[int, Tuple[int, ...]]]:
+    r = NUM_PERM // BANDS
+    return [(i, tuple(sig[i * r:(i + 1) * r])) for i in range(BANDS)]
+
+
+class DedupIndex:
+    """Signatures of the chunks present in the chunk index, with LSH buckets.
+
+    Persisted in SQLite next to the ingest manifest. Signatures added during a
+    run stay pending per source file until `commit_doc` (the file's upload went
+    through) or are dropped by `discard_doc`.
+    """
+
+    def __init__(self, path: Path, threshold: float = 0.9):
+        self.path = Path(path)
+        self.threshold = threshold
+        self._lock = threading.Lock()
+        self._sigs: Dict[str, List[int]] = {}
+        self._docs: Dict[str, str] = {}
+        self._buckets: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = defaultdict(set)
+        self._pending: Dict[str, List[str]] = defaultdict(list)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS sig (id TEXT PRIMARY KEY, doc TEXT NOT NULL, sig BLOB NOT NULL)")
+        self._db.commit()
+        for cid, doc, blob in self._db.execute("SELECT id, doc, sig FROM sig"):
+            a = array("Q"); a.frombytes(blob)
+            self._put(cid, doc, a.tolist())
+
+    def __len__(self) -> int:
+        return len(self._sigs)
+
+    def _put(self, cid: str, doc: str, sig: List[int]):
+        self._sigs[cid] = sig
+        self._docs[cid] = doc
+        for k in _band_keys(sig):
+            self._buckets[k].add(cid)
+
+    def _drop(self, cid: str):
+        sig = self._sigs.pop(cid, None)
+        self._docs.pop(cid, None)
+        if sig is not None:
+            for k in _band_keys(sig):
+                b = self._buckets.get(k)
+                if b is not None:
+                    b.discard(cid)
+                    if not b:
+                        del self._buckets[k]
+
+    def find(self, sig: List[int], exclude: Iterable[str] = ()) -> Optional[Tuple[str, str, float]]:
+        """Best existing chunk with similarity >= threshold → (id, doc, similarity)."""
+        excl = set(exclude)
+        best: Optional[Tuple[str, str, float]] = None
+        with self._lock:
+            cands = set()
+            for k in _band_keys(sig):
+                cands |= self._buckets.get(k, set())
+            for cid in cands - excl:
+                s = similarity(sig, self._sigs[cid])
+                if s >= self.threshold and (best is None or s > best[2]):
+                    best = (cid, self._docs[cid], s)
+        return best
+
+    def add(self, cid: str, doc: str, sig: List[int]):
+        with self._lock:
+            self._put(cid, doc, sig)
+            self._pending[doc].append(cid)
+
+    def commit_doc(self, doc: str):
+        with self._lock:
+            ids = self._pending.pop(doc, [])
+            rows = [(cid, doc, array("Q", self._sigs[cid]).tobytes()) for cid in ids if cid in self._sigs]
+            self._db.executemany("INSERT OR REPLACE INTO sig(id, doc, sig) VALUES (?,?,?)", rows)
+            self._db.commit()
+
+    def discard_doc(self, doc: str):
+        with self._lock:
+            for cid in self._pending.pop(doc, []):
+                self._drop(cid)
+
+    def remove(self, ids: Iterable[str]):
+        ids = list(ids)
+        with self._lock:
+            for cid in ids:
+                self._drop(cid)
+            self._db.executemany("DELETE FROM sig WHERE id=?", [(cid,) for cid in ids])
+            self._db.commit()
+
+    def clear(self):
+        with self._lock:
+            self._sigs.clear(); self._docs.clear(); self._buckets.clear(); self._pending.clear()
+            self._db.execute("DELETE FROM sig")
+            self._db.commit()
+
+
+class DedupReport:
+    """Savings of one ingest run: skipped chunks, their tokens/chars, near-duplicate documents."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.duplicates = 0
+        self.tokens = 0
+        self.chars = 0
+        self._pairs: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._doc_chunks: Dict[str, int] = {}
+
+    def add_doc(self, doc: str, n_new: int, dups: List[Tuple[str, int, int]]):
+        """`dups`: (canonical doc, tokens, chars) per skipped chunk of `doc`."""
+        with self._lock:
+            self.checked += n_new
+            self.duplicates += len(dups)
+            self._doc_chunks[doc] = n_new
+            for other, tok, chars in dups:
+                self.tokens += tok
+                self.chars += chars
+                self._pairs[(doc, other)] += 1
+
+    def near_duplicate_docs(self, min_ratio: float = 0.8) -> List[Tuple[str, str, int, int]]:
+        """(doc, duplicate of, linked chunks, chunks) where most of `doc` repeats one other doc."""
+        out = []
+        for (doc, other), n in sorted(self._pairs.items()):
+            total = self._doc_chunks.get(doc, 0)
+            if total and doc != other and n / total >= min_ratio:
+                out.append((doc, other, n, total))
+        return out
+
+    def report(self) -> str:
+        if not self.checked:
+            return "dedup: no new chunks"
+        pct = 100.0 * self.duplicates / self.checked
+        lines = [f"dedup: {self.duplicates}/{self.checked} new chunks linked to existing ones ({pct:.1f}%), "
+                 f"~{self.tokens} embedding tokens and {self.chars} chars not embedded/indexed"]
+        for doc, other, n, total in self.near_duplicate_docs():
+            lines.append(f"  near-duplicate document: {doc} ≈ {other} ({n}/{total} chunks)")
+        return "\n".join(lines)
@@ -0,0 +1,96 @@
+"""Streaming DOCX text extraction (zipfile + incremental XML parse, no python-docx).
+
+word/document.xml is read with iterparse and every top-level body block is
+converted and released as soon as it ends, so memory stays at one block.
+Paragraph text follows python-docx's `Paragraph.text` (runs and hyperlinks;
+w:tab/w:ptab → tab, line breaks → newline, no-break hyphen → "-"); tables, which
+python-docx's `doc.paragraphs` drops, become one "cell | cell" line per row.
+"""
+import zipfile
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator, List
+
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+_BODY = _W + "body"
+_P, _R, _T, _TBL, _TR, _TC = _W + "p", _W + "r", _W + "t", _W + "tbl", _W + "tr", _W + "tc"
+_HYPERLINK, _SDT, _SDT_CONTENT = _W + "hyperlink", _W + "sdt", _W + "sdtContent"
+_BR, _CR, _TAB, _PTAB, _NB_HYPHEN = _W + "br", _W + "cr", _W + "tab", _W + "ptab", _W + "noBreakHyphen"
+_BR_TYPE = _W + "type"
+
+
+def _run_text(r: ET.Element) -> str:
+    out = []
+    for e in r:
+        tag = e.tag
+        if tag == _T:
+            out.append(e.text or "")
+        elif tag == _TAB or tag == _PTAB:
+            out.append("\t")
+        elif tag == _CR:
+            out.append("\n")
+        elif tag == _BR:
+            out.append("\n" if e.get(_BR_TYPE, "textWrapping") == "textWrapping" else "")
+        elif tag == _NB_HYPHEN:
+            out.append("-")
+    return "".join(out)
+
+
+def paragraph_text(p: ET.Element) -> str:
+    out = []
+    for e in p:
+        if e.tag == _R:
+            out.append(_run_text(e))
+        elif e.tag == _HYPERLINK:
+            out.extend(_run_text(r) for r in e if r.tag == _R)
+    return "".join(out)
+
+
+def _cell_text(tc: ET.Element) -> str:
+    # Paragraphs of the cell (incl. nested tables) on one line
+    parts = (paragraph_text(p).strip() for p in tc.iter(_P))
+    return " ".join(t for t in parts if t)
+
+
+def _block_texts(e: ET.Element) -> Iterator[str]:
+    if e.tag == _P:
+        yield paragraph_text(e)
+    elif e.tag == _TBL:
+        for tr in e.iter(_TR):
+            cells = [_cell_text(tc) for tc in tr if tc.tag == _TC]
+            if any(cells):
+                yield " | ".join(cells)
+    elif e.tag == _SDT:
+        # Content controls wrap ordinary paragraphs/tables
+        for content in e:
+            if content.tag == _SDT_CONTENT:
+                for child in content:
+                    yield from _block_texts(child)
+
+
+def iter_docx_blocks(path: Path) -> Iterator[str]:
+    """Yield paragraph texts and table rows of the main document body in order."""
+    with zipfile.ZipFile(path) as zf, zf.open("word/document.xml") as fp:
+        body = None
+        depth = 0  # element depth below w:body
+        for event, e in ET.iterparse(fp, events=("start", "end")):
+            if event == "start":
+                if body is None:
+                    if e.tag == _BODY:
+                        body = e
+                else:
+                    depth += 1
+                continue
+            if body is None:
+                continue
+            if e is body:
+                break
+            depth -= 1
+            if depth == 0:
+                yield from _block_texts(e)
+                body.remove(e)
+
+
+def read_docx_stream(path: Path) -> str:
+    paras: List[str] = [t.strip() for t in iter_docx_blocks(Path(path))]
+    return "\n\n".join(t for t in paras if t)
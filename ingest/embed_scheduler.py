@@ -0,0 +1,133 @@
+import time, random, threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence, Tuple
+
+from rag.env import env_int
+
+try:
+    import tiktoken  # type: ignore
+    _ENC = tiktoken.get_encoding("cl100k_base")
+except Exception:
+    _ENC = None
+
+
+def estimate_tokens(text: str) -> int:
+    if _ENC is not None:
+        return len(_ENC.encode(text, disallowed_special=()))
+    # No tokenizer: UTF-8 bytes / 3 over-estimates English and is close for Korean
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def pack_batches(texts: Sequence[str], max_tokens: int, max_items: int) -> List[List[int]]:
+    """Greedy packing of text indices into requests under token and item budgets.
+
+    A single text larger than `max_tokens` is sent alone (the service truncates
+    or rejects it; splitting text is the chunker's job).
+    """
+    batches, cur, cur_tok = [], [], 0
+    for i, t in enumerate(texts):
+        n = estimate_tokens(t)
+        if cur and (cur_tok + n > max_tokens or len(cur) >= max_items):
+            batches.append(cur); cur, cur_tok = [], 0
+        cur.append(i); cur_tok += n
+    if cur:
+        batches.append(cur)
+    return batches
+
+
+def _retry_after_seconds(exc: Exception) -> Optional[float]:
+    resp = getattr(exc, "response", None)
+    headers = getattr(resp, "headers", None) or {}
+    try:
+        ms = headers.get("retry-after-ms")
+        if ms:
+            return float(ms) / 1000.0
+        ra = headers.get("retry-after")
+        if ra:
+            return float(ra)
+    except Exception:
+        return None
+    return None
+
+
+def _is_retryable(exc: Exception) -> bool:
+    status = getattr(exc, "status_code", None) or getattr(getattr(exc, "response", None), "status_code", None)
+    if status is not None:
+        return status == 429 or status == 408 or status >= 500
+    # Connection errors / timeouts carry no status
+    return type(exc).__name__ in ("APIConnectionError", "APITimeoutError", "ConnectionError", "TimeoutError")
+
+
+class EmbedJob:
+    """Handle for a submitted embedding call; `result()` returns vectors in input order."""
+
+    def __init__(self, n: int, parts: List[Tuple[List[int], Future]]):
+        self._n = n
+        self._parts = parts
+
+    def result(self) -> List[List[float]]:
+        out: List[Optional[List[float]]] = [None] * self._n
+        for idxs, fut in self._parts:
+            for i, v in zip(idxs, fut.result()):
+                out[i] = v
+        return out  # type: ignore[return-value]
+
+
+class EmbeddingScheduler:
+    """Packs texts into token/item-bounded requests and keeps up to `max_inflight`
+    of them running on a shared pool, so requests from different documents overlap.
+    429/5xx responses are retried honouring Retry-After, else exponential back-off
+    with full jitter.
+    """
+
+    def __init__(self, create: Callable[[List[str]], List[List[float]]], max_tokens: int = 32000,
+                 max_items: int = 64, max_inflight: int = 4, max_retries: int = 6, backoff_base: float = 1.0):
+        self.create = create
+        self.max_tokens = max_tokens
+        self.max_items = max_items
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self._pool = ThreadPoolExecutor(max_workers=max(1, max_inflight), thread_name_prefix="embed")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+
+    def _call(self, texts: List[str]) -> List[List[float]]:
+        attempt = 0
+        while True:
+            try:
+                with self._lock:
+                    self.requests += 1
+                return self.create(texts)
+            except Exception as e:
+                if attempt >= self.max_retries or not _is_retryable(e):
+                    raise
+                wait = _retry_after_seconds(e)
+                if wait is None:
+                    wait = random.uniform(0, self.backoff_base * (2 ** attempt))
+                else:
+                    wait += random.uniform(0, 0.25 * self.backoff_base)
+                attempt += 1
+                with self._lock:
+                    self.retries += 1
+                time.sleep(min(wait, 60.0))
+
+    def submit(self, texts: Sequence[str]) -> EmbedJob:
+        texts = list(texts)
+        parts = []
+        for idxs in pack_batches(texts, self.max_tokens, self.max_items):
+            parts.append((idxs, self._pool.submit(self._call, [texts[i] for i in idxs])))
+        return EmbedJob(len(texts), parts)
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        return self.submit(texts).result()
+
+
+def scheduler_from_env(create: Callable[[List[str]], List[List[float]]]) -> EmbeddingScheduler:
+    return EmbeddingScheduler(
+        create,
+        max_tokens=env_int("EMBED_MAX_TOKENS_PER_REQUEST", 32000),
+        max_items=env_int("EMBED_MAX_ITEMS_PER_REQUEST", 64),
+        max_inflight=env_int("EMBED_MAX_INFLIGHT", 4),
+        max_retries=env_int("EMBED_MAX_RETRIES", 6),
+    )
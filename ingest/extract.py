@@ -0,0 +1,296 @@
+"""Text extraction, cleaning and chunking.
+
+Pure CPU-side helpers with no Azure/OpenAI imports so they can run in
+ProcessPoolExecutor workers of the ingest pipeline.
+"""
+import os, re, unicodedata, importlib
+from io import StringIO
+from concurrent.futures import Executor
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional
+from pypdf import PdfReader
+from ingest.manifest import chunk_hash, chunk_ids
+from ingest.chunker import stream_chunks
+from ingest.docx_stream import read_docx_stream
+from ingest.dedup import minhash
+try:
+    from pdfminer.pdfinterp import PDFResourceManager, PDFPageInterpreter
+    from pdfminer.converter import TextConverter
+    from pdfminer.layout import LAParams
+    from pdfminer.pdfpage import PDFPage
+    _HAS_PDFMINER = True
+except Exception:
+    _HAS_PDFMINER = False
+
+
+# clean_text engine. Same output as the straightforward per-character version
+# (category check + six regex passes) but every step runs in C: the control
+# class is a regex built once from the running interpreter's unicodedata (BMP
+# ranges compile to a bitmap; rare astral characters are checked one by one),
+# and the remaining rules use str.replace or regexes with a literal prefix.
+_CTRL_BMP: Optional["re.Pattern[str]"] = None
+_ASTRAL = re.compile("[\U00010000-\U0010FFFF]")
+_astral_keep: Dict[str, str] = {}
+_PUNCT_RUNS = {c: re.compile(re.escape(c) * 4 + "+") for c in "-=_*#~"}  # literal prefix → fast scan
+_SPACES = re.compile("  +")
+_PARA_BREAK = re.compile("\n\n+")
+
+
+def _is_control(ch: str) -> bool:
+    return ch not in "\n\t" and unicodedata.category(ch)[0] == "C"
+
+
+def _ctrl_bmp() -> "re.Pattern[str]":
+    global _CTRL_BMP
+    if _CTRL_BMP is None:
+        ranges, start = [], None
+        for cp in range(0x10000):
+            if _is_control(chr(cp)):
+                if start is None:
+                    start = cp
+            elif start is not None:
+                ranges.append((start, cp - 1)); start = None
+        if start is not None:
+            ranges.append((start, 0xFFFF))
+        cls = "".join("\\u%04x" % a if a == b else "\\u%04x-\\u%04x" % (a, b) for a, b in ranges)
+        _CTRL_BMP = re.compile("[" + cls + "]+")
+    return _CTRL_BMP
+
+
+def _astral_sub(m: "re.Match[str]") -> str:
+    ch = m.group()
+    keep = _astral_keep.get(ch)
+    if keep is None:
+        keep = _astral_keep[ch] = "" if _is_control(ch) else ch
+    return keep
+
+
+def _strip_controls(t: str) -> str:
+    # Controls never include "\n", so line by line gives the same result while the
+    # regex only scans the (usually few) lines that contain something non-printable.
+    lines = t.split("\n")
+    for i, ln in enumerate(lines):
+        if not ln.isprintable() and not ln.replace("\t", "").isprintable():
+            ln = _ctrl_bmp().sub("", ln)
+            if _ASTRAL.search(ln):
+                ln = _ASTRAL.sub(_astral_sub, ln)
+            lines[i] = ln
+    return "\n".join(lines)
+
+
+def _is_word(ch: str) -> bool:
+    # sre's Unicode \w
+    return ch.isalnum() or ch == "_"
+
+
+def _dehyphenate(t: str) -> str:
+    """Equivalent of re.sub(r"(\w)-\n(\w)", r"\1\2", t), including its
+    non-overlapping matches ("a-\nb-\nc" → "ab-\nc")."""
+    out, last, end = [], 0, 0  # end: where the previous match stopped
+    i = t.find("-\n")
+    while i != -1:
+        if i >= 1 and i - 1 >= end and i + 2 < len(t) and _is_word(t[i - 1]) and _is_word(t[i + 2]):
+            out.append(t[last:i])
+            last = i + 2
+            end = i + 3
+        i = t.find("-\n", i + 1)
+    if not out:
+        return t
+    out.append(t[last:])
+    return "".join(out)
+
+
+def clean_text(text: str) -> str:
+    # Unicode normalize (fix ligatures like ﬂ → fl, normalize widths; NBSP → space)
+    t = unicodedata.normalize("NFKC", text)
+    # Remove control/format/unassigned characters except newlines and tabs (incl. zero-width space).
+    # Apart from \n and \t only a few separators are non-printable without being
+    # controls, so printable text skips the scan.
+    if not t.isprintable() and not t.replace("\n", "").replace("\t", "").isprintable():
+        t = _strip_controls(t)
+    # Trim overly long repeated punctuation
+    for c, pat in _PUNCT_RUNS.items():
+        if c * 4 in t:
+            t = pat.sub(c * 2, t)
+    # Replacement chars and runs of spaces/tabs → single space
+    t = t.replace("\t", " ").replace("\uFFFD", " ")
+    if "  " in t:
+        t = _SPACES.sub(" ", t)
+    if "\n" in t:
+        # De-hyphenate at line breaks: "exam-\nple" → "example"
+        if "-\n" in t:
+            t = _dehyphenate(t)
+        # Convert single newlines (within paragraphs) to spaces, keep paragraph breaks.
+        # \x00 is a control character, so it cannot occur here and is safe as a placeholder.
+        t = _PARA_BREAK.sub(lambda m: "\x00" * len(m.group()), t)
+        t = t.replace("\n", " ").replace("\x00", "\n")
+    return t
+
+
+def _quality_score(t: str) -> float:
+    t2 = t.strip()
+    if not t2:
+        return 0.0
+    # penalize replacement chars and very short content
+    bad = t2.count("\uFFFD")
+    letters = sum(ch.isalnum() for ch in t2)
+    score = letters / max(len(t2), 1)
+    if bad:
+        score *= 1.0 / (1 + bad)
+    # longer text gets slight bonus
+    score *= min(len(t2) / 500.0, 1.0) * 0.2 + 0.8
+    return score
+
+
+def _pdfminer_pages(pdf: Path, page_numbers: Iterable[int]) -> Dict[int, str]:
+    """Lay out only `page_numbers` (0-based) with pdfminer in a single pass over the file.
+
+    Same LAParams/TextConverter setup as pdfminer.high_level.extract_text, but the
+    document is opened and parsed once instead of once per page.
+    """
+    wanted = set(page_numbers)
+    out: Dict[int, str] = {}
+    if not wanted:
+        return out
+    rsrc = PDFResourceManager(caching=True)
+    laparams = LAParams()
+    with open(pdf, "rb") as fp:
+        for i, page in enumerate(PDFPage.get_pages(fp, caching=True)):
+            if i > max(wanted):
+                break
+            if i not in wanted:
+                continue
+            buf = StringIO()
+            dev = TextConverter(rsrc, buf, laparams=laparams)
+            try:
+                PDFPageInterpreter(rsrc, dev).process_page(page)
+                out[i] = buf.getvalue()
+            finally:
+                dev.close()
+    return out
+
+
+def pdf_page_count(pdf: Path) -> int:
+    return len(PdfReader(str(pdf)).pages)
+
+
+def read_pdf_page_range(pdf: Path, start: int = 0, end: Optional[int] = None) -> List[str]:
+    """Cleaned text for pages [start, end) (0-based): PyPDF first, then one pdfminer
+    pass over just the low-quality pages of the range."""
+    reader = PdfReader(str(pdf))
+    n = len(reader.pages)
+    end = n if end is None else min(end, n)
+    texts, scores, bad = [], [], []
+    for i in range(start, end):
+        # First try PyPDF
+        t = clean_text(reader.pages[i].extract_text() or "")
+        sc = _quality_score(t)
+        texts.append(t); scores.append(sc)
+        if sc < 0.25:
+            bad.append(i)
+    # If bad quality and pdfminer is available, retry those pages with pdfminer
+    if bad and _HAS_PDFMINER:
+        try:
+            alt = _pdfminer_pages(Path(pdf), bad)
+        except Exception:
+            alt = {}
+        for i, t2 in alt.items():
+            t2 = clean_text(t2 or "")
+            if _quality_score(t2) > scores[i - start]:
+                texts[i - start] = t2
+    return texts
+
+
+def read_pdf_pages(pdf: Path, pool: Optional[Executor] = None, pages_per_task: int = 16) -> List[str]:
+    """Cleaned text per page. With `pool`, page ranges are extracted in parallel."""
+    if pool is None:
+        return read_pdf_page_range(pdf)
+    n = pdf_page_count(pdf)
+    futs = [pool.submit(read_pdf_page_range, str(pdf), s, s + pages_per_task) for s in range(0, n, pages_per_task)]
+    pages: List[str] = []
+    for f in futs:
+        pages.extend(f.result())
+    return pages
+
+
+def _read_docx_python_docx(docx_path: Path) -> str:
+    docx_mod = importlib.import_module("docx")
+    _Docx = getattr(docx_mod, "Document")
+    doc = _Docx(str(docx_path))
+    paras = [p.text.strip() for p in doc.paragraphs if p.text and p.text.strip()]
+    return "\n\n".join(paras)
+
+
+# DOCX_BACKEND: "stream" (default; paragraphs + table rows, no python-docx) or
+# "python-docx" (body paragraphs only, as before)
+_DOCX_BACKENDS: Dict[str, Callable[[Path], str]] = {
+    "stream": read_docx_stream,
+    "python-docx": _read_docx_python_docx,
+}
+
+
+def read_docx_text(docx_path: Path, backend: Optional[str] = None) -> str:
+    name = backend or os.getenv("DOCX_BACKEND", "stream")
+    fn = _DOCX_BACKENDS.get(name)
+    if fn is None:
+        raise ValueError(f"unknown DOCX_BACKEND: {name} (choose from {', '.join(_DOCX_BACKENDS)})")
+    return fn(Path(docx_path))
+
+
+def read_txt_text(txt: Path) -> str:
+    return Path(txt).read_text(encoding="utf-8", errors="ignore")
+
+
+# ---- pipeline stage functions (top-level so they pickle into worker processes) ----
+
+def extract_item(item: dict) -> dict:
+    """extract: path → raw page texts. PDFs come back already cleaned (the
+    pdfminer fallback decision needs the cleaned text)."""
+    path = Path(item["path"])
+    kind = item["kind"]
+    if kind == "PDF":
+        item["pages"] = read_pdf_page_range(path)
+        item["cleaned"] = True
+    elif kind == "DOCX":
+        item["pages"] = [read_docx_text(path)]
+        item["cleaned"] = False
+    else:
+        item["pages"] = [read_txt_text(path)]
+        item["cleaned"] = False
+    return item
+
+
+def clean_item(item: dict) -> dict:
+    if not item.pop("cleaned", False):
+        item["pages"] = [clean_text(p) for p in item["pages"]]
+    return item
+
+
+def chunk_item(item: dict) -> dict:
+    """chunk: cleaned pages → chunk texts with page span and char offsets (PDF pages are
+    1-based; callers with their own page numbers pass them as item["page_nos"])."""
+    pages = item.pop("pages")
+    page_nos = item.pop("page_nos", None)
+    if page_nos is not None:
+        numbered = list(zip(page_nos, pages))
+    else:
+        numbered = list(enumerate(pages, start=1)) if item["kind"] == "PDF" else [(None, t) for t in pages]
+    chunks = list(stream_chunks(numbered, item.get("max_len", 1200), item.get("overlap", 150)))
+    parts = [c.text for c in chunks]
+    item["parts"] = parts
+    item["spans"] = [(c.page_start, c.page_end, c.char_start, c.char_end) for c in chunks]
+    item["ids"] = chunk_ids(item["doc_id"], parts)
+    item["hashes"] = [chunk_hash(t) for t in parts]
+    if item.get("dedup"):
+        item["sigs"] = [minhash(t) for t in parts]
+    return item
+
+
+def extract_item_parallel(item: dict, pool: Executor, pages_per_task: int = 16) -> dict:
+    """Like extract_item, but runs in the caller's thread and fans PDF page ranges
+    out over `pool` so one large scan uses every worker."""
+    if item["kind"] == "PDF":
+        item["pages"] = read_pdf_pages(Path(item["path"]), pool, pages_per_task)
+        item["cleaned"] = True
+        return item
+    return pool.submit(extract_item, item).result()
@@ -0,0 +1,189 @@
+import os, json, hashlib
+from pathlib import Path
+from typing import Dict, List, Optional, Set
+
+
+def file_sha256(path: Path, bufsize: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        while True:
+            b = f.read(bufsize)
+            if not b:
+                break
+            h.update(b)
+    return h.hexdigest()
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def chunk_ids(doc_id: str, parts: List[str]) -> List[str]:
+    """Deterministic (content-addressed) Search keys for a document's chunks.
+
+    The key depends only on doc_id, the chunk text and how many times that exact
+    text already appeared in the document, so unchanged chunks keep their key
+    across runs and re-uploads overwrite instead of duplicating.
+    """
+    seen: Dict[str, int] = {}
+    out = []
+    for t in parts:
+        ch = chunk_hash(t)
+        n = seen.get(ch, 0)
+        seen[ch] = n + 1
+        # Search keys allow [A-Za-z0-9_\-=]; hex is safe
+        out.append(hashlib.sha256(f"{doc_id}\x00{ch}\x00{n}".encode("utf-8")).hexdigest()[:40])
+    return out
+
+
+class IngestManifest:
+    """Persistent record of what was written to the chunk index per source file.
+
+    Layout (JSON):
+      {"version": 1, "index": "...", "files": {
+          "<name>": {"sha256": "...", "doc_id": "...", "chunks": [{"id": "...", "hash": "..."}]}},
+       "embedding": "<deployment>[@dimensions]"}
+    A different `embedding` (e.g. EMBED_DIMENSIONS changed) discards the manifest like a version mismatch.
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path, index_name: str, embedding: Optional[str] = None):
+        self.path = Path(path)
+        self.index_name = index_name
+        self.embedding = embedding
+        self.files: Dict[str, dict] = {}
+        self._load()
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"WARN: manifest 읽기 실패, 전체 재색인합니다: {self.path} — {e}")
+            return
+        if data.get("version") != self.VERSION or data.get("index") != self.index_name:
+            print(f"WARN: manifest 버전/인덱스 불일치, 전체 재색인합니다: {self.path}")
+            return
+        if self.embedding and data.get("embedding", self.embedding) != self.embedding:
+            print(f"WARN: 임베딩 설정 변경({data.get('embedding')} → {self.embedding}), 전체 재색인합니다: {self.path}")
+            return
+        self.files = data.get("files", {}) or {}
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        payload = {"version": self.VERSION, "index": self.index_name, "files": self.files}
+        if self.embedding:
+            payload["embedding"] = self.embedding
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
+
+    def get(self, name: str) -> Optional[dict]:
+        return self.files.get(name)
+
+    def is_unchanged(self, name: str, sha256: str) -> bool:
+        e = self.files.get(name)
+        return bool(e) and e.get("sha256") == sha256
+
+    def chunk_ids_for(self, name: str) -> List[str]:
+        e = self.files.get(name) or {}
+        return [c["id"] for c in e.get("chunks", [])]
+
+    def links_for(self, name: str) -> Dict[str, str]:
+        """Chunk IDs of `name` recorded as near-duplicates (never uploaded) → the linked chunk ID."""
+        e = self.files.get(name) or {}
+        return {c["id"]: c["dup_of"] for c in e.get("chunks", []) if c.get("dup_of")}
+
+    def record(self, name: str, sha256: str, doc_id: str, ids: List[str], hashes: List[str],
+               links: Optional[Dict[str, str]] = None):
+        """`links` maps chunk IDs that were not uploaded (near-duplicates) to the existing chunk ID."""
+        links = links or {}
+        chunks = []
+        for i, h in zip(ids, hashes):
+            c = {"id": i, "hash": h}
+            if i in links:
+                c["dup_of"] = links[i]
+            chunks.append(c)
+        self.files[name] = {"sha256": sha256, "doc_id": doc_id, "chunks": chunks}
+
+    def unlink(self, removed_ids: Set[str]) -> List[str]:
+        """Drop chunk entries linked to removed chunk IDs and mark their files changed,
+        so the next pass re-checks (and, if needed, embeds) those chunks."""
+        names = []
+        for name, e in self.files.items():
+            chunks = e.get("chunks", [])
+            keep = [c for c in chunks if c.get("dup_of") not in removed_ids]
+            if len(keep) != len(chunks):
+                e["chunks"] = keep
+                e["sha256"] = ""
+                names.append(name)
+        return names
+
+    def forget(self, name: str):
+        self.files.pop(name, None)
+
+    def names(self) -> List[str]:
+        return list(self.files.keys())
+
+
+class RawCheckpoint:
+    """Resume point for paging through the raw index in sort-key order.
+
+    `last_key` is the highest sort key up to which every document was processed
+    (uploaded, or failed and listed in `failed_keys`), so a re-run continues with
+    `key gt last_key` after retrying `failed_keys`.
+
+    Layout (JSON):
+      {"version": 1, "raw_index": "...", "chunk_index": "...", "sort_field": "id",
+       "last_key": "...", "docs": 0, "chunks": 0, "failed": 0, "failed_keys": ["..."]}
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: Path, raw_index: str, chunk_index: str, sort_field: str):
+        self.path = Path(path)
+        self.raw_index = raw_index
+        self.chunk_index = chunk_index
+        self.sort_field = sort_field
+        self.reset()
+        self._load()
+
+    def reset(self):
+        self.last_key: Optional[str] = None
+        self.docs = 0
+        self.chunks = 0
+        self.failed_keys: List[str] = []
+
+    @property
+    def failed(self) -> int:
+        return len(self.failed_keys)
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except Exception as e:
+            print(f"WARN: checkpoint 읽기 실패, 처음부터 진행합니다: {self.path} — {e}")
+            return
+        if (data.get("version") != self.VERSION or data.get("raw_index") != self.raw_index
+                or data.get("chunk_index") != self.chunk_index or data.get("sort_field") != self.sort_field):
+            print(f"WARN: checkpoint 버전/인덱스/정렬 키 불일치, 처음부터 진행합니다: {self.path}")
+            return
+        self.last_key = data.get("last_key")
+        self.docs = int(data.get("docs", 0))
+        self.chunks = int(data.get("chunks", 0))
+        self.failed_keys = list(data.get("failed_keys") or [])
+
+    def save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(self.path.suffix + ".tmp")
+        payload = {
+            "version": self.VERSION, "raw_index": self.raw_index, "chunk_index": self.chunk_index,
+            "sort_field": self.sort_field, "last_key": self.last_key,
+            "docs": self.docs, "chunks": self.chunks, "failed": self.failed, "failed_keys": self.failed_keys,
+        }
+        tmp.write_text(json.dumps(payload, ensure_ascii=False, indent=1), encoding="utf-8")
+        os.replace(tmp, self.path)
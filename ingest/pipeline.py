@@ -0,0 +1,168 @@
+"""Small staged streaming pipeline with bounded queues.
+
+Each stage runs `workers` threads pulling from a bounded input queue and pushing
+to the next stage's queue, so a slow stage applies backpressure upstream and
+stages overlap in time. CPU-bound stages pass `pool=` (a ProcessPoolExecutor)
+and their threads only dispatch work to it; I/O stages run directly in threads.
+"""
+import time, queue, threading
+from concurrent.futures import Executor
+from typing import Any, Callable, Iterable, List, Optional
+
+_DONE = object()
+
+
+class StageStats:
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.errors = 0
+        self.busy = 0.0  # summed worker time inside fn
+        self.units = 0   # stage-defined work units (pages, chunks, docs…)
+        self.unit_name = ""
+        self.first: Optional[float] = None
+        self.last: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def add(self, dt: float, out: bool, units: int = 0):
+        now = time.perf_counter()
+        with self._lock:
+            self.items_in += 1
+            self.items_out += 1 if out else 0
+            self.busy += dt
+            self.units += units
+            if self.first is None:
+                self.first = now - dt
+            self.last = now
+
+    @property
+    def span(self) -> float:
+        return (self.last - self.first) if (self.first is not None and self.last is not None) else 0.0
+
+
+class Stage:
+    def __init__(self, name: str, fn: Callable[[Any], Any], workers: int = 1, pool: Optional[Executor] = None,
+                 close: Optional[Callable[[], None]] = None, units: Optional[Callable[[Any], int]] = None,
+                 unit_name: str = "", on_error: Optional[Callable[[Any, Exception], None]] = None):
+        self.name = name
+        self.fn = fn
+        self.workers = max(1, workers)
+        self.pool = pool
+        self.close = close
+        self.units = units
+        self.on_error = on_error
+        self.stats = StageStats(name)
+        self.stats.unit_name = unit_name
+
+
+class Pipeline:
+    def __init__(self, queue_size: int = 8):
+        self.queue_size = queue_size
+        self.stages: List[Stage] = []
+        self.wall = 0.0
+        self._error: Optional[BaseException] = None
+        self._abort = threading.Event()
+
+    def stage(self, name: str, fn: Callable[[Any], Any], workers: int = 1, pool: Optional[Executor] = None,
+              close: Optional[Callable[[], None]] = None, units: Optional[Callable[[Any], int]] = None,
+              unit_name: str = "", on_error: Optional[Callable[[Any, Exception], None]] = None) -> "Pipeline":
+        """Add a stage. `fn(item)` returns the item for the next stage, or None to drop it.
+        `close()` runs once after the stage has drained (e.g. final flush). With
+        `on_error(item, exc)` a failing item is reported and dropped; without it
+        the first exception aborts the whole pipeline and is re-raised by run()."""
+        self.stages.append(Stage(name, fn, workers, pool, close, units, unit_name, on_error))
+        return self
+
+    def _put(self, q: queue.Queue, item):
+        while not self._abort.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+    def _run_stage(self, st: Stage, q_in: queue.Queue, q_out: Optional[queue.Queue], remaining: List[int],
+                   lock: threading.Lock):
+        try:
+            while not self._abort.is_set():
+                try:
+                    item = q_in.get(timeout=0.2)
+                except queue.Empty:
+                    continue
+                if item is _DONE:
+                    q_in.put(_DONE)  # let sibling workers see it too
+                    break
+                t0 = time.perf_counter()
+                try:
+                    out = st.pool.submit(st.fn, item).result() if st.pool is not None else st.fn(item)
+                except Exception as e:
+                    if st.on_error is None:
+                        raise
+                    st.stats.errors += 1
+                    st.on_error(item, e)
+                    out = None
+                st.stats.add(time.perf_counter() - t0, out is not None, st.units(out) if (st.units and out is not None) else 0)
+                if out is not None and q_out is not None:
+                    self._put(q_out, out)
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+            self._abort.set()
+        finally:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                try:
+                    if st.close is not None and not self._abort.is_set():
+                        st.close()
+                except BaseException as e:
+                    if self._error is None:
+                        self._error = e
+                    self._abort.set()
+                if q_out is not None:
+                    self._put(q_out, _DONE)
+
+    def run(self, source: Iterable[Any]):
+        """Feed `source` through the stages until every stage has drained. A pipeline can run
+        again (e.g. a follow-up pass); stage stats and wall time add up across runs."""
+        t0 = time.perf_counter()
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        threads = []
+        for i, st in enumerate(self.stages):
+            q_out = queues[i + 1] if i + 1 < len(queues) else None
+            remaining, lock = [st.workers], threading.Lock()
+            for w in range(st.workers):
+                th = threading.Thread(target=self._run_stage, args=(st, queues[i], q_out, remaining, lock),
+                                      name=f"{st.name}-{w}", daemon=True)
+                th.start()
+                threads.append(th)
+        try:
+            for item in source:
+                if self._abort.is_set():
+                    break
+                self._put(queues[0], item)
+        except BaseException as e:
+            if self._error is None:
+                self._error = e
+            self._abort.set()
+        finally:
+            self._put(queues[0], _DONE)
+            for th in threads:
+                th.join()
+            self.wall += time.perf_counter() - t0
+        if self._error is not None:
+            raise self._error
+
+    def report(self) -> str:
+        lines = [f"{'stage':<8} {'items':>6} {'busy(s)':>8} {'span(s)':>8} {'items/s':>8}  units"]
+        for st in self.stages:
+            s = st.stats
+            rate = (s.items_in / s.span) if s.span > 0 else 0.0
+            unit = f"{s.units} {s.unit_name}" if s.unit_name else ""
+            if s.unit_name and s.span > 0:
+                unit += f" ({s.units / s.span:.1f}/s)"
+            lines.append(f"{s.name:<8} {s.items_in:>6} {s.busy:>8.2f} {s.span:>8.2f} {rate:>8.1f}  {unit}")
+        lines.append(f"wall {self.wall:.2f}s")
+        return "\n".join(lines)
@@ -0,0 +1,199 @@
+"""Process-wide Azure OpenAI / Azure AI Search clients over pooled keep-alive HTTP transports.
+
+Clients are created on first use and shared: one per (endpoint, index) for search and
+per (endpoint, key, API version) for Azure OpenAI. Sync clients of a service share one
+connection pool; async search clients share one aiohttp session per event loop (entries of
+closed loops are dropped). `pool_stats()` reports requests, new connections and how many
+requests reused one.
+"""
+import os, asyncio, threading
+from typing import Callable, Dict, Hashable
+from rag.env import env_num
+
+
+POOL_SIZE = int(env_num("HTTP_POOL_SIZE", 32))
+CONNECT_TIMEOUT = env_num("HTTP_CONNECT_TIMEOUT_SEC", 10)
+READ_TIMEOUT = env_num("HTTP_READ_TIMEOUT_SEC", 120)
+KEEPALIVE = env_num("HTTP_KEEPALIVE_SEC", 60)
+
+_lock = threading.RLock()
+_shared: Dict[Hashable, object] = {}
+_counts: Dict[str, Dict[str, int]] = {}
+
+
+def _get(key: Hashable, make: Callable[[], object]):
+    obj = _shared.get(key)
+    if obj is None:
+        with _lock:
+            obj = _shared.get(key)
+            if obj is None:
+                obj = _shared[key] = make()
+    return obj
+
+
+def _count(pool: str, field: str):
+    with _lock:
+        c = _counts.setdefault(pool, {"requests": 0, "connections": 0})
+        c[field] = c.get(field, 0) + 1
+
+
+# ---- transports ----
+
+def _httpx_options(pool: str, is_async: bool) -> dict:
+    import httpx
+    with _lock:
+        # Only httpcore traces TLS setup; the requests/aiohttp pools report no handshake count
+        _counts.setdefault(pool, {"requests": 0, "connections": 0}).setdefault("tls_handshakes", 0)
+
+    def on_trace(name: str, info: dict):
+        # httpcore trace events; each new socket goes through connect_tcp (and start_tls for https)
+        if name == "connection.connect_tcp.complete":
+            _count(pool, "connections")
+        elif name == "connection.start_tls.complete":
+            _count(pool, "tls_handshakes")
+
+    async def on_trace_async(name: str, info: dict):
+        # httpcore's async connection path awaits the trace callback
+        on_trace(name, info)
+
+    def on_request(request):
+        _count(pool, "requests")
+        request.extensions["trace"] = on_trace
+
+    async def on_request_async(request):
+        _count(pool, "requests")
+        request.extensions["trace"] = on_trace_async
+
+    return dict(
+        limits=httpx.Limits(max_connections=POOL_SIZE, max_keepalive_connections=POOL_SIZE, keepalive_expiry=KEEPALIVE),
+        timeout=httpx.Timeout(READ_TIMEOUT, connect=CONNECT_TIMEOUT),
+        follow_redirects=True,
+        event_hooks={"request": [on_request_async if is_async else on_request]},
+    )
+
+
+def _requests_session():
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    session = requests.Session()
+    # Retries belong to the Azure SDK pipeline, not urllib3
+    adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE,
+                          max_retries=Retry(total=False, redirect=False, raise_on_status=False))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _aiohttp_session(pool: str):
+    import aiohttp
+
+    async def on_request(session, ctx, params):
+        _count(pool, "requests")
+
+    async def on_connection(session, ctx, params):
+        _count(pool, "connections")
+
+    trace = aiohttp.TraceConfig()
+    trace.on_request_start.append(on_request)
+    trace.on_connection_create_end.append(on_connection)
+    return aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=POOL_SIZE, keepalive_timeout=KEEPALIVE),
+                                 trace_configs=[trace])
+
+
+# ---- clients ----
+
+def search_client(endpoint: str, index: str, api_key: str):
+    """Shared `azure.search.documents.SearchClient` for (endpoint, index)."""
+    def make():
+        from azure.core.credentials import AzureKeyCredential
+        from azure.core.pipeline.transport import RequestsTransport
+        from azure.search.documents import SearchClient
+        session = _get(("session", "search"), _requests_session)
+        transport = RequestsTransport(session=session, session_owner=False,
+                                      connection_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT)
+        return SearchClient(endpoint, index, AzureKeyCredential(api_key), transport=transport)
+    return _get(("search", endpoint, index), make)
+
+
+def use_local_backend() -> bool:
+    """SEARCH_BACKEND=local: chunks live in the in-process index (retrivers/local_search.py)."""
+    return os.getenv("SEARCH_BACKEND", "azure").strip().lower() == "local"
+
+
+def chunk_search_client(endpoint: str, index: str, api_key: str):
+    """Chunk index client for the configured backend; the local backend (numpy) is imported only when selected."""
+    if use_local_backend():
+        from retrivers.local_search import local_client
+        return local_client(index)
+    return search_client(endpoint, index, api_key)
+
+
+def _evict_closed_loops():
+    """Drop async clients and sessions whose event loop is closed (e.g. finished asyncio.run calls).
+    Their sockets can no longer be closed through the loop and are released when collected."""
+    with _lock:
+        for key in [k for k in _shared if isinstance(k[-1], asyncio.AbstractEventLoop) and k[-1].is_closed()]:
+            obj = _shared.pop(key)
+            if key[0] == "session":
+                obj.detach()  # marks it closed without touching the dead loop
+
+
+def async_search_client(endpoint: str, index: str, api_key: str):
+    """Shared `azure.search.documents.aio.SearchClient`; call from inside the event loop that uses it."""
+    loop = asyncio.get_running_loop()
+    if ("search-async", endpoint, index, loop) not in _shared:
+        _evict_closed_loops()
+
+    def make():
+        from azure.core.credentials import AzureKeyCredential
+        from azure.core.pipeline.transport import AioHttpTransport
+        from azure.search.documents.aio import SearchClient as AsyncSearchClient
+        session = _get(("session", "search-async", loop), lambda: _aiohttp_session("search-async"))
+        transport = AioHttpTransport(session=session, session_owner=False,
+                                     connection_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT)
+        return AsyncSearchClient(endpoint, index, AzureKeyCredential(api_key), transport=transport)
+    return _get(("search-async", endpoint, index, loop), make)
+
+
+def openai_client(endpoint: str, api_key: str, api_version: str):
+    """Shared `AzureOpenAI` for (endpoint, key, API version)."""
+    def make():
+        import httpx
+        from openai import AzureOpenAI
+        http = _get(("http", "openai"), lambda: httpx.Client(**_httpx_options("openai", False)))
+        return AzureOpenAI(azure_endpoint=endpoint, api_key=api_key, api_version=api_version, http_client=http)
+    return _get(("openai", endpoint, api_key, api_version), make)
+
+
+def async_openai_client(endpoint: str, api_key: str, api_version: str):
+    """Shared `AsyncAzureOpenAI` for (endpoint, key, API version)."""
+    def make():
+        import httpx
+        from openai import AsyncAzureOpenAI
+        http = _get(("http", "openai-async"), lambda: httpx.AsyncClient(**_httpx_options("openai-async", True)))
+        return AsyncAzureOpenAI(azure_endpoint=endpoint, api_key=api_key, api_version=api_version, http_client=http)
+    return _get(("openai-async", endpoint, api_key, api_version), make)
+
+
+def pool_stats() -> Dict[str, dict]:
+    """Per connection pool: requests, new connections, reused (requests on an existing connection), reuse_rate;
+    httpx pools (openai, openai-async) also report tls_handshakes."""
+    with _lock:
+        out = {k: dict(v) for k, v in _counts.items()}
+        session = _shared.get(("session", "search"))
+    if session is not None:
+        # urllib3 keeps its own counters per host pool
+        reqs = conns = 0
+        for adapter in {id(a): a for a in session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                p = pools.get(key)
+                if p is not None:
+                    reqs += p.num_requests
+                    conns += p.num_connections
+        out["search"] = {"requests": reqs, "connections": conns}
+    for v in out.values():
+        v["reused"] = max(v["requests"] - v["connections"], 0)
+        v["reuse_rate"] = v["reused"] / v["requests"] if v["requests"] else 0.0
+    return out
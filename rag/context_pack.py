@@ -0,0 +1,141 @@
+"""Token-budgeted prompt context from search hits.
+
+Hits of the same `doc_id` that touch or overlap (by `char_start`/`char_end`, or by a
+shared suffix/prefix when the offsets are missing) are merged into one passage with
+the chunker's overlap text kept once; hits whose text is already inside a passage are
+dropped. Passages are then added in score order (the order of `hits`) until
+CONTEXT_TOKEN_BUDGET is used; a passage that does not fit is cut at a sentence end.
+"""
+import re
+from typing import Callable, Dict, List, Optional
+
+from ingest.embed_scheduler import estimate_tokens
+from rag.env import env_int
+
+
+TOKEN_BUDGET = env_int("CONTEXT_TOKEN_BUDGET", 3000)
+MIN_TOKENS = env_int("CONTEXT_MIN_TOKENS", 64)       # smallest cut passage worth sending
+MIN_OVERLAP = env_int("CONTEXT_MIN_OVERLAP_CHARS", 40)  # text-only adjacency needs this much shared text
+_MAX_OVERLAP = 1000  # chunk overlap is 150-220 chars; longer tails are not searched
+_ADJ_GAP = 16        # offsets this close are adjacent (paragraph separators between chunks)
+_SENTENCE_END = re.compile(r"(?:[.!?。]|다\.)[\"')\]]?\s")
+
+
+def _overlap(a: str, b: str) -> int:
+    """Length of the longest suffix of `a` that is a prefix of `b` (0 below MIN_OVERLAP)."""
+    head = b[:MIN_OVERLAP]
+    if len(head) < MIN_OVERLAP:
+        return 0
+    tail = a[-_MAX_OVERLAP:]
+    pos = tail.find(head)
+    while pos != -1:
+        if b.startswith(tail[pos:]):
+            return len(tail) - pos
+        pos = tail.find(head, pos + 1)
+    return 0
+
+
+def _join(a: str, b: str) -> str:
+    k = _overlap(a, b)
+    return a + b[k:] if k else f"{a}\n\n{b}"
+
+
+def _has_offsets(h: dict) -> bool:
+    return isinstance(h.get("char_start"), int) and isinstance(h.get("char_end"), int)
+
+
+def _merge_by_offsets(group: List[tuple]) -> List[dict]:
+    segs: List[dict] = []
+    for rank, h, text in sorted(group, key=lambda m: m[1]["char_start"]):
+        cur = segs[-1] if segs else None
+        if cur is not None and h["char_end"] <= cur["end"]:
+            cur["rank"] = min(cur["rank"], rank)  # contained in the passage already
+        elif cur is not None and h["char_start"] <= cur["end"] + _ADJ_GAP:
+            cur.update(text=_join(cur["text"], text), end=h["char_end"], rank=min(cur["rank"], rank), last=h)
+        else:
+            segs.append({"rank": rank, "first": h, "last": h, "text": text, "end": h["char_end"]})
+    return segs
+
+
+def _merge_by_text(group: List[tuple]) -> List[dict]:
+    segs = [{"rank": r, "first": h, "last": h, "text": t} for r, h, t in group]
+    merged = True
+    while merged and len(segs) > 1:
+        merged = False
+        for a in segs:
+            for b in segs:
+                if a is b:
+                    continue
+                if b["text"] in a["text"]:
+                    a["rank"] = min(a["rank"], b["rank"])
+                elif _overlap(a["text"], b["text"]):
+                    a.update(text=_join(a["text"], b["text"]), rank=min(a["rank"], b["rank"]), last=b["last"])
+                else:
+                    continue
+                segs.remove(b)
+                merged = True
+                break
+            if merged:
+                break
+    return segs
+
+
+def merge_hits(hits: List[dict]) -> List[dict]:
+    """Merged passages in score order: copies of the passage's best hit with the merged `chunk`."""
+    groups: Dict[object, List[tuple]] = {}
+    for rank, h in enumerate(hits):
+        text = (h.get("chunk") or h.get("snippet") or "").strip()
+        if text:
+            groups.setdefault(h.get("doc_id") or ("", rank), []).append((rank, h, text))
+    segs: List[dict] = []
+    for group in groups.values():
+        with_offsets = all(_has_offsets(h) for _, h, _ in group)
+        segs.extend(_merge_by_offsets(group) if with_offsets else _merge_by_text(group))
+    out = []
+    for s in sorted(segs, key=lambda s: s["rank"]):
+        h = dict(hits[s["rank"]])
+        h["chunk"] = s["text"]
+        if s["last"] is not s["first"]:
+            h["page"] = s["first"].get("page")
+            h["page_end"] = s["last"].get("page_end") or s["last"].get("page")
+        out.append(h)
+    return out
+
+
+def _cut(text: str, chars: int) -> str:
+    """`text` cut to at most `chars` at a sentence end (else whitespace), with an ellipsis."""
+    if len(text) <= chars:
+        return text
+    head = text[:chars]
+    ends = [m.end() for m in _SENTENCE_END.finditer(head)]
+    if ends and ends[-1] >= chars // 2:
+        return head[:ends[-1]].rstrip() + " …"
+    sp = head.rfind(" ")
+    return (head[:sp] if sp >= chars // 2 else head).rstrip() + "…"
+
+
+def pack_context(hits: List[dict], line: Callable[[dict], str], budget: Optional[int] = None) -> str:
+    """Prompt lines for `hits` (best first) within `budget` tokens; `line` renders one merged hit."""
+    remaining = max(budget or TOKEN_BUDGET, MIN_TOKENS)
+    rows = []
+    for h in merge_hits(hits):
+        if remaining < MIN_TOKENS:
+            break
+        row = line(h)
+        cost = estimate_tokens(row) + 1  # newline between rows
+        if cost > remaining:
+            # Shrink proportionally until the row fits, then cut at a sentence end
+            text, row = h["chunk"], ""
+            chars = int(len(text) * remaining / cost)
+            while chars > 0:
+                cand = line(dict(h, chunk=_cut(text, chars)))
+                cost = estimate_tokens(cand) + 1
+                if cost <= remaining:
+                    row = cand
+                    break
+                chars = int(chars * 0.85)
+            if not row:
+                continue
+        rows.append(row)
+        remaining -= cost
+    return "\n".join(rows)
@@ -0,0 +1,170 @@
+import os, re, time, sqlite3, hashlib, threading, unicodedata
+from array import array
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+
+from rag.env import env_int
+
+_ROOT = Path(__file__).resolve().parents[1]
+
+
+def embed_dimensions() -> int:
+    """EMBED_DIMENSIONS: shortened embedding width requested from the model (0 = model default)."""
+    return max(0, env_int("EMBED_DIMENSIONS", 0))
+
+
+def embed_request_kwargs(dimensions: int) -> dict:
+    """Extra `embeddings.create` arguments for the configured width."""
+    return {"dimensions": dimensions} if dimensions else {}
+
+
+def model_cache_key(deployment: str, dimensions: int) -> str:
+    """Cache namespace: vectors of different widths from one deployment must not mix."""
+    return f"{deployment}@{dimensions}" if dimensions else deployment
+
+
+def normalize_text(text: str) -> str:
+    """Cache-key normalization: NFKC + collapsed whitespace."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text or "")).strip()
+
+
+def cache_key(deployment: str, text: str) -> str:
+    return hashlib.sha256(f"{deployment}\x00{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """On-disk embedding cache (SQLite, float32 blobs) keyed by (deployment, normalized text hash).
+
+    Size is bounded by total vector bytes; when over budget the least recently
+    used entries are evicted. Safe to share between threads and between the app
+    and ingest processes (WAL mode).
+    """
+
+    def __init__(self, path: Path, max_bytes: int):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(self.path), check_same_thread=False, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS emb (key TEXT PRIMARY KEY, vec BLOB NOT NULL, used REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS emb_used ON emb(used)")
+        self._db.commit()
+        self._bytes = self._db.execute("SELECT COALESCE(SUM(LENGTH(vec)), 0) FROM emb").fetchone()[0]
+
+    def get_many(self, deployment: str, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        keys = [cache_key(deployment, t) for t in texts]
+        found = {}
+        with self._lock:
+            uniq = list(dict.fromkeys(keys))
+            for i in range(0, len(uniq), 500):
+                part = uniq[i:i+500]
+                q = "SELECT key, vec FROM emb WHERE key IN (%s)" % ",".join("?" * len(part))
+                for k, blob in self._db.execute(q, part):
+                    found[k] = blob
+            if found:
+                now = time.time()
+                self._db.executemany("UPDATE emb SET used=? WHERE key=?", [(now, k) for k in found])
+                self._db.commit()
+        out: List[Optional[List[float]]] = []
+        for k in keys:
+            blob = found.get(k)
+            if blob is None:
+                self.misses += 1
+                out.append(None)
+            else:
+                self.hits += 1
+                a = array("f"); a.frombytes(blob)
+                out.append(a.tolist())
+        return out
+
+    def put_many(self, deployment: str, texts: Sequence[str], vecs: Sequence[Sequence[float]]):
+        now = time.time()
+        rows = [(cache_key(deployment, t), array("f", v).tobytes(), now) for t, v in zip(texts, vecs)]
+        if not rows:
+            return
+        with self._lock:
+            # Running byte total: only rows actually inserted (rowcount 1, not ignored) count
+            for row in rows:
+                if self._db.execute("INSERT OR IGNORE INTO emb(key, vec, used) VALUES (?,?,?)", row).rowcount > 0:
+                    self._bytes += len(row[1])
+            self._evict_locked()
+            self._db.commit()
+
+    def _evict_locked(self):
+        if self._bytes <= self.max_bytes:
+            return
+        # Evict down to 90% of the budget in LRU order
+        target = int(self.max_bytes * 0.9)
+        cur = self._db.execute("SELECT key, LENGTH(vec) FROM emb ORDER BY used ASC")
+        drop, freed = [], 0
+        for k, n in cur:
+            if self._bytes - freed <= target:
+                break
+            drop.append((k,)); freed += n
+        cur.close()
+        self._db.executemany("DELETE FROM emb WHERE key=?", drop)
+        self._bytes -= freed
+        self.evictions += len(drop)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        with self._lock:
+            entries = self._db.execute("SELECT COUNT(*) FROM emb").fetchone()[0]
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / total) if total else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": self._bytes,
+        }
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache instance, or None when EMBED_CACHE=off."""
+    global _cache
+    if os.getenv("EMBED_CACHE", "on").lower() in ("0", "off", "false", "no"):
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                p = os.getenv("EMBED_CACHE_PATH", ".cache/embeddings.sqlite")
+                path = Path(p) if Path(p).is_absolute() else _ROOT / p
+                try:
+                    _cache = EmbeddingCache(path, env_int("EMBED_CACHE_MAX_MB", 1024) * 1024 * 1024)
+                except Exception as e:
+                    print(f"WARN: 임베딩 캐시를 열 수 없어 비활성화합니다: {path} — {e}")
+                    os.environ["EMBED_CACHE"] = "off"
+                    return None
+    return _cache
+
+
+def cached_embeddings(deployment: str, texts: Sequence[str],
+                      fetch: Callable[[List[str]], List[List[float]]]) -> List[List[float]]:
+    """Return embeddings for `texts`, calling `fetch` only for cache misses (original order kept)."""
+    texts = list(texts)
+    cache = get_embedding_cache()
+    if cache is None:
+        return fetch(texts)
+    out = cache.get_many(deployment, texts)
+    miss_idx = [i for i, v in enumerate(out) if v is None]
+    if miss_idx:
+        # Identical texts inside one call are fetched once
+        uniq = list(dict.fromkeys(texts[i] for i in miss_idx))
+        vecs = fetch(uniq)
+        cache.put_many(deployment, uniq, vecs)
+        by_text = dict(zip(uniq, vecs))
+        for i in miss_idx:
+            out[i] = by_text[texts[i]]
+    return out  # type: ignore[return-value]
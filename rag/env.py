@@ -0,0 +1,20 @@
+"""Numeric settings from environment variables, shared by the app, retrieval and ingest modules.
+
+An unset, empty or unparsable variable gives the default, so a typo in `.env`
+falls back to the documented value instead of stopping the process.
+"""
+import os
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, str(default)) or default)
+    except Exception:
+        return default
+
+
+def env_num(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, str(default)) or default)
+    except Exception:
+        return default
@@ -0,0 +1,44 @@
+"""Index generation counter shared by index writers and the search result cache.
+
+Writers (ingest runs, app uploads) call `bump(index)` after documents were
+added or removed; readers compare `current(index)` with the generation their
+cached results were computed under. The counter lives in a small file so the
+ingest CLI and the app process see each other's writes.
+"""
+import os, time, threading
+from pathlib import Path
+from typing import Tuple
+
+_ROOT = Path(__file__).resolve().parents[1]
+_lock = threading.Lock()
+
+
+def _path(index: str) -> Path:
+    d = os.getenv("INDEX_GENERATION_DIR", ".cache")
+    base = Path(d) if Path(d).is_absolute() else _ROOT / d
+    return base / f"index-generation-{index}"
+
+
+def current(index: str) -> Tuple[int, int]:
+    """(counter, bump time in ns); (0, 0) before the first bump."""
+    try:
+        n, ts = _path(index).read_text(encoding="ascii").split()
+        return int(n), int(ts)
+    except Exception:
+        return 0, 0
+
+
+def bump(index: str) -> Tuple[int, int]:
+    # The timestamp keeps concurrent bumps from different processes distinct
+    with _lock:
+        n, _ = current(index)
+        gen = (n + 1, time.time_ns())
+        p = _path(index)
+        try:
+            p.parent.mkdir(parents=True, exist_ok=True)
+            tmp = p.with_name(f"{p.name}.{os.getpid()}.tmp")
+            tmp.write_text(f"{gen[0]} {gen[1]}", encoding="ascii")
+            os.replace(tmp, p)
+        except Exception as e:
+            print(f"WARN: 인덱스 세대 기록 실패(검색 캐시가 갱신되지 않을 수 있음): {p} — {e}")
+        return gen
@@ -0,0 +1,46 @@
+"""Relevance guard shared by the direct chat path (app.py) and the LangGraph gate node."""
+import re
+from typing import List
+
+# Verdicts of `relevance_verdict`
+RELEVANT, NO_HITS, OFF_TOPIC = "relevant", "no_hits", "off_topic"
+# Top hits the guard inspects
+GATE_K = 3
+
+
+def query_tokens(q: str) -> List[str]:
+    if not q:
+        return []
+    try:
+        # Extract words and Korean blocks; drop very short tokens
+        toks = re.findall(r"[\w가-힣]+", q, flags=re.IGNORECASE)
+        toks = [t.lower() for t in toks if len(t) >= 2 and not t.startswith('/')]
+        # de-dup while preserving length-based relevance
+        return sorted(set(toks), key=len, reverse=True)
+    except Exception:
+        return [t for t in (q or '').split() if len(t) >= 2]
+
+
+def is_relevant_hits(hits: List[dict], query: str, k: int = GATE_K) -> bool:
+    """Heuristic guard: require token overlap in at least 2 of the top-k hits.
+    Returns True if >= 2 hits contain any query token.
+    """
+    toks = query_tokens(query)
+    if not toks:
+        return False
+    k = max(1, k)
+    match_hits = 0
+    for h in hits[:k]:
+        title = (h.get('title') or '').lower()
+        # Without a body, the snippet (highlight tags removed) is the best available text
+        chunk = (h.get('chunk') or (h.get('snippet') or '').replace('**', '')).lower()
+        blob = f"{title}\n{chunk}"
+        if any(t in blob for t in toks):
+            match_hits += 1
+    return match_hits >= 2 or (match_hits >= 1 and k == 1)
+
+
+def relevance_verdict(hits: List[dict], query: str) -> str:
+    if not hits:
+        return NO_HITS
+    return RELEVANT if is_relevant_hits(hits, query) else OFF_TOPIC
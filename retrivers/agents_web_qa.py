@@ -3,6 +3,7 @@ import time
 from typing import Optional, List, Dict, Tuple
 from dotenv import load_dotenv
 from openai import AzureOpenAI
+from rag import clients
 try:
     from azure.identity import DefaultAzureCredential
     from azure.ai.projects import AIProjectClient
@@ -47,7 +48,7 @@ def _get_client() -> AzureOpenAI:
             raise RuntimeError(
                 "현재 엔드포인트는 services.ai.azure.com입니다. 이 경우에는 Azure AI Agents 경로를 사용해야 합니다."
             )
-        _client = AzureOpenAI(azure_endpoint=AOAI_ENDPOINT, api_key=AOAI_KEY, api_version=AOAI_VER)
+        _client = clients.openai_client(AOAI_ENDPOINT, AOAI_KEY, AOAI_VER)
     return _client
 
 
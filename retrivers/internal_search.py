@@ -1,10 +1,14 @@
-import os
-from typing import List, Optional
+import os, time, asyncio, threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
-from openai import AzureOpenAI
 from openai import NotFoundError
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient
+from azure.core.exceptions import HttpResponseError
+from rag.embed_cache import (cached_embeddings, get_embedding_cache, embed_dimensions, embed_request_kwargs,
+                             model_cache_key, normalize_text)
+from rag.ttl_cache import TTLCache
+from rag import index_generation, clients
+from rag.env import env_num
 try:
     # Newer SDKs (11.4.0b8+) use RawVectorQuery and vector_queries + k
     from azure.search.documents.models import RawVectorQuery as _VectorQuery
@@ -22,108 +26,513 @@ AOAI_ENDPOINT=os.getenv("AZURE_OPENAI_ENDPOINT")
 AOAI_KEY=os.getenv("AZURE_OPENAI_API_KEY")
 AOAI_VER=os.getenv("AZURE_OPENAI_API_VERSION")
 EMBED_DEPLOY=os.getenv("AZURE_OPENAI_EMBED_DEPLOYMENT")
+# Must match the width the index was built with (infra/create_index.py reads the same variable)
+EMBED_DIMENSIONS = embed_dimensions()
+_EMBED_KW = embed_request_kwargs(EMBED_DIMENSIONS)
+_EMBED_CACHE_KEY = model_cache_key(EMBED_DEPLOY, EMBED_DIMENSIONS)
+
+# SEARCH_BACKEND=local: in-process vector + BM25 index instead of Azure AI Search
+LOCAL_BACKEND = clients.use_local_backend()
+search = clients.chunk_search_client(SEARCH_ENDPOINT, INDEX_CHUNKS, SEARCH_API_KEY)
+aoai   = clients.openai_client(AOAI_ENDPOINT, AOAI_KEY, AOAI_VER)
+
+
+# In-process query embedding cache in front of the on-disk one: repeated questions
+# (and fixed probes like the upload recommendation) skip the AOAI round trip
+_query_embeds = TTLCache(int(env_num("QUERY_EMBED_CACHE_SIZE", 2048)), env_num("QUERY_EMBED_CACHE_TTL_SEC", 3600))
+
+
+def query_embed_cache_stats() -> dict:
+    return _query_embeds.stats()
+
+
+# Result cache for identical (query, top, filter); entries are tagged with the index
+# generation and dropped once a writer bumps it (ingest run, /업로드)
+_results = TTLCache(int(env_num("SEARCH_CACHE_SIZE", 512)), env_num("SEARCH_CACHE_TTL_SEC", 300))
+# Writes become searchable after a short delay; results fetched right after a bump are not cached
+_REFRESH_GRACE_NS = int(env_num("SEARCH_CACHE_REFRESH_GRACE_SEC", 2) * 1e9)
+_results_gen = None
+_invalidated = 0
+
+
+def search_cache_stats() -> dict:
+    out = _results.stats()
+    out["invalidated"] = _invalidated
+    out["generation"] = index_generation.current(INDEX_CHUNKS)[0]
+    return out
+
+
+def _embed_uncached(texts: List[str]) -> List[List[float]]:
+    return [d.embedding for d in aoai.embeddings.create(model=EMBED_DEPLOY, input=texts, **_EMBED_KW).data]
+
+
+def _deployment_not_found(e: Exception) -> RuntimeError:
+    # Provide a clearer, actionable message
+    msg = (
+        "Azure OpenAI Embedding deployment not found.\n"
+        f"- Endpoint: {AOAI_ENDPOINT}\n"
+        f"- API version: {AOAI_VER}\n"
+        f"- EMBED_DEPLOY (deployment name): {EMBED_DEPLOY}\n"
+        "확인하세요: Azure Portal > Azure OpenAI 리소스 > Deployments 에서 임베딩 모델 배포명이 위와 정확히 일치하는지, \n"
+        "그리고 이 리소스의 엔드포인트가 .env 의 AZURE_OPENAI_ENDPOINT 와 동일한지."
+    )
+    return RuntimeError(msg)
 
-search = SearchClient(SEARCH_ENDPOINT, INDEX_CHUNKS, AzureKeyCredential(SEARCH_API_KEY))
-aoai   = AzureOpenAI(azure_endpoint=AOAI_ENDPOINT, api_key=AOAI_KEY, api_version=AOAI_VER)
 
 def _embed(q: str) -> List[float]:
+    key = (_EMBED_CACHE_KEY, normalize_text(q))
+    hit = _query_embeds.get(key)
+    if hit is not None:
+        return hit
     try:
-        return aoai.embeddings.create(model=EMBED_DEPLOY, input=q).data[0].embedding
+        emb = cached_embeddings(_EMBED_CACHE_KEY, [q], _embed_uncached)[0]
+        _query_embeds.put(key, emb)
+        return emb
     except NotFoundError as e:
-        # Provide a clearer, actionable message
-        msg = (
-            "Azure OpenAI Embedding deployment not found.\n"
-            f"- Endpoint: {AOAI_ENDPOINT}\n"
-            f"- API version: {AOAI_VER}\n"
-            f"- EMBED_DEPLOY (deployment name): {EMBED_DEPLOY}\n"
-            "확인하세요: Azure Portal > Azure OpenAI 리소스 > Deployments 에서 임베딩 모델 배포명이 위와 정확히 일치하는지, \n"
-            "그리고 이 리소스의 엔드포인트가 .env 의 AZURE_OPENAI_ENDPOINT 와 동일한지."
-        )
-        raise RuntimeError(msg) from e
-
-def hybrid_search(query: str, top: int = 8, filter: Optional[str] = None):
-    emb = _embed(query)
-    # Use a larger vector neighborhood for better recall, but return only `top` docs
-    vec_k = max(top * 3, 20)
+        raise _deployment_not_found(e) from e
+
+
+def _result_key(query: str, top: int, filter: Optional[str], lite: bool = False):
+    """Result-cache key under the current index generation (None when the cache is off)."""
+    global _results_gen, _invalidated
+    if _results.max_size <= 0:
+        return None
+    gen = index_generation.current(INDEX_CHUNKS)
+    if gen != _results_gen:
+        _results.clear()
+        _invalidated += _results_gen is not None
+        _results_gen = gen
+    return (gen, normalize_text(query), top, filter or "", lite)
+
+
+def _result_put(key, hits: list):
+    if key is not None and time.time_ns() - key[0][1] >= _REFRESH_GRACE_NS:
+        _results.put(key, [dict(r) for r in hits])
+
+
+def hybrid_search(query: str, top: int = 8, filter: Optional[str] = None, lite: bool = False):
+    """Hybrid (keyword + vector, semantic when available) search over the chunk index.
+    Served from the result cache while the index generation is unchanged.
+
+    `lite=True` leaves out the chunk bodies: hits carry metadata, scores and a "snippet"
+    (semantic caption or highlighted fragments); `fetch_chunks` fills "chunk" in later."""
+    key = _result_key(query, top, filter, lite)
+    hit = _results.get(key) if key is not None else None
+    if hit is not None:
+        return [dict(r) for r in hit]
+    hits = _search_emb(query, top, filter, _embed(query), lite)
+    _result_put(key, hits)
+    return hits
+
+
+# page_end/char_* let the context packer merge adjacent chunks of a document
+_SELECT = ["id","doc_id","title","chunk","source_uri","page","page_end","char_start","char_end","dept","system","year"]
+_LITE_SELECT = [f for f in _SELECT if f != "chunk"]
+_SEARCH_FIELDS = ["title","chunk"]
+_HIGHLIGHT = {"highlight_fields": "chunk", "highlight_pre_tag": "**", "highlight_post_tag": "**"}
+# Answer paths (app, LangGraph) need the chunk bodies, so they get them with the search by default;
+# SEARCH_LITE_RESULTS=true makes them snippet-only plus one fetch_chunks lookup. Display-only
+# callers (recommendations) always pass lite=True.
+LITE_RESULTS = os.getenv("SEARCH_LITE_RESULTS", "false").lower() in ("1", "true", "yes")
+# Extractive captions on semantic plans; switched off if the SDK or service rejects them
+_captions_ok = True
+# Request templates, best first: semantic ranking with Korean query language, semantic,
+# plain keyword ranking. The first one the SDK and the service accept is memoized.
+_PLANS = [
+    ("semantic-ko", {"query_type": "semantic", "semantic_configuration_name": "default", "search_mode": "all",
+                     "query_language": "ko-kr"}),
+    ("semantic", {"query_type": "semantic", "semantic_configuration_name": "default", "search_mode": "all"}),
+    ("simple", {"query_type": "simple", "search_mode": "all"}),
+]
+# The local backend always fuses keyword and vector rankings; nothing to probe
+_plan: Optional[Tuple[str, dict]] = ("local", {}) if LOCAL_BACKEND else None
+_plan_lock = threading.Lock()
+
+
+def _vector_kwargs(emb: List[float], k: int) -> dict:
     if _USE_NEW_VECTOR_API:
-        vec = _VectorQuery(vector=emb, k=vec_k, fields="contentVector")
+        return {"vector_queries": [_VectorQuery(vector=emb, k=k, fields="contentVector")]}
+    return {"vectors": [_VectorQuery(value=emb, k_nearest_neighbors=k, fields="contentVector")]}
+
+
+def _search_kwargs(template: dict, query: str, top: int, filter: Optional[str], vector: dict,
+                   lite: bool = False) -> dict:
+    kw = dict(search_text=query, top=top, filter=filter, search_fields=_SEARCH_FIELDS,
+              select=_LITE_SELECT if lite else _SELECT, **vector, **template)
+    if lite:
+        kw.update(_HIGHLIGHT)
+        if _captions_ok and template.get("query_type") == "semantic":
+            kw["query_caption"] = "extractive"
+    return kw
+
+
+def _lite_hit(r: dict) -> dict:
+    """Snippet-only hit: caption text, else the highlighted fragments."""
+    h = {k: v for k, v in r.items() if k not in ("@search.highlights", "@search.captions")}
+    caps = r.get("@search.captions") or []
+    frags = (r.get("@search.highlights") or {}).get("chunk") or []
+    cap = None
+    for c in caps[:1]:
+        c = c if isinstance(c, dict) else {"text": getattr(c, "text", None), "highlights": getattr(c, "highlights", None)}
+        # Caption highlights are tagged <em>; use the same markdown bold as the field highlights
+        cap = (c.get("highlights") or c.get("text") or "").replace("<em>", "**").replace("</em>", "**")
+    h["snippet"] = cap or " … ".join(frags)
+    return h
+
+
+def _captions_failed(kw: dict, e: Exception) -> bool:
+    global _captions_ok
+    if "query_caption" not in kw or not _plan_unsupported(e):
+        return False
+    _captions_ok = False
+    print(f"INFO: 시맨틱 캡션 사용 불가, 하이라이트만 사용 — {e}")
+    return True
+
+
+def _run_search(template: dict, query: str, top: int, filter: Optional[str], vector: dict,
+                lite: bool = False) -> list:
+    kw = _search_kwargs(template, query, top, filter, vector, lite)
+    try:
+        # Results are paged lazily; listing them is what sends the request
+        rows = list(search.search(**kw))
+    except Exception as e:
+        if not _captions_failed(kw, e):
+            raise
+        rows = list(search.search(**_search_kwargs(template, query, top, filter, vector, lite)))
+    return [_lite_hit(r) for r in rows] if lite else rows
+
+
+def _plan_unsupported(e: Exception) -> bool:
+    # TypeError: the SDK does not know an argument; 400: the service rejects semantic/query_language
+    return isinstance(e, TypeError) or (isinstance(e, HttpResponseError) and getattr(e, "status_code", None) == 400)
+
+
+def _candidate_plans() -> List[Tuple[str, dict]]:
+    forced = (os.getenv("SEARCH_PLAN") or "").strip().lower()
+    return [p for p in _PLANS if p[0] == forced] or _PLANS
+
+
+def _plan_failed(name: str, e: Exception):
+    if not _plan_unsupported(e):
+        raise e
+    print(f"INFO: 검색 플랜 '{name}' 사용 불가, 다음 플랜 시도 — {e}")
+
+
+def _use_plan(name: str, template: dict):
+    global _plan
+    if _plan == (name, template):
+        return  # concurrent async probes
+    _plan = (name, template)
+    print(f"INFO: 검색 플랜 '{name}' 사용 ({search_plan()['vector_api']})")
+
+
+def _probe(query: str, top: int, filter: Optional[str], vector: dict, lite: bool = False) -> list:
+    """First search: try the plans in order, memoize the first that works and return its results."""
+    last: Optional[Exception] = None
+    for name, template in _candidate_plans():
         try:
-            # Prefer semantic with stricter term matching for precision
-            try:
-                res = search.search(
-                    search_text=query,
-                    vector_queries=[vec],
-                    top=top,
-                    filter=filter,
-                    query_type="semantic",
-                    semantic_configuration_name="default",
-                    search_mode="all",
-                    query_language="ko-kr",
-                    search_fields=["title","chunk"],
-                    select=["id","doc_id","title","chunk","source_uri","page","dept","system","year"],
-                )
-            except TypeError:
-                # Older SDKs may not support query_language
-                res = search.search(
-                    search_text=query,
-                    vector_queries=[vec],
-                    top=top,
-                    filter=filter,
-                    query_type="semantic",
-                    semantic_configuration_name="default",
-                    search_mode="all",
-                    search_fields=["title","chunk"],
-                    select=["id","doc_id","title","chunk","source_uri","page","dept","system","year"],
-                )
-        except Exception:
-            # Fallback when semantic ranker/config is not available
-            res = search.search(
-                search_text=query,
-                vector_queries=[vec],
-                top=top,
-                filter=filter,
-                query_type="simple",
-                search_mode="all",
-                search_fields=["title","chunk"],
-                select=["id","doc_id","title","chunk","source_uri","page","dept","system","year"],
-            )
+            hits = _run_search(template, query, top, filter, vector, lite)
+        except Exception as e:
+            _plan_failed(name, e)
+            last = e
+            continue
+        _use_plan(name, template)
+        return hits
+    raise last  # type: ignore[misc]
+
+
+def search_plan() -> Optional[dict]:
+    """Active request plan, or None until the first search has probed it."""
+    if _plan is None:
+        return None
+    return {"name": _plan[0], "vector_api": "vector_queries" if _USE_NEW_VECTOR_API else "vectors",
+            **_plan[1]}
+
+
+def _search_emb(query: str, top: int, filter: Optional[str], emb: List[float], lite: bool = False) -> list:
+    # Use a larger vector neighborhood for better recall, but return only `top` docs
+    vector = _vector_kwargs(emb, max(top * 3, 20))
+    plan = _plan
+    if plan is None:
+        with _plan_lock:
+            if _plan is None:
+                return _probe(query, top, filter, vector, lite)
+            plan = _plan
+    return _run_search(plan[1], query, top, filter, vector, lite)
+
+
+# ---- lazy chunk bodies for snippet-only hits ----
+
+# Chunk keys are content-addressed (uploads get fresh random keys), so a body never changes under its key
+_chunk_bodies = TTLCache(int(env_num("CHUNK_CACHE_SIZE", 2048)), env_num("SEARCH_CACHE_TTL_SEC", 300))
+
+
+def chunk_cache_stats() -> dict:
+    return _chunk_bodies.stats()
+
+
+def _chunk_lookup_kwargs(ids: List[str]) -> dict:
+    # One keyed lookup for all missing bodies; '|' as the delimiter since keys may contain commas
+    quoted = "|".join(i.replace("'", "''") for i in ids)
+    return dict(search_text="*", filter=f"search.in(id, '{quoted}', '|')", select=["id", "chunk"], top=len(ids))
+
+
+def _chunks_todo(hits: List[dict]) -> Tuple[List[dict], List[str]]:
+    """Fill bodies from the cache; return the hits still missing one and their unique keys."""
+    need = []
+    for h in hits:
+        if h.get("chunk") is None and h.get("id"):
+            body = _chunk_bodies.get(h["id"])
+            if body is None:
+                need.append(h)
+            else:
+                h["chunk"] = body
+    return need, list(dict.fromkeys(h["id"] for h in need))
+
+
+def _chunks_fill(need: List[dict], rows) -> None:
+    by_id = {r["id"]: r.get("chunk") or "" for r in rows}
+    for k, body in by_id.items():
+        _chunk_bodies.put(k, body)
+    for h in need:
+        h["chunk"] = by_id.get(h["id"], "")
+
+
+def fetch_chunks(hits: List[dict]) -> List[dict]:
+    """Fill in "chunk" on snippet-only hits (in place, one lookup request); returns `hits`."""
+    need, ids = _chunks_todo(hits)
+    if ids:
+        _chunks_fill(need, list(search.search(**_chunk_lookup_kwargs(ids))))
+    return hits
+
+
+# ---- async path (Chainlit handlers): same caches and plan, aio clients ----
+
+_async_local = None
+
+
+def _async_clients():
+    """azure.search.documents.aio / AsyncAzureOpenAI clients from the shared registry (per event loop)."""
+    global _async_local
+    if LOCAL_BACKEND:
+        if _async_local is None:
+            from retrivers.local_search import AsyncLocalSearchClient
+            _async_local = AsyncLocalSearchClient(search)
+        s = _async_local
+    else:
+        s = clients.async_search_client(SEARCH_ENDPOINT, INDEX_CHUNKS, SEARCH_API_KEY)
+    return s, clients.async_openai_client(AOAI_ENDPOINT, AOAI_KEY, AOAI_VER)
+
+
+async def _aembed(q: str) -> List[float]:
+    key = (_EMBED_CACHE_KEY, normalize_text(q))
+    hit = _query_embeds.get(key)
+    if hit is not None:
+        return hit
+    # On-disk cache reads/writes (SQLite, may wait on the ingest process's lock) run off the event loop
+    cache = get_embedding_cache()
+    emb = (await asyncio.to_thread(cache.get_many, _EMBED_CACHE_KEY, [q]))[0] if cache else None
+    if emb is None:
+        try:
+            resp = await _async_clients()[1].embeddings.create(model=EMBED_DEPLOY, input=[q], **_EMBED_KW)
+        except NotFoundError as e:
+            raise _deployment_not_found(e) from e
+        emb = resp.data[0].embedding
+        if cache:
+            await asyncio.to_thread(cache.put_many, _EMBED_CACHE_KEY, [q], [emb])
+    _query_embeds.put(key, emb)
+    return emb
+
+
+async def _arun_search(template: dict, query: str, top: int, filter: Optional[str], vector: dict,
+                       lite: bool = False) -> list:
+    kw = _search_kwargs(template, query, top, filter, vector, lite)
+    client = _async_clients()[0]
+    try:
+        rows = [r async for r in await client.search(**kw)]
+    except Exception as e:
+        if not _captions_failed(kw, e):
+            raise
+        rows = [r async for r in await client.search(**_search_kwargs(template, query, top, filter, vector, lite))]
+    return [_lite_hit(r) for r in rows] if lite else rows
+
+
+async def _aprobe(query: str, top: int, filter: Optional[str], vector: dict, lite: bool = False) -> list:
+    last: Optional[Exception] = None
+    for name, template in _candidate_plans():
+        try:
+            hits = await _arun_search(template, query, top, filter, vector, lite)
+        except Exception as e:
+            _plan_failed(name, e)
+            last = e
+            continue
+        _use_plan(name, template)
+        return hits
+    raise last  # type: ignore[misc]
+
+
+async def hybrid_search_async(query: str, top: int = 8, filter: Optional[str] = None, lite: bool = False):
+    """Async `hybrid_search`: same results, caches and plan, without blocking the event loop."""
+    key = _result_key(query, top, filter, lite)
+    hit = _results.get(key) if key is not None else None
+    if hit is not None:
+        return [dict(r) for r in hit]
+    hits = await _asearch_emb(query, top, filter, await _aembed(query), lite)
+    _result_put(key, hits)
+    return hits
+
+
+async def _asearch_emb(query: str, top: int, filter: Optional[str], emb: List[float], lite: bool = False) -> list:
+    vector = _vector_kwargs(emb, max(top * 3, 20))
+    plan = _plan
+    if plan is None:
+        return await _aprobe(query, top, filter, vector, lite)
+    return await _arun_search(plan[1], query, top, filter, vector, lite)
+
+
+async def fetch_chunks_async(hits: List[dict]) -> List[dict]:
+    """Async `fetch_chunks`."""
+    need, ids = _chunks_todo(hits)
+    if ids:
+        res = await _async_clients()[0].search(**_chunk_lookup_kwargs(ids))
+        _chunks_fill(need, [r async for r in res])
+    return hits
+
+
+# ---- multi-query: one embeddings request, concurrent searches ----
+
+_many_pool: Optional[ThreadPoolExecutor] = None
+
+
+def _embed_many(queries: List[str]) -> List[List[float]]:
+    keys = [(_EMBED_CACHE_KEY, normalize_text(q)) for q in queries]
+    out = [_query_embeds.get(k) for k in keys]
+    miss = [i for i, v in enumerate(out) if v is None]
+    if miss:
+        uniq = list(dict.fromkeys(queries[i] for i in miss))
+        try:
+            by_text = dict(zip(uniq, cached_embeddings(_EMBED_CACHE_KEY, uniq, _embed_uncached)))
+        except NotFoundError as e:
+            raise _deployment_not_found(e) from e
+        for i in miss:
+            out[i] = by_text[queries[i]]
+            _query_embeds.put(keys[i], out[i])
+    return out  # type: ignore[return-value]
+
+
+async def _aembed_many(queries: List[str]) -> List[List[float]]:
+    keys = [(_EMBED_CACHE_KEY, normalize_text(q)) for q in queries]
+    out = [_query_embeds.get(k) for k in keys]
+    cache = get_embedding_cache()
+    if cache:
+        miss = [i for i, v in enumerate(out) if v is None]
+        for i, v in zip(miss, cache.get_many(_EMBED_CACHE_KEY, [queries[i] for i in miss])):
+            out[i] = v
+    miss = [i for i, v in enumerate(out) if v is None]
+    if miss:
+        uniq = list(dict.fromkeys(queries[i] for i in miss))
+        try:
+            resp = await _async_clients()[1].embeddings.create(model=EMBED_DEPLOY, input=uniq, **_EMBED_KW)
+        except NotFoundError as e:
+            raise _deployment_not_found(e) from e
+        vecs = [d.embedding for d in resp.data]
+        if cache:
+            cache.put_many(_EMBED_CACHE_KEY, uniq, vecs)
+        by_text = dict(zip(uniq, vecs))
+        for i in miss:
+            out[i] = by_text[queries[i]]
+    for k, v in zip(keys, out):
+        _query_embeds.put(k, v)
+    return out  # type: ignore[return-value]
+
+
+def _many_start(queries: List[str], top: int, filter: Optional[str], lite: bool):
+    """Per-query result records with result-cache hits filled in, their cache keys and the misses."""
+    out = [{"query": q, "hits": [], "cached": False, "error": None, "embed_ms": 0.0, "search_ms": 0.0}
+           for q in queries]
+    keys = [_result_key(q, top, filter, lite) for q in queries]
+    todo = []
+    for i, key in enumerate(keys):
+        hit = _results.get(key) if key is not None else None
+        if hit is not None:
+            out[i]["hits"] = [dict(r) for r in hit]
+            out[i]["cached"] = True
+        else:
+            todo.append(i)
+    return out, keys, todo
+
+
+def _many_done(rec: dict, key, hits, err: Optional[Exception], ms: float):
+    rec["search_ms"] = ms
+    if err is not None:
+        rec["error"] = str(err)
     else:
-        vec = _VectorQuery(value=emb, k_nearest_neighbors=vec_k, fields="contentVector")
+        rec["hits"] = hits
+        _result_put(key, hits)
+
+
+def hybrid_search_many(queries: List[str], top: int = 8, filter: Optional[str] = None,
+                       lite: bool = False) -> List[dict]:
+    """`hybrid_search` for several queries: uncached queries are embedded in one request and
+    searched concurrently. Returns, in input order, {"query", "hits", "cached", "error",
+    "embed_ms" (the shared embeddings request), "search_ms"}; a failed search sets "error"."""
+    global _many_pool
+    queries = list(queries)
+    out, keys, todo = _many_start(queries, top, filter, lite)
+    if not todo:
+        return out
+    t0 = time.perf_counter()
+    embs = _embed_many([queries[i] for i in todo])
+    embed_ms = (time.perf_counter() - t0) * 1000
+    for i in todo:
+        out[i]["embed_ms"] = embed_ms
+
+    def one(i: int, emb: List[float]):
+        t = time.perf_counter()
         try:
+            return i, _search_emb(queries[i], top, filter, emb, lite), None, (time.perf_counter() - t) * 1000
+        except Exception as e:
+            return i, None, e, (time.perf_counter() - t) * 1000
+
+    jobs = list(zip(todo, embs))
+    if _plan is None:
+        # The first search settles the request plan before fanning out
+        _many_done(out[jobs[0][0]], keys[jobs[0][0]], *one(*jobs[0])[1:])
+        jobs = jobs[1:]
+    if jobs:
+        if _many_pool is None:
+            _many_pool = ThreadPoolExecutor(max_workers=int(env_num("SEARCH_MANY_WORKERS", 8)),
+                                            thread_name_prefix="search")
+        for i, hits, err, ms in _many_pool.map(lambda j: one(*j), jobs):
+            _many_done(out[i], keys[i], hits, err, ms)
+    return out
+
+
+async def hybrid_search_many_async(queries: List[str], top: int = 8, filter: Optional[str] = None,
+                                   lite: bool = False) -> List[dict]:
+    """Async `hybrid_search_many` (same records)."""
+    queries = list(queries)
+    out, keys, todo = _many_start(queries, top, filter, lite)
+    if not todo:
+        return out
+    t0 = time.perf_counter()
+    embs = await _aembed_many([queries[i] for i in todo])
+    embed_ms = (time.perf_counter() - t0) * 1000
+    sem = asyncio.Semaphore(int(env_num("SEARCH_MANY_WORKERS", 8)))
+
+    async def one(i: int, emb: List[float]):
+        out[i]["embed_ms"] = embed_ms
+        async with sem:
+            t = time.perf_counter()
             try:
-                res = search.search(
-                    search_text=query,
-                    vectors=[vec],
-                    top=top,
-                    filter=filter,
-                    query_type="semantic",
-                    semantic_configuration_name="default",
-                    search_mode="all",
-                    query_language="ko-kr",
-                    search_fields=["title","chunk"],
-                    select=["id","doc_id","title","chunk","source_uri","page","dept","system","year"],
-                )
-            except TypeError:
-                res = search.search(
-                    search_text=query,
-                    vectors=[vec],
-                    top=top,
-                    filter=filter,
-                    query_type="semantic",
-                    semantic_configuration_name="default",
-                    search_mode="all",
-                    search_fields=["title","chunk"],
-                    select=["id","doc_id","title","chunk","source_uri","page","dept","system","year"],
-                )
-        except Exception:
-            res = search.search(
-                search_text=query,
-                vectors=[vec],
-                top=top,
-                filter=filter,
-                query_type="simple",
-                search_mode="all",
-                search_fields=["title","chunk"],
-                select=["id","doc_id","title","chunk","source_uri","page","dept","system","year"],
-            )
-    return [r for r in res]
+                hits, err = await _asearch_emb(queries[i], top, filter, emb, lite), None
+            except Exception as e:
+                hits, err = None, e
+        _many_done(out[i], keys[i], hits, err, (time.perf_counter() - t) * 1000)
+
+    jobs = list(zip(todo, embs))
+    if _plan is None:
+        await one(*jobs[0])
+        jobs = jobs[1:]
+    await asyncio.gather(*(one(i, e) for i, e in jobs))
+    return out
@@ -0,0 +1,517 @@
+"""In-process chunk index: memory-mapped float32 vectors + Korean-aware BM25, fused with RRF.
+
+Selected with SEARCH_BACKEND=local. `LocalSearchClient` has the parts of the
+azure.search.documents SearchClient interface this project uses
+(upload_documents / delete_documents / search / get_document_count), so ingest,
+/업로드 and hybrid_search work unchanged against it.
+
+Storage (LOCAL_INDEX_DIR, default .cache/local-index-<INDEX_CHUNKS>):
+  meta.jsonl      header line {"version", "dims", "vectors": <file>}, then an append-only
+                  log of {"op": "put", "row": n, "doc": {...}} / {"op": "del", "id": ...}
+  vectors-*.f32   row-major float32 matrix, one row per put (memory-mapped for search)
+Writers append under a lock file; readers pick up appended lines before each search,
+and a compaction (new vectors file + new header) makes them reload.
+"""
+import os, re, json, math, time, threading, unicodedata
+from collections import Counter
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+_ROOT = Path(__file__).resolve().parents[1]
+_VERSION = 1
+# Fields kept as filterable columns (OData subset in `filter`)
+_COLUMNS = ("id", "doc_id", "system", "dept", "year", "page")
+RRF_K = 60
+
+_TOKEN = re.compile(r"[0-9a-z]+|[가-힣]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased alphanumeric words; Hangul runs become character bigrams, so particles
+    and compounds (감사보고서 / 감사 보고서는) still share terms."""
+    out: List[str] = []
+    for m in _TOKEN.finditer(unicodedata.normalize("NFKC", text or "").lower()):
+        t = m.group()
+        if "가" <= t[0] <= "힣" and len(t) > 1:
+            out.extend(t[i:i + 2] for i in range(len(t) - 1))
+        else:
+            out.append(t)
+    return out
+
+
+# ---- OData filter subset: eq ne gt ge lt le, and/or/not, parentheses, search.in(field, 'a,b') ----
+
+_FILTER_TOKEN = re.compile(r"\s*(?:(\()|(\))|(,)|'((?:[^']|'')*)'|(-?\d+(?:\.\d+)?)|([A-Za-z_][\w.]*))")
+
+
+def _lex(expr: str) -> List[tuple]:
+    pos, out = 0, []
+    expr = expr.strip()
+    while pos < len(expr):
+        m = _FILTER_TOKEN.match(expr, pos)
+        if not m or m.end() == pos:
+            raise ValueError(f"지원하지 않는 필터 구문: {expr[pos:pos + 20]!r}")
+        pos = m.end()
+        lp, rp, comma, s, num, word = m.groups()
+        if lp: out.append(("(", None))
+        elif rp: out.append((")", None))
+        elif comma: out.append((",", None))
+        elif s is not None: out.append(("val", s.replace("''", "'")))
+        elif num is not None: out.append(("val", float(num) if "." in num else int(num)))
+        elif word.lower() in ("and", "or", "not", "eq", "ne", "gt", "ge", "lt", "le"): out.append((word.lower(), None))
+        elif word.lower() in ("null", "true", "false"): out.append(("val", {"null": None, "true": True, "false": False}[word.lower()]))
+        else: out.append(("name", word))
+    return out
+
+
+class _Filter:
+    """Recursive-descent evaluator producing a boolean row mask."""
+
+    def __init__(self, expr: str, columns: Dict[str, np.ndarray], n: int):
+        self.toks = _lex(expr)
+        self.i = 0
+        self.columns = columns
+        self.n = n
+
+    def _peek(self):
+        return self.toks[self.i][0] if self.i < len(self.toks) else None
+
+    def _take(self, kind: str):
+        if self._peek() != kind:
+            raise ValueError(f"필터 구문 오류: '{kind}' 위치")
+        tok = self.toks[self.i]; self.i += 1
+        return tok[1]
+
+    def parse(self) -> np.ndarray:
+        mask = self._or()
+        if self.i != len(self.toks):
+            raise ValueError("필터 구문 오류: 남은 토큰")
+        return mask
+
+    def _or(self):
+        m = self._and()
+        while self._peek() == "or":
+            self.i += 1; m = m | self._and()
+        return m
+
+    def _and(self):
+        m = self._not()
+        while self._peek() == "and":
+            self.i += 1; m = m & self._not()
+        return m
+
+    def _not(self):
+        if self._peek() == "not":
+            self.i += 1
+            return ~self._not()
+        if self._peek() == "(":
+            self.i += 1
+            m = self._or()
+            self._take(")")
+            return m
+        return self._cmp()
+
+    def _col(self, name: str) -> np.ndarray:
+        if name not in self.columns:
+            raise ValueError(f"필터할 수 없는 필드: {name} (지원: {', '.join(_COLUMNS)})")
+        return self.columns[name]
+
+    def _cmp(self):
+        name = self._take("name")
+        if name.lower() == "search.in":
+            self._take("(")
+            col = self._col(self._take("name"))
+            self._take(",")
+            values = self._take("val")
+            sep = ","
+            if self._peek() == ",":
+                self.i += 1; sep = self._take("val")
+            self._take(")")
+            wanted = [v.strip() for v in str(values).split(sep)]
+            if col.dtype.kind == "f":
+                wanted = [float(v) for v in wanted if re.fullmatch(r"-?\d+(?:\.\d+)?", v)]
+            return np.isin(col, wanted)
+        col = self._col(name)
+        op = self.toks[self.i][0] if self.i < len(self.toks) else None
+        if op not in ("eq", "ne", "gt", "ge", "lt", "le"):
+            raise ValueError(f"필터 구문 오류: {name} 뒤 비교 연산자 필요")
+        self.i += 1
+        value = self._take("val")
+        numeric = col.dtype.kind == "f"
+        if value is None:
+            m = np.isnan(col) if numeric else (col == "")
+        elif numeric != (isinstance(value, (int, float)) and not isinstance(value, bool)):
+            m = np.zeros(self.n, dtype=bool)  # type mismatch never matches
+        elif op in ("eq", "ne"):
+            m = col == value
+        else:
+            return {"gt": np.greater, "ge": np.greater_equal, "lt": np.less, "le": np.less_equal}[op](col, value)
+        return ~m if op == "ne" else m
+
+
+def _fragments(text: str, query: str, pre: str, post: str, width: int = 160, limit: int = 2) -> List[str]:
+    """Up to `limit` windows of `text` around query term matches, matches wrapped in pre/post tags."""
+    # Whole words first, then the BM25 terms (Hangul bigrams) so compounds still match
+    words = set(re.findall(r"[\w가-힣]+", query.lower())) | set(tokenize(query))
+    terms = sorted((t for t in words if len(t) >= 2), key=len, reverse=True)
+    if not terms or not text:
+        return []
+    pat = re.compile("|".join(re.escape(t) for t in terms), re.IGNORECASE)
+    out, end = [], -1
+    for m in pat.finditer(text):
+        if m.start() < end:
+            continue
+        lo = max(0, m.start() - width // 3)
+        end = min(len(text), lo + width)
+        out.append(pat.sub(lambda x: f"{pre}{x.group()}{post}", text[lo:end]).replace("\n", " "))
+        if len(out) >= limit:
+            break
+    return out
+
+
+# ---- BM25 ----
+
+class _BM25:
+    def __init__(self, texts: List[Optional[str]], k1: float = 1.2, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.n = len(texts)
+        postings: Dict[str, List[tuple]] = {}
+        lengths = np.zeros(self.n, dtype=np.float32)
+        for row, text in enumerate(texts):
+            if text is None:
+                continue
+            toks = tokenize(text)
+            lengths[row] = len(toks)
+            for t, tf in Counter(toks).items():
+                postings.setdefault(t, []).append((row, tf))
+        live = int((lengths > 0).sum()) or 1
+        avg = float(lengths.sum()) / live or 1.0
+        self.norm = k1 * (1 - b + b * lengths / avg)
+        self.postings = {t: (np.array([r for r, _ in p], dtype=np.int64), np.array([f for _, f in p], dtype=np.float32))
+                         for t, p in postings.items()}
+        self.live = live
+
+    def scores(self, query: str) -> np.ndarray:
+        out = np.zeros(self.n, dtype=np.float32)
+        for t in set(tokenize(query)):
+            p = self.postings.get(t)
+            if p is None:
+                continue
+            rows, tf = p
+            idf = math.log(1 + (self.live - len(rows) + 0.5) / (len(rows) + 0.5))
+            out[rows] += idf * tf * (self.k1 + 1) / (tf + self.norm[rows])
+        return out
+
+
+# ---- index ----
+
+class _Lock:
+    """Cross-process writer lock (exclusive-create lock file; stale after 60 s)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def __enter__(self):
+        deadline = time.time() + 30
+        while True:
+            try:
+                os.close(os.open(str(self.path), os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                return self
+            except FileExistsError:
+                try:
+                    if time.time() - self.path.stat().st_mtime > 60:
+                        self.path.unlink()
+                        continue
+                except FileNotFoundError:
+                    continue
+                if time.time() > deadline:
+                    raise TimeoutError(f"로컬 인덱스 잠금 대기 시간 초과: {self.path}")
+                time.sleep(0.05)
+
+    def __exit__(self, *exc):
+        try:
+            self.path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _vector_of(q) -> Optional[list]:
+    # RawVectorQuery(vector=, k=) or the older QueryVector(value=, k_nearest_neighbors=)
+    return getattr(q, "vector", None) if getattr(q, "vector", None) is not None else getattr(q, "value", None)
+
+
+class LocalSearchClient:
+    def __init__(self, folder: Path):
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+        self._meta = self.folder / "meta.jsonl"
+        self._lockfile = self.folder / "write.lock"
+        self._lock = threading.RLock()
+        self._reset()
+        self._refresh()
+
+    # -- state --
+
+    def _reset(self):
+        self.dims = 0
+        self._vectors_name: Optional[str] = None
+        self._offset = 0          # bytes of meta.jsonl applied
+        self._docs: List[Optional[dict]] = []   # per row; None = deleted/replaced
+        self._by_id: Dict[str, int] = {}
+        self._mm: Optional[np.ndarray] = None
+        self._derived = None      # (columns, live mask, BM25), rebuilt after changes
+
+    def _apply(self, rec: dict):
+        if rec.get("op") == "put":
+            row, doc = rec["row"], rec["doc"]
+            old = self._by_id.get(doc["id"])
+            if old is not None:
+                self._docs[old] = None
+            if row >= len(self._docs):
+                self._docs.extend([None] * (row + 1 - len(self._docs)))
+            self._docs[row] = doc
+            self._by_id[doc["id"]] = row
+        elif rec.get("op") == "del":
+            old = self._by_id.pop(rec["id"], None)
+            if old is not None:
+                self._docs[old] = None
+
+    def _refresh(self):
+        """Apply meta lines appended since the last call; reload everything after a compaction."""
+        with self._lock:
+            try:
+                size = self._meta.stat().st_size
+            except FileNotFoundError:
+                if self._vectors_name is not None:
+                    self._reset()
+                return
+            if size == self._offset:
+                return
+            with open(self._meta, "rb") as f:
+                header = json.loads(f.readline() or b"{}")
+                if header.get("vectors") != self._vectors_name or size < self._offset:
+                    self._reset()
+                    self.dims = int(header.get("dims", 0))
+                    self._vectors_name = header.get("vectors")
+                    self._offset = f.tell()
+                f.seek(self._offset)
+                data = f.read()
+            end = data.rfind(b"\n") + 1  # ignore a partially written last line
+            for line in data[:end].splitlines():
+                if line.strip():
+                    self._apply(json.loads(line))
+            self._offset += end
+            self._mm = None
+            self._derived = None
+
+    def _matrix(self) -> np.ndarray:
+        if self._mm is None:
+            rows = len(self._docs)
+            if not rows or not self._vectors_name:
+                self._mm = np.zeros((0, max(self.dims, 1)), dtype=np.float32)
+            else:
+                self._mm = np.memmap(self.folder / self._vectors_name, dtype=np.float32, mode="r",
+                                     shape=(rows, self.dims))
+        return self._mm
+
+    def _derive(self):
+        if self._derived is None:
+            cols = {c: self._column([d.get(c) if d else None for d in self._docs]) for c in _COLUMNS}
+            live = np.array([d is not None for d in self._docs], dtype=bool)
+            bm25 = _BM25([f"{d.get('title') or ''}\n{d.get('chunk') or ''}" if d else None for d in self._docs])
+            self._derived = (cols, live, bm25)
+        return self._derived
+
+    @staticmethod
+    def _column(values: list) -> np.ndarray:
+        # Numeric fields become float arrays (NaN = null), everything else strings ("" = null)
+        if all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in values):
+            return np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+    # -- SearchClient surface --
+
+    def get_document_count(self) -> int:
+        self._refresh()
+        return len(self._by_id)
+
+    def get_document(self, key: str, selected_fields: Optional[List[str]] = None) -> dict:
+        self._refresh()
+        row = self._by_id.get(key)
+        if row is None:
+            raise KeyError(key)
+        doc = self._docs[row]
+        return {k: v for k, v in doc.items() if not selected_fields or k in selected_fields}
+
+    def _append(self, vectors: Optional[np.ndarray], records: List[dict]):
+        with _Lock(self._lockfile):
+            self._refresh()
+            if not self.dims:
+                # Nothing was ever stored: deletes are no-ops, and the first put fixes dims in the header
+                # (a "dims": 0 header left by delete-only writes is replaced along with its del lines)
+                if vectors is None:
+                    return
+                self._vectors_name = f"vectors-{time.time_ns()}.f32"
+                self.dims = int(vectors.shape[1])
+                header = {"version": _VERSION, "dims": self.dims, "vectors": self._vectors_name}
+                self._meta.write_text(json.dumps(header) + "\n", encoding="utf-8")
+                self._offset = self._meta.stat().st_size
+            if vectors is not None and len(vectors):
+                path = self.folder / self._vectors_name
+                with open(path, "ab") as f:
+                    row0 = f.tell() // (4 * self.dims)
+                    f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+                for i, rec in enumerate(r for r in records if r["op"] == "put"):
+                    rec["row"] = row0 + i
+            with open(self._meta, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records))
+        self._refresh()
+
+    def upload_documents(self, documents: Iterable[dict]):
+        docs = list(documents)
+        if not docs:
+            return []
+        dims = self.dims or len(docs[0].get("contentVector") or [])
+        if not dims:
+            raise ValueError("로컬 인덱스: 첫 문서에 contentVector가 필요합니다")
+        vecs = np.zeros((len(docs), dims), dtype=np.float32)
+        records = []
+        for i, d in enumerate(docs):
+            v = d.get("contentVector")
+            if v is not None:
+                if len(v) != dims:
+                    raise ValueError(f"로컬 인덱스 차원 불일치: {len(v)} != {dims} (EMBED_DIMENSIONS 변경 시 인덱스 폴더 삭제 후 재색인)")
+                vecs[i] = v
+            records.append({"op": "put", "doc": {k: val for k, val in d.items() if k != "contentVector"}})
+        self._append(vecs, records)
+        return [SimpleNamespace(key=d["id"], succeeded=True, status_code=201, error_message=None) for d in docs]
+
+    merge_or_upload_documents = upload_documents
+
+    def delete_documents(self, documents: Iterable[dict]):
+        docs = list(documents)
+        if docs:
+            self._append(None, [{"op": "del", "id": d["id"]} for d in docs])
+        return [SimpleNamespace(key=d["id"], succeeded=True, status_code=200, error_message=None) for d in docs]
+
+    def compact(self):
+        """Rewrite live rows into a fresh vectors file and log; readers reload on their next search."""
+        with _Lock(self._lockfile):
+            self._refresh()
+            rows = [r for r, d in enumerate(self._docs) if d is not None]
+            name = f"vectors-{time.time_ns()}.f32"
+            mm = self._matrix()
+            with open(self.folder / name, "wb") as f:
+                for i in range(0, len(rows), 4096):
+                    f.write(np.ascontiguousarray(mm[rows[i:i + 4096]], dtype=np.float32).tobytes())
+            tmp = self._meta.with_suffix(".tmp")
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"version": _VERSION, "dims": self.dims, "vectors": name}) + "\n")
+                for new_row, r in enumerate(rows):
+                    f.write(json.dumps({"op": "put", "row": new_row, "doc": self._docs[r]}, ensure_ascii=False) + "\n")
+            old = self._vectors_name
+            self._mm = None
+            os.replace(tmp, self._meta)
+        self._offset = 0
+        self._refresh()
+        try:
+            if old and old != name:
+                (self.folder / old).unlink()
+        except OSError:
+            pass  # still mapped by another process (Windows); removed by the next compaction
+        for p in self.folder.glob("vectors-*.f32"):
+            if p.name != name:
+                try:
+                    p.unlink()
+                except OSError:
+                    pass
+
+    def search(self, search_text: Optional[str] = None, vector_queries=None, vectors=None, top: int = 50,
+               filter: Optional[str] = None, select: Optional[List[str]] = None, highlight_fields: Optional[str] = None,
+               highlight_pre_tag: str = "<em>", highlight_post_tag: str = "</em>", **_ignored) -> List[dict]:
+        """Vector (exact cosine over the mapped matrix) and BM25 rankings fused with RRF.
+        Without either ("*"), returns the rows matching `filter`."""
+        self._refresh()
+        with self._lock:
+            cols, live, bm25 = self._derive()
+            mm = self._matrix()
+            n = len(self._docs)
+            allowed = live.copy()
+            if filter:
+                allowed &= _Filter(filter, cols, n).parse()
+            if not allowed.any():
+                return []
+            fused = np.zeros(n, dtype=np.float64)
+            # The scan is memory-bound (rows x dims x 4 bytes); selective filters only touch their rows
+            rows = np.flatnonzero(allowed) if allowed.sum() * 2 < n else None
+            for vq in (vector_queries or vectors or []):
+                q = np.asarray(_vector_of(vq), dtype=np.float32)
+                k = int(getattr(vq, "k", None) or getattr(vq, "k_nearest_neighbors", None) or top)
+                if rows is None:
+                    sims = np.where(allowed, mm @ q, -np.inf)
+                else:
+                    sims = np.full(n, -np.inf, dtype=np.float32)
+                    sims[rows] = mm[rows] @ q
+                self._rrf(fused, sims, k)
+            keyword = bool(search_text and search_text.strip() not in ("", "*"))
+            if keyword:
+                kw = bm25.scores(search_text)
+                kw[~allowed] = 0.0
+                self._rrf(fused, np.where(kw > 0, kw, -np.inf), max(top * 3, 20))
+            if not keyword and not (vector_queries or vectors):
+                fused[allowed] = 1.0
+            order = np.argsort(-fused, kind="stable")[:top]
+            hits = []
+            for r in order:
+                if fused[r] <= 0:
+                    break
+                doc = self._docs[r]
+                h = {k: doc.get(k) for k in select} if select else dict(doc)
+                h["@search.score"] = float(fused[r])
+                if highlight_fields and keyword:
+                    tags = (highlight_pre_tag, highlight_post_tag)
+                    h["@search.highlights"] = {f: frags for f in highlight_fields.split(",")
+                                               if (frags := _fragments(doc.get(f.strip()) or "", search_text, *tags))}
+                hits.append(h)
+            return hits
+
+    @staticmethod
+    def _rrf(fused: np.ndarray, scores: np.ndarray, k: int):
+        k = min(k, int(np.isfinite(scores).sum()))
+        if k <= 0:
+            return
+        idx = np.argpartition(-scores, k - 1)[:k]
+        idx = idx[np.argsort(-scores[idx], kind="stable")]
+        fused[idx] += 1.0 / (RRF_K + np.arange(1, k + 1))
+
+
+class AsyncLocalSearchClient:
+    """`azure.search.documents.aio`-shaped wrapper; local searches take milliseconds, so they run inline."""
+
+    def __init__(self, client: LocalSearchClient):
+        self._client = client
+
+    async def search(self, **kwargs):
+        hits = self._client.search(**kwargs)
+
+        async def gen():
+            for h in hits:
+                yield h
+        return gen()
+
+
+_clients: Dict[str, LocalSearchClient] = {}
+_clients_lock = threading.Lock()
+
+
+def local_client(index_name: str) -> LocalSearchClient:
+    """Process-wide client for `index_name` under LOCAL_INDEX_DIR."""
+    with _clients_lock:
+        if index_name not in _clients:
+            d = os.getenv("LOCAL_INDEX_DIR", f".cache/local-index-{index_name}")
+            _clients[index_name] = LocalSearchClient(Path(d) if Path(d).is_absolute() else _ROOT / d)
+        return _clients[index_name]
+
@@ -0,0 +1,113 @@
+"""
+Micro-benchmark: legacy simple_chunks vs streaming stream_chunks.
+
+Usage:
+  python scripts/bench_chunker.py            # 1, 8, 32 MB synthetic documents
+  python scripts/bench_chunker.py --mb 64    # custom size(s)
+
+Reports best-of-3 wall time and peak traced memory (tracemalloc, separate pass)
+for each chunker, and checks the chunk texts are identical (synthetic paragraphs
+stay under max_len). Peak memory excludes the input pages, which both share.
+"""
+import re
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from ingest.chunker import stream_chunks
+
+
+def legacy_simple_chunks(text: str, max_len=900, overlap=220):
+    # Copy of the pre-streaming implementation (string concatenation + full regex split)
+    paras = [p.strip() for p in re.split(r"\n\s*\n", text) if p.strip()]
+    out, buf = [], ""
+    for p in paras:
+        if len(buf)+len(p)+1 <= max_len: buf = (buf+"\n\n"+p).strip()
+        else:
+            if buf: out.append(buf)
+            keep = buf[-overlap:] if len(buf)>overlap else ""
+            buf = (keep+"\n\n"+p).strip()
+    if buf: out.append(buf)
+    return out
+
+
+def make_pages(mb: int, seed: int = 7):
+    rnd = random.Random(seed)
+    words = ["쿠버네티스", "클러스터", "배포", "파이프라인", "monitoring", "Helm", "정책", "보안", "서비스", "로드밸런서"]
+    target = mb * 1024 * 1024
+    pages, size, page = [], 0, 1
+    while size < target:
+        paras = []
+        for _ in range(rnd.randint(4, 12)):
+            paras.append(" ".join(rnd.choice(words) for _ in range(rnd.randint(5, 60))))
+        t = "\n\n".join(paras)
+        pages.append((page, t))
+        size += len(t.encode("utf-8"))
+        page += 1
+    return pages
+
+
+def timed(fn, repeat: int = 3):
+    best, out = float("inf"), None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        best = min(best, time.perf_counter() - t0)
+    return out, best
+
+
+def peak_mb(fn) -> float:
+    # Separate pass: tracemalloc slows Python-level code too much to time under it
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1e6
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--mb", type=int, nargs="*", default=[1, 8, 32])
+    ap.add_argument("--max-len", type=int, default=1200)
+    ap.add_argument("--overlap", type=int, default=150)
+    args = ap.parse_args()
+
+    print(f"{'MB':>4} {'chunker':<22} {'chunks':>8} {'time(s)':>8} {'peak MB':>8}")
+    for mb in args.mb:
+        pages = make_pages(mb)
+
+        def legacy():
+            # What ingest_local used to do: build full_text with += then chunk it
+            full_text = ""
+            for i, t in pages:
+                full_text += f"\n\n{t}"
+            return legacy_simple_chunks(full_text, args.max_len, args.overlap)
+
+        def streaming():
+            return [c.text for c in stream_chunks(iter(pages), args.max_len, args.overlap)]
+
+        def streaming_consumed():
+            # Chunks handed downstream one at a time (nothing retained)
+            n = 0
+            for c in stream_chunks(iter(pages), args.max_len, args.overlap):
+                n += 1
+            return n
+
+        a, ta = timed(legacy)
+        b, tb = timed(streaming)
+        _, tc = timed(streaming_consumed)
+        print(f"{mb:>4} {'legacy':<22} {len(a):>8} {ta:>8.2f} {peak_mb(legacy):>8.1f}")
+        print(f"{mb:>4} {'stream_chunks (list)':<22} {len(b):>8} {tb:>8.2f} {peak_mb(streaming):>8.1f}")
+        print(f"{mb:>4} {'stream_chunks (iter)':<22} {len(b):>8} {tc:>8.2f} {peak_mb(streaming_consumed):>8.1f}")
+        print(f"     identical={a == b}")
+
+
+if __name__ == "__main__":
+    main()
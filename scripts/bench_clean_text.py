@@ -0,0 +1,149 @@
+"""
+Benchmark: reference clean_text vs the table-driven ingest.extract.clean_text.
+
+Usage:
+  python scripts/bench_clean_text.py               # ia_data documents + 50 MB synthetic text
+  python scripts/bench_clean_text.py --mb 10 --rounds 5
+  python scripts/bench_clean_text.py --fuzz 50000  # more randomized equivalence cases
+
+Prints a pytest-benchmark style table (min/mean/max over rounds, MB/s, speedup)
+and fails if any output differs from the reference implementation.
+"""
+import re
+import sys
+import time
+import random
+import argparse
+import statistics
+import unicodedata
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from ingest.extract import clean_text, read_docx_text, read_txt_text
+
+
+def reference_clean_text(text: str) -> str:
+    # Copy of the original per-character implementation
+    t = unicodedata.normalize("NFKC", text)
+    t = "".join(ch for ch in t if (ch in "\n\t" or unicodedata.category(ch)[0] != "C"))
+    t = t.replace("\xa0", " ").replace("\u200b", " ")
+    t = re.sub(r"[\ufffd]+", " ", t)
+    t = re.sub(r"([\-=_*#~])\1{3,}", r"\1\1", t)
+    t = re.sub(r"[ \t]+", " ", t)
+    t = re.sub(r"(\w)-\n(\w)", r"\1\2", t)
+    t = re.sub(r"(?<!\n)\n(?!\n)", " ", t)
+    return t
+
+
+def raw_text(path: Path) -> str:
+    """Uncleaned extraction, i.e. what clean_text receives during ingest."""
+    ext = path.suffix.lower()
+    if ext == ".docx":
+        return read_docx_text(path)
+    if ext == ".pdf":
+        from pypdf import PdfReader
+        return "\n\n".join((p.extract_text() or "") for p in PdfReader(str(path)).pages)
+    return read_txt_text(path)
+
+
+def corpus_texts(folder: Path):
+    out = []
+    for p in sorted(folder.rglob("*")):
+        if p.suffix.lower() in (".pdf", ".docx", ".txt") and p.is_file():
+            try:
+                out.append((p.name, raw_text(p)))
+            except Exception as e:
+                print(f"skip {p.name}: {e}")
+    return out
+
+
+def synthetic_text(mb: int, seed: int = 11) -> str:
+    # Korean/English prose with the artifacts extractors produce: line-wrapped
+    # paragraphs, hyphenated breaks, tabs, NBSP/zero-width/control chars,
+    # replacement chars, ruler lines, ligatures and full-width forms.
+    rnd = random.Random(seed)
+    words = ["내부감사", "점검", "결과", "보고서", "통제", "위험", "개선", "권고", "Kubernetes", "policy",
+             "deploy-", "ment", "\ufb02ow", "\uff21\uff22\uff23", "2024년", "1.", "(주)", "표", "값", "항목"]
+    noise = ["\t", "\xa0", "\u200b", "\x0c", "\r", "\ufffd", "----------", "=====", " ", "  ", "\U0001F4C4"]
+    target = mb * 1024 * 1024
+    parts, size = [], 0
+    while size < target:
+        lines = []
+        for _ in range(rnd.randint(2, 8)):
+            ws = [rnd.choice(words) for _ in range(rnd.randint(4, 16))]
+            if rnd.random() < 0.3:
+                ws.insert(rnd.randrange(len(ws)), rnd.choice(noise))
+            line = " ".join(ws)
+            if rnd.random() < 0.15:
+                line += "-"
+            lines.append(line)
+        para = "\n".join(lines)
+        parts.append(para)
+        size += len(para.encode("utf-8")) + 2
+    return "\n\n".join(parts)
+
+
+def fuzz(n: int, seed: int = 3) -> int:
+    rnd = random.Random(seed)
+    alphabet = list("ab가나 -\n\t=_*#~.,") + ["\x00", "\x0c", "\r", "\xa0", "\u200b", "\u00ad", "\ufffd", "\ufb02",
+                                             "\uff21", "\u3000", "\ue000", "\U0001F600", "\U000E0001", "\U0010FFFF"]
+    bad = 0
+    for _ in range(n):
+        s = "".join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 80)))
+        if reference_clean_text(s) != clean_text(s):
+            bad += 1
+            if bad <= 3:
+                print(f"mismatch: {s!r}")
+    return bad
+
+
+def bench(fn, texts, rounds: int):
+    times = []
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        for t in texts:
+            fn(t)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def main():
+    ap = argparse.ArgumentParser(description="clean_text benchmark")
+    ap.add_argument("--data", default=str(PROJECT_ROOT / "ia_data"))
+    ap.add_argument("--mb", type=int, default=50)
+    ap.add_argument("--rounds", type=int, default=3)
+    ap.add_argument("--fuzz", type=int, default=20000)
+    args = ap.parse_args()
+
+    clean_text("warm-up")  # builds the control-character table once
+    bad = fuzz(args.fuzz)
+    print(f"fuzz: {args.fuzz} cases, {bad} mismatches")
+
+    suites = []
+    docs = corpus_texts(Path(args.data))
+    if docs:
+        suites.append((f"ia_data ({len(docs)} docs)", [t for _, t in docs]))
+    suites.append((f"synthetic {args.mb} MB", [synthetic_text(args.mb)]))
+
+    print(f"\n{'suite':<24} {'impl':<10} {'min(s)':>8} {'mean(s)':>8} {'max(s)':>8} {'MB/s':>8} {'speedup':>8}")
+    ok = bad == 0
+    for name, texts in suites:
+        mb = sum(len(t.encode("utf-8")) for t in texts) / 1e6
+        same = all(reference_clean_text(t) == clean_text(t) for t in texts)
+        ok = ok and same
+        ref = bench(reference_clean_text, texts, args.rounds)
+        new = bench(clean_text, texts, args.rounds)
+        for impl, ts in (("reference", ref), ("table", new)):
+            speed = f"{min(ref) / min(ts):.1f}x" if impl == "table" else ""
+            print(f"{name:<24} {impl:<10} {min(ts):>8.3f} {statistics.mean(ts):>8.3f} {max(ts):>8.3f} "
+                  f"{mb / min(ts):>8.1f} {speed:>8}")
+        print(f"{'':<24} identical={same}")
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
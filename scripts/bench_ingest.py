@@ -0,0 +1,273 @@
+"""
+Offline ingest benchmark: runs ingest_local on a synthetic corpus with local
+stand-ins for Azure OpenAI (embeddings) and Azure AI Search (chunk uploads).
+
+Usage:
+  python scripts/bench_ingest.py                                  # 20 PDF + 20 DOCX + 20 TXT, 8 pages each
+  python scripts/bench_ingest.py --pdf 50 --docx 0 --txt 0 --pages 40
+  python scripts/bench_ingest.py --embed-latency-ms 0 --search-latency-ms 0   # CPU stages only
+  python scripts/bench_ingest.py --json bench.json                # machine-readable result for CI
+
+No Azure resources or .env are needed. `aoai` and `search_chunks` in
+ingest/build_chunks.py (and the bulk uploader's client) are replaced by
+deterministic fakes that sleep for the configured latency. The embedding cache
+is off so every run does the same work. Reports per-stage timings, docs/sec,
+chunks/sec and peak RSS (main process and pool workers).
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import hashlib
+import zipfile
+import argparse
+import resource
+import tempfile
+import threading
+from pathlib import Path
+from types import SimpleNamespace
+from xml.sax.saxutils import escape
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+_WORDS = ["내부감사", "점검", "결과", "보고서", "통제", "위험", "개선", "권고", "쿠버네티스", "클러스터", "배포",
+          "파이프라인", "보안", "정책", "서비스", "운영", "Kubernetes", "Helm", "monitoring", "pipeline", "2024년"]
+
+
+# ---- synthetic corpus ----
+
+def _paragraphs(rnd: random.Random, n: int):
+    for _ in range(n):
+        yield " ".join(rnd.choice(_WORDS) for _ in range(rnd.randint(20, 90))) + "."
+
+
+def _write_txt(path: Path, rnd: random.Random, pages: int):
+    path.write_text("\n\n".join(_paragraphs(rnd, pages * 6)), encoding="utf-8")
+
+
+def _write_docx(path: Path, rnd: random.Random, pages: int):
+    paras = list(_paragraphs(rnd, pages * 6))
+    try:
+        import docx  # python-docx writes a complete package
+        d = docx.Document()
+        for i, p in enumerate(paras):
+            d.add_paragraph(p)
+            if i % 12 == 11:
+                t = d.add_table(rows=3, cols=3)
+                for r in range(3):
+                    for c in range(3):
+                        t.cell(r, c).text = rnd.choice(_WORDS)
+        d.save(str(path))
+        return
+    except ImportError:
+        pass
+    # Minimal package: enough for the streaming extractor
+    body = "".join(f"<w:p><w:r><w:t>{escape(p)}</w:t></w:r></w:p>" for p in paras)
+    doc = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+           '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+           f"<w:body>{body}</w:body></w:document>")
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("word/document.xml", doc)
+
+
+def _write_pdf(path: Path, rnd: random.Random, pages: int):
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+    try:
+        pdfmetrics.registerFont(UnicodeCIDFont("HYSMyeongJo-Medium"))
+        font = "HYSMyeongJo-Medium"
+    except Exception:
+        font = "Helvetica"
+    c = canvas.Canvas(str(path), pagesize=A4)
+    _, height = A4
+    for _ in range(pages):
+        c.setFont(font, 10)
+        y = height - 50
+        for p in _paragraphs(rnd, 6):
+            words, line = p.split(), ""
+            for w in words:
+                if len(line) + len(w) > 60:
+                    c.drawString(40, y, line); y -= 14; line = ""
+                line = f"{line} {w}".strip()
+            if line:
+                c.drawString(40, y, line); y -= 14
+            y -= 10
+            if y < 60:
+                break
+        c.showPage()
+    c.save()
+
+
+def make_corpus(folder: Path, n_pdf: int, n_docx: int, n_txt: int, pages: int, seed: int = 7) -> dict:
+    folder.mkdir(parents=True, exist_ok=True)
+    rnd = random.Random(seed)
+    for kind, n, write in (("pdf", n_pdf, _write_pdf), ("docx", n_docx, _write_docx), ("txt", n_txt, _write_txt)):
+        for i in range(n):
+            write(folder / f"bench_{kind}_{i:04d}.{kind}", rnd, pages)
+    files = [p for p in folder.iterdir() if p.is_file()]
+    return {"pdf": n_pdf, "docx": n_docx, "txt": n_txt, "pages_per_doc": pages,
+            "bytes": sum(p.stat().st_size for p in files)}
+
+
+# ---- fakes ----
+
+class FakeEmbeddings:
+    def __init__(self, dims: int, latency_ms: float, per_item_ms: float):
+        self.dims = dims
+        self.latency = latency_ms / 1000.0
+        self.per_item = per_item_ms / 1000.0
+        self.requests = 0
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def create(self, model=None, input=None, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        with self._lock:
+            self.requests += 1
+            self.items += len(texts)
+        time.sleep(self.latency + self.per_item * len(texts))
+        dims = kwargs.get("dimensions") or self.dims  # EMBED_DIMENSIONS
+        data = []
+        for t in texts:
+            seed = int.from_bytes(hashlib.sha256(t.encode("utf-8")).digest()[:8], "little")
+            r = random.Random(seed)
+            data.append(SimpleNamespace(embedding=[r.uniform(-1, 1) for _ in range(dims)]))
+        return SimpleNamespace(data=data)
+
+
+class FakeAzureOpenAI:
+    def __init__(self, embeddings: FakeEmbeddings):
+        self.embeddings = embeddings
+
+    def with_options(self, **kwargs):
+        return self
+
+
+class FakeSearchClient:
+    """upload_documents/delete_documents with per-request latency; every document succeeds."""
+
+    def __init__(self, latency_ms: float):
+        self.latency = latency_ms / 1000.0
+        self.docs = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def _ack(self, docs):
+        with self._lock:
+            self.requests += 1
+        time.sleep(self.latency)
+        return [SimpleNamespace(key=d["id"], succeeded=True, status_code=201, error_message=None) for d in docs]
+
+    def upload_documents(self, documents):
+        with self._lock:
+            self.docs += len(documents)
+        return self._ack(documents)
+
+    def delete_documents(self, documents):
+        return self._ack(documents)
+
+
+def _peak_rss_mb():
+    # ru_maxrss is KiB on Linux; children = reaped pool workers (largest one)
+    self_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return self_kb / 1024.0, child_kb / 1024.0
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Offline ingest benchmark with fake Azure OpenAI/Search")
+    ap.add_argument("--pdf", type=int, default=20)
+    ap.add_argument("--docx", type=int, default=20)
+    ap.add_argument("--txt", type=int, default=20)
+    ap.add_argument("--pages", type=int, default=8, help="pages (PDF) or page-equivalents (DOCX/TXT) per document")
+    ap.add_argument("--dims", type=int, default=1536, help="fake embedding dimensions")
+    ap.add_argument("--embed-latency-ms", type=float, default=80.0, help="per embeddings request")
+    ap.add_argument("--embed-item-ms", type=float, default=0.5, help="extra per input text")
+    ap.add_argument("--search-latency-ms", type=float, default=40.0, help="per upload/delete request")
+    ap.add_argument("--workers", type=int, default=None, help="INGEST_WORKERS (default: CPU count)")
+    ap.add_argument("--workdir", default=None, help="corpus/state directory (default: temporary, removed after)")
+    ap.add_argument("--seed", type=int, default=7)
+    ap.add_argument("--json", default=None, help="write the result as JSON to this path")
+    args = ap.parse_args()
+
+    tmp = Path(args.workdir) if args.workdir else Path(tempfile.mkdtemp(prefix="bench-ingest-"))
+    data = tmp / "data"
+    try:
+        if data.exists():
+            shutil.rmtree(data)
+        t0 = time.perf_counter()
+        corpus = make_corpus(data, args.pdf, args.docx, args.txt, args.pages, args.seed)
+        print(f"corpus: {corpus} ({time.perf_counter() - t0:.1f}s to generate) in {data}")
+
+        # Isolated state; placeholder endpoints so module-level clients can be constructed
+        os.environ.update({
+            "DATA_DIR": str(data),
+            "INGEST_MANIFEST": str(tmp / "manifest.json"),
+            "DEDUP_INDEX": str(tmp / "dedup.sqlite"),
+            "INDEX_GENERATION_DIR": str(tmp),  # a running app's search cache must not see the fake writes
+            "EMBED_CACHE": "off",
+        })
+        if args.workers:
+            os.environ["INGEST_WORKERS"] = str(args.workers)
+        for k, v in (("SEARCH_ENDPOINT", "https://bench.invalid"), ("SEARCH_API_KEY", "bench"),
+                     ("AZURE_OPENAI_ENDPOINT", "https://bench.invalid"), ("AZURE_OPENAI_API_KEY", "bench"),
+                     ("AZURE_OPENAI_API_VERSION", "2024-02-01"), ("AZURE_OPENAI_EMBED_DEPLOYMENT", "bench-embed")):
+            os.environ.setdefault(k, v)
+
+        import ingest.build_chunks as bc
+        emb = FakeEmbeddings(args.dims, args.embed_latency_ms, args.embed_item_ms)
+        search = FakeSearchClient(args.search_latency_ms)
+        bc.aoai = FakeAzureOpenAI(emb)
+        bc.search_chunks = search
+        bc._uploader.client = search
+
+        t0 = time.perf_counter()
+        out = bc.ingest_local(force=True)
+        wall = time.perf_counter() - t0
+        rss_self, rss_child = _peak_rss_mb()
+    finally:
+        if not args.workdir:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    pipe, stats = out["pipeline"], out["stats"]
+    docs = stats["changed"]
+    chunks = stats["embedded"] + stats["kept"] + stats["linked"]
+    stages = {}
+    for st in pipe.stages:
+        s = st.stats
+        stages[s.name] = {"items": s.items_in, "errors": s.errors, "busy_s": round(s.busy, 3),
+                          "span_s": round(s.span, 3), "units": s.units, "unit": s.unit_name}
+    result = {
+        "corpus": corpus,
+        "fakes": {"dims": args.dims, "embed_latency_ms": args.embed_latency_ms, "embed_item_ms": args.embed_item_ms,
+                  "search_latency_ms": args.search_latency_ms},
+        "wall_s": round(wall, 3),
+        "docs": docs,
+        "chunks": chunks,
+        "docs_per_s": round(docs / wall, 2) if wall else 0.0,
+        "chunks_per_s": round(chunks / wall, 2) if wall else 0.0,
+        "embed_requests": emb.requests,
+        "upload_requests": search.requests,
+        "peak_rss_mb": {"main": round(rss_self, 1), "workers": round(rss_child, 1)},
+        "stages": stages,
+    }
+
+    print()
+    print(f"{'stage':<8} {'items':>6} {'busy(s)':>8} {'span(s)':>8}  units")
+    for name, s in stages.items():
+        print(f"{name:<8} {s['items']:>6} {s['busy_s']:>8.2f} {s['span_s']:>8.2f}  {s['units']} {s['unit']}")
+    print(f"wall {wall:.2f}s  docs/s {result['docs_per_s']}  chunks/s {result['chunks_per_s']}  "
+          f"peak RSS main {rss_self:.0f} MB, workers {rss_child:.0f} MB  "
+          f"embed requests {emb.requests}, upload requests {search.requests}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(result, ensure_ascii=False, indent=1), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
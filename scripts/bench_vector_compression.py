@@ -0,0 +1,190 @@
+"""
+Recall vs. size for shortened embeddings and quantized vector storage.
+
+Usage:
+  python scripts/bench_vector_compression.py                       # ia_data chunks, AOAI embeddings (cached)
+  python scripts/bench_vector_compression.py --dims 3072 1024 512 --oversampling 1 4 10
+  python scripts/bench_vector_compression.py --queries queries.txt # real questions, one per line
+  python scripts/bench_vector_compression.py --fake 20000          # synthetic vectors, no AOAI (smoke run)
+
+Embeds the corpus once at full width and simulates each option locally:
+shortened vectors (prefix + renormalize, what `dimensions` returns for
+text-embedding-3 models), int8 scalar and 1-bit binary quantization with
+oversampled candidates rescored on the original vectors (VECTOR_RESCORE). Recall@k
+is measured against exact full-width cosine search. Sizes are per vector: "index"
+is what the HNSW graph holds in memory (the vector quota), "storage" adds the
+full-precision originals of compressed fields and the retrievable copy
+(VECTOR_STORED=true).
+Without --queries, held-out chunks are the queries.
+"""
+import sys
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+
+def corpus_chunks(folder: Path):
+    from ingest.extract import extract_item, clean_item, chunk_item
+    kinds = {".pdf": "PDF", ".docx": "DOCX", ".txt": "TXT"}
+    out = []
+    for p in sorted(folder.rglob("*")):
+        kind = kinds.get(p.suffix.lower())
+        if not kind or not p.is_file():
+            continue
+        try:
+            item = chunk_item(clean_item(extract_item({"path": str(p), "kind": kind, "doc_id": p.stem})))
+            out.extend(item["parts"])
+        except Exception as e:
+            print(f"skip {p.name}: {e}")
+    return out
+
+
+def aoai_embed(texts):
+    # Full-width vectors; shortened widths are derived locally
+    import os
+    from dotenv import load_dotenv
+    from openai import AzureOpenAI
+    from rag.embed_cache import cached_embeddings
+    load_dotenv()
+    deploy = os.getenv("AZURE_OPENAI_EMBED_DEPLOYMENT")
+    client = AzureOpenAI(azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"), api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                         api_version=os.getenv("AZURE_OPENAI_API_VERSION"))
+
+    def fetch(batch):
+        vecs = []
+        for i in range(0, len(batch), 64):
+            resp = client.embeddings.create(model=deploy, input=batch[i:i + 64])
+            vecs.extend(d.embedding for d in resp.data)
+        return vecs
+
+    return np.asarray(cached_embeddings(deploy, texts, fetch), dtype=np.float32)
+
+
+def fake_vectors(n: int, dims: int, seed: int = 5):
+    # Clustered vectors with variance decaying over the dimensions, roughly like
+    # Matryoshka-trained embeddings (leading dimensions carry most of the signal)
+    rng = np.random.default_rng(seed)
+    scale = (1.0 / np.sqrt(1.0 + np.arange(dims) / 64.0)).astype(np.float32)
+    centers = rng.standard_normal((max(8, n // 50), dims)).astype(np.float32) * scale
+    x = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.standard_normal((n, dims)).astype(np.float32) * scale
+    return x
+
+
+def normalize(x):
+    return x / np.maximum(np.linalg.norm(x, axis=1, keepdims=True), 1e-12)
+
+
+def topk(scores, k):
+    idx = np.argpartition(-scores, min(k, scores.shape[1] - 1), axis=1)[:, :k]
+    order = np.take_along_axis(scores, idx, axis=1).argsort(axis=1)[:, ::-1]
+    return np.take_along_axis(idx, order, axis=1)
+
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def scalar_quantize(x, lo, hi):
+    step = np.maximum(hi - lo, 1e-12) / 255.0
+    return (np.clip(np.rint((x - lo) / step), 0, 255) - 128).astype(np.int8), step
+
+
+def compress(kind, docs):
+    """Index-side representation: dequantized int8 values (scalar) or packed sign bits (binary)."""
+    if kind == "scalar":
+        lo, hi = docs.min(axis=0), docs.max(axis=0)
+        q8, step = scalar_quantize(docs, lo, hi)
+        return (q8.astype(np.float32) + 128) * step + lo
+    if kind == "binary":
+        return np.packbits(docs > 0, axis=1)
+    return docs
+
+
+def search(kind, docs, queries, k, oversampling, compressed=None):
+    """Top-k ids per query. Quantized kinds rank candidates on the
+    compressed vectors, then rescore k*oversampling of them on the originals."""
+    if kind == "float32":
+        return topk(queries @ docs.T, k)
+    n_cand = max(k, int(round(k * oversampling)))
+    if kind == "scalar":
+        cand = topk(queries @ compressed.T, n_cand)
+    else:
+        qbits = np.packbits(queries > 0, axis=1)
+        ham = np.stack([_POPCOUNT[qb ^ compressed].sum(axis=1, dtype=np.int32) for qb in qbits])
+        cand = topk(-ham.astype(np.float32), n_cand)
+    if oversampling <= 1:
+        return cand[:, :k]
+    exact = np.einsum("qd,qcd->qc", queries, docs[cand])
+    return np.take_along_axis(cand, topk(exact, k), axis=1)
+
+
+def recall(found, truth):
+    return float(np.mean([len(set(f) & set(t)) / len(t) for f, t in zip(found, truth)]))
+
+
+def sizes(kind, d, stored=True):
+    # Compressed fields keep the full-precision originals on disk (used for rescoring)
+    index = {"float32": 4 * d, "scalar": d, "binary": (d + 7) // 8}[kind]
+    storage = index + (4 * d if kind != "float32" else 0) + (4 * d if stored else 0)
+    return index, storage
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Recall vs. size for embedding width and vector quantization")
+    ap.add_argument("--data", default=str(PROJECT_ROOT / "ia_data"))
+    ap.add_argument("--queries", default=None, help="text file, one query per line (default: held-out chunks)")
+    ap.add_argument("--n-queries", type=int, default=100)
+    ap.add_argument("--k", type=int, default=8, help="top-k as in hybrid_search")
+    ap.add_argument("--dims", type=int, nargs="+", default=[3072, 1536, 1024, 512, 256])
+    ap.add_argument("--oversampling", type=float, nargs="+", default=[1, 4, 10], help="1 = no rescoring")
+    ap.add_argument("--fake", type=int, default=0, help="use N synthetic vectors instead of AOAI embeddings")
+    ap.add_argument("--seed", type=int, default=13)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    if args.fake:
+        allv = fake_vectors(args.fake + args.n_queries, max(args.dims), args.seed)
+        q_idx = set(rnd.sample(range(len(allv)), args.n_queries))
+        full_q = allv[sorted(q_idx)]
+        full_d = allv[[i for i in range(len(allv)) if i not in q_idx]]
+    else:
+        chunks = corpus_chunks(Path(args.data))
+        if args.queries:
+            qs = [l.strip() for l in Path(args.queries).read_text(encoding="utf-8").splitlines() if l.strip()]
+            docs = chunks
+        else:
+            q_idx = set(rnd.sample(range(len(chunks)), min(args.n_queries, len(chunks) // 5)))
+            qs = [chunks[i] for i in sorted(q_idx)]
+            docs = [c for i, c in enumerate(chunks) if i not in q_idx]
+        print(f"embedding {len(docs)} chunks + {len(qs)} queries")
+        full_d, full_q = aoai_embed(docs), aoai_embed(qs)
+
+    full = full_d.shape[1]
+    dims = sorted({d for d in args.dims if d <= full}, reverse=True)
+    k = min(args.k, len(full_d))
+    truth = search("float32", normalize(full_d), normalize(full_q), k, 1)
+    base_index = 4 * full
+    print(f"{len(full_d)} vectors, {len(full_q)} queries, full width {full}, recall@{k} vs exact full-width search\n")
+    print(f"{'dims':>5} {'type':<8} {'oversample':>10} {'recall':>7} {'index B':>8} {'storage B':>9} "
+          f"{'docs x':>7}")
+    for d in dims:
+        docs_d, q_d = normalize(full_d[:, :d]), normalize(full_q[:, :d])
+        for kind in ("float32", "scalar", "binary"):
+            comp = compress(kind, docs_d)
+            for os_ in ([1] if kind == "float32" else args.oversampling):
+                ids = search(kind, docs_d, q_d, k, os_, comp)
+                index, storage = sizes(kind, d)
+                print(f"{d:>5} {kind:<8} {('-' if kind == 'float32' else f'{os_:g}'):>10} {recall(ids, truth):>7.3f} "
+                      f"{index:>8} {storage:>9} {base_index / index:>6.1f}x")
+    print("\nindex B: bytes/vector held by the vector index (quota); storage B: adds the full-precision originals of "
+          "compressed fields and the retrievable copy (VECTOR_STORED=true); docs x: vectors per unit of vector quota vs full-width float32. "
+          "Query latency depends on the service's HNSW graph; measure it against the rebuilt index.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Shared client check: one request through each client of rag/clients.py against a local stub server.
+
+Usage:
+  python scripts/check_clients.py
+
+Starts an HTTP/1.1 server on 127.0.0.1 that answers chat completions and document
+counts, then calls it twice with the sync/async Azure OpenAI and Azure AI Search
+clients (httpx, requests and aiohttp transports, including the connection trace
+hooks). A second event loop then checks that async search clients of the first (closed)
+loop are dropped from the registry. Prints pool_stats() and exits 1 when a client fails,
+reuses no connection or a closed loop's client is kept.
+"""
+import sys
+import json
+import asyncio
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from rag import clients
+
+_COMPLETION = {
+    "id": "chk", "object": "chat.completion", "created": 0, "model": "chk",
+    "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "ok"}}],
+}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so reuse shows up in pool_stats
+
+    def _reply(self, body: bytes):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply(b"0")  # /indexes('x')/docs/$count
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self._reply(json.dumps(_COMPLETION).encode())
+
+    def log_message(self, *args):
+        pass
+
+
+def _chat(client):
+    return client.chat.completions.create(model="chk", messages=[{"role": "user", "content": "ping"}])
+
+
+async def _run_async(endpoint: str):
+    aoai = clients.async_openai_client(endpoint, "key", "2024-06-01")
+    search = clients.async_search_client(endpoint, "chk", "key")
+    for _ in range(2):
+        await _chat(aoai)
+        await search.get_document_count()
+    # The aiohttp session is shared (not owned by the client); close it before the loop ends
+    await clients._shared[("session", "search-async", asyncio.get_running_loop())].close()
+
+
+async def _loops_after_new_loop(endpoint: str) -> int:
+    """Event loops referenced by the registry once this (new) loop asked for a search client."""
+    loop = asyncio.get_running_loop()
+    clients.async_search_client(endpoint, "chk", "key")
+    loops = {k[-1] for k in clients._shared if isinstance(k[-1], asyncio.AbstractEventLoop)}
+    await clients._shared[("session", "search-async", loop)].close()
+    return len(loops)
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    endpoint = f"http://127.0.0.1:{server.server_address[1]}"
+    checks = [
+        ("openai", lambda: _chat(clients.openai_client(endpoint, "key", "2024-06-01"))),
+        ("search", lambda: clients.search_client(endpoint, "chk", "key").get_document_count()),
+    ]
+    failed = []
+    for name, call in checks:
+        try:
+            call()
+            call()
+        except Exception as e:
+            failed.append(f"{name}: {type(e).__name__}: {e}")
+    try:
+        asyncio.run(_run_async(endpoint))
+    except Exception as e:
+        failed.append(f"openai-async/search-async: {type(e).__name__}: {e}")
+    if asyncio.run(_loops_after_new_loop(endpoint)) != 1:
+        failed.append("search-async: clients of a closed event loop kept")
+    server.shutdown()
+
+    stats = clients.pool_stats()
+    for pool, s in sorted(stats.items()):
+        print(f"{pool:<14} requests={s['requests']} connections={s['connections']} reused={s['reused']}")
+    for pool in ("openai", "openai-async", "search", "search-async"):
+        if pool in stats and stats[pool]["requests"] and not stats[pool]["reused"]:
+            failed.append(f"{pool}: no connection reuse")
+    if failed:
+        print("\n".join(failed))
+        sys.exit(1)
+    print("✅ All shared clients OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+"""
+Ingest regression checks with local stand-ins for Azure OpenAI and Azure AI Search.
+
+Usage:
+  python scripts/check_ingest.py
+
+Each scenario runs ingest_local / ingest_from_raw with its own temporary state
+(DATA_DIR, manifest, dedup index, raw checkpoint) against a fake chunk index that
+keeps its document keys, then checks that no chunk is lost from the index and no
+failed raw document is skipped on resume.
+No Azure resources or .env are needed; exits 1 when a check fails.
+"""
+import os
+import re
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+SCRIPTS = Path(__file__).resolve().parent
+for p in (PROJECT_ROOT, SCRIPTS):
+    if str(p) not in sys.path:
+        sys.path.insert(0, str(p))
+
+from bench_ingest import FakeEmbeddings, FakeAzureOpenAI, FakeSearchClient, _paragraphs  # noqa: E402
+
+
+class FakeIndex(FakeSearchClient):
+    """FakeSearchClient that remembers which document keys are in the index."""
+
+    def __init__(self):
+        super().__init__(0)
+        self.keys = set()
+        self.doc_ids = set()
+
+    def upload_documents(self, documents):
+        self.keys.update(d["id"] for d in documents)
+        self.doc_ids.update(d["doc_id"] for d in documents)
+        return super().upload_documents(documents)
+
+    def delete_documents(self, documents):
+        self.keys.difference_update(d["id"] for d in documents)
+        return super().delete_documents(documents)
+
+
+class FailingIndex(FakeIndex):
+    """Uploads of documents titled `title` fail (400, not retried) while `failing` is set."""
+
+    def __init__(self, title: str):
+        super().__init__()
+        self.title = title
+        self.failing = True
+
+    def upload_documents(self, documents):
+        bad = [d for d in documents if self.failing and d.get("title") == self.title]
+        ok = super().upload_documents([d for d in documents if d not in bad])
+        return ok + [SimpleNamespace(key=d["id"], succeeded=False, status_code=400, error_message="check") for d in bad]
+
+
+class FakeRawIndex:
+    """ia-raw stand-in: `id gt '<key>'` paging and `id eq '<a>' or id eq '<b>'` lookups."""
+
+    def __init__(self, docs):
+        self.docs = sorted(docs, key=lambda d: d["id"])
+
+    def search(self, search_text="*", filter=None, order_by=None, top=50, select=None, **kwargs):
+        rows = self.docs
+        if filter and " gt " in filter:
+            after = re.search(r"gt '((?:[^']|'')*)'", filter).group(1).replace("''", "'")
+            rows = [d for d in rows if d["id"] > after]
+        elif filter:
+            keys = {k.replace("''", "'") for k in re.findall(r"eq '((?:[^']|'')*)'", filter)}
+            rows = [d for d in rows if d["id"] in keys]
+        return [dict(d) for d in rows[:top]]
+
+
+class FailingEmbeddings(FakeEmbeddings):
+    """Embeddings requests containing `marker` fail while `failing` is set."""
+
+    def __init__(self, marker: str):
+        super().__init__(64, 0, 0)
+        self.marker = marker
+        self.failing = True
+
+    def create(self, model=None, input=None, **kwargs):
+        texts = [input] if isinstance(input, str) else list(input)
+        if self.failing and any(self.marker in t for t in texts):
+            raise ValueError("embedding failed (check)")
+        return super().create(model=model, input=input, **kwargs)
+
+
+def _setup(bc, tmp: Path, index: FakeIndex = None) -> FakeIndex:
+    bc.DATA_DIR = tmp / "data"
+    bc.DATA_DIR.mkdir(parents=True)
+    bc.INGEST_MANIFEST = tmp / "manifest.json"
+    bc.DEDUP_INDEX = tmp / "dedup.sqlite"
+    bc.INGEST_RAW_CHECKPOINT = tmp / "raw-checkpoint.json"
+    index = index or FakeIndex()
+    bc.search_chunks = index
+    bc._uploader.client = index
+    return index
+
+
+def _missing(bc, index: FakeIndex, name: str):
+    """Manifest chunks of `name` that are neither indexed nor linked to an indexed chunk."""
+    from ingest.manifest import IngestManifest
+    m = IngestManifest(bc.INGEST_MANIFEST, bc.INDEX_CHUNKS, bc._EMBED_CACHE_KEY)
+    e = m.get(name) or {}
+    return [c["id"] for c in e.get("chunks", []) if c.get("dup_of", c["id"]) not in index.keys]
+
+
+def check_dedup_relink(bc, tmp: Path):
+    """A copy linked to a file's chunks keeps its links when that file changes, and is
+    fully indexed after that file is deleted."""
+    import random
+    index = _setup(bc, tmp)
+    paras = list(_paragraphs(random.Random(11), 24))
+    a, c = bc.DATA_DIR / "a.txt", bc.DATA_DIR / "c.txt"
+    a.write_text("\n\n".join(paras), encoding="utf-8")
+    bc.ingest_local()
+    shutil.copy(a, c)
+    linked = bc.ingest_local()["stats"]["linked"]
+    assert linked > 1, f"c.txt should link to a.txt's chunks (linked={linked})"
+    a.write_text("\n\n".join(paras[:-1] + ["변경된 마지막 문단입니다. " * 5]), encoding="utf-8")
+    bc.ingest_local()
+    assert not _missing(bc, index, "c.txt"), "c.txt chunks lost after a.txt changed"
+    a.unlink()
+    stats = bc.ingest_local()["stats"]
+    # The relink pass over c.txt runs in the same call and shows up in its counters
+    assert stats["embedded"] > 1, f"relink pass missing from the returned stats ({stats})"
+    missing = _missing(bc, index, "c.txt")
+    assert not missing, f"c.txt: {len(missing)} chunks missing from the index after a.txt was deleted"
+
+
+def check_dedup_failed_target(bc, tmp: Path):
+    """A file linked to chunks of a file whose upload failed in the same run is not
+    recorded as done; the next run indexes both."""
+    import random
+    index = _setup(bc, tmp, FailingIndex("a.txt"))
+    text = "\n\n".join(_paragraphs(random.Random(12), 24))
+    (bc.DATA_DIR / "a.txt").write_text(text, encoding="utf-8")
+    (bc.DATA_DIR / "b.txt").write_text(text, encoding="utf-8")
+    bc.ingest_local()
+    missing = _missing(bc, index, "b.txt")
+    assert not missing, f"b.txt recorded with {len(missing)} chunks linked to a.txt's failed upload"
+    index.failing = False
+    bc.ingest_local()
+    for name in ("a.txt", "b.txt"):
+        missing = _missing(bc, index, name)
+        assert not missing, f"{name}: {len(missing)} chunks missing after the retry run"
+
+
+def check_raw_failed_retry(bc, tmp: Path):
+    """A raw document whose embedding failed is listed in the checkpoint and retried on resume."""
+    import random
+    from ingest.manifest import RawCheckpoint
+    index = _setup(bc, tmp)
+    rnd = random.Random(13)
+    docs = [{"id": f"k{i:03d}", "content": "\n\n".join(_paragraphs(rnd, 4)), "metadata_storage_name": f"k{i:03d}.pdf"}
+            for i in range(20)]
+    docs[13]["content"] += "\n\n실패 표식 문단입니다."
+    bc.search_raw = FakeRawIndex(docs)
+    emb = FailingEmbeddings("실패 표식")
+    aoai = bc.aoai
+    bc.aoai = FakeAzureOpenAI(emb)
+    try:
+        bc.ingest_from_raw()
+        ckpt = RawCheckpoint(bc.INGEST_RAW_CHECKPOINT, bc.INDEX_RAW, bc.INDEX_CHUNKS, bc.RAW_SORT_FIELD)
+        assert "k013" in ckpt.failed_keys, f"k013 not recorded as failed (failed_keys={ckpt.failed_keys})"
+        assert "k013" not in index.doc_ids
+        emb.failing = False
+        bc.ingest_from_raw()
+        ckpt = RawCheckpoint(bc.INGEST_RAW_CHECKPOINT, bc.INDEX_RAW, bc.INDEX_CHUNKS, bc.RAW_SORT_FIELD)
+        assert not ckpt.failed_keys, f"still failed after retry: {ckpt.failed_keys}"
+        missing = sorted({d["id"] for d in docs} - index.doc_ids)
+        assert not missing, f"raw documents never indexed: {missing}"
+    finally:
+        bc.aoai = aoai
+
+
+CHECKS = [check_dedup_relink, check_dedup_failed_target, check_raw_failed_retry]
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp(prefix="check-ingest-"))
+    # Isolated state; placeholder endpoints so module-level clients can be constructed
+    os.environ.update({
+        "INGEST_MANIFEST": str(tmp / "manifest.json"),
+        "DEDUP_INDEX": str(tmp / "dedup.sqlite"),
+        "INDEX_GENERATION_DIR": str(tmp),
+        "EMBED_CACHE": "off",
+        "DEDUP": "on",
+        "SEARCH_BACKEND": "azure",
+    })
+    for k, v in (("SEARCH_ENDPOINT", "https://check.invalid"), ("SEARCH_API_KEY", "check"),
+                 ("AZURE_OPENAI_ENDPOINT", "https://check.invalid"), ("AZURE_OPENAI_API_KEY", "check"),
+                 ("AZURE_OPENAI_API_VERSION", "2024-02-01"), ("AZURE_OPENAI_EMBED_DEPLOYMENT", "check-embed")):
+        os.environ.setdefault(k, v)
+    failed = 0
+    try:
+        import ingest.build_chunks as bc
+        bc.aoai = FakeAzureOpenAI(FakeEmbeddings(64, 0, 0))
+        for check in CHECKS:
+            try:
+                check(bc, tmp / check.__name__)
+                print(f"✅ {check.__name__}")
+            except AssertionError as e:
+                failed += 1
+                print(f"❌ {check.__name__}: {e}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Local search backend checks (retrivers/local_search.py) on a temporary index folder.
+
+Usage:
+  python scripts/check_local_search.py
+
+Runs write sequences against a fresh LocalSearchClient and checks what a second
+client on the same folder sees (the ingest CLI and the app are separate processes).
+Needs numpy only; exits 1 when a check fails.
+"""
+import sys
+import shutil
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from retrivers.local_search import LocalSearchClient  # noqa: E402
+
+
+def _doc(i: int, text: str, dims: int = 4) -> dict:
+    vec = [0.0] * dims
+    vec[i % dims] = 1.0
+    return {"id": f"c{i}", "doc_id": f"d{i // 2}", "title": f"문서 {i}", "chunk": text, "contentVector": vec}
+
+
+def check_delete_before_first_upload(folder: Path):
+    """A delete on a fresh index is a no-op and does not break the first upload."""
+    c = LocalSearchClient(folder)
+    c.delete_documents([{"id": "x"}])
+    c.upload_documents([_doc(0, "내부감사 결과 보고"), _doc(1, "접근권한 관리 절차")])
+    assert c.get_document_count() == 2, c.get_document_count()
+    other = LocalSearchClient(folder)
+    hits = list(other.search(search_text="접근권한", top=1,
+                             vector_queries=[SimpleNamespace(vector=[0.0, 1.0, 0.0, 0.0], k=1)]))
+    assert hits and hits[0]["id"] == "c1", hits
+
+
+def check_upload_delete_compact(folder: Path):
+    """Replaced and deleted rows are gone for every reader, also after compaction."""
+    c = LocalSearchClient(folder)
+    c.upload_documents([_doc(i, f"청크 {i} 본문") for i in range(6)])
+    c.upload_documents([_doc(2, "청크 2 수정본")])
+    c.delete_documents([{"id": "c3"}])
+    other = LocalSearchClient(folder)
+    assert other.get_document_count() == 5, other.get_document_count()
+    assert other.get_document("c2")["chunk"] == "청크 2 수정본"
+    c.compact()
+    assert LocalSearchClient(folder).get_document_count() == 5
+    ids = {h["id"] for h in other.search(search_text="*", top=10)}
+    assert ids == {"c0", "c1", "c2", "c4", "c5"}, ids
+
+
+CHECKS = [check_delete_before_first_upload, check_upload_delete_compact]
+
+
+def main():
+    tmp = Path(tempfile.mkdtemp(prefix="check-local-search-"))
+    failed = 0
+    try:
+        for check in CHECKS:
+            try:
+                check(tmp / check.__name__)
+                print(f"✅ {check.__name__}")
+            except Exception as e:
+                failed += 1
+                print(f"❌ {check.__name__}: {type(e).__name__}: {e}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Cold-start profile: where the import time of the app module goes (python -X importtime).
+
+Usage:
+  python scripts/profile_startup.py                          # import app.py, top 20 packages
+  python scripts/profile_startup.py --module graphs.orchestrator --top 40
+  python scripts/profile_startup.py --budget-ms 1500         # exit 1 when the import exceeds the budget (CI)
+
+Imports the module in a fresh interpreter with STARTUP_PROFILE=true (app.py then
+also prints its own import time) and reports the total, the time per top-level
+package and the cost of each direct import of the module. First-request latency
+is logged by the running app with the same switch:
+  STARTUP_PROFILE=true chainlit run app.py   ->  "[startup] first request ..."
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def parse_importtime(stderr: str):
+    """(self_us, cumulative_us, depth, module) per `-X importtime` line."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cum_us, name = line[len("import time:"):].split("|", 2)
+        except ValueError:
+            continue
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        rows.append((int(self_us), int(cum_us), depth, name.strip()))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Import-time breakdown for cold start")
+    ap.add_argument("--module", default="app")
+    ap.add_argument("--top", type=int, default=20)
+    ap.add_argument("--budget-ms", type=float, default=0, help="fail (exit 1) above this import time")
+    args = ap.parse_args()
+
+    path = [str(PROJECT_ROOT)] + ([os.environ["PYTHONPATH"]] if os.environ.get("PYTHONPATH") else [])
+    env = dict(os.environ, STARTUP_PROFILE="true", PYTHONPATH=os.pathsep.join(path))
+    t0 = time.perf_counter()
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {args.module}"],
+                          cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, encoding="utf-8", errors="replace")
+    wall_ms = (time.perf_counter() - t0) * 1000
+    rows = parse_importtime(proc.stderr)
+    if proc.returncode != 0:
+        errors = [l for l in proc.stderr.splitlines() if not l.startswith("import time:")]
+        print("\n".join(errors[-15:]))
+        sys.exit(f"import {args.module} failed (exit {proc.returncode})")
+    for line in proc.stdout.splitlines():
+        if line.startswith("[startup]"):
+            print(line)
+
+    total_ms = sum(r[0] for r in rows) / 1000
+    by_pkg = defaultdict(int)
+    for self_us, _, _, name in rows:
+        by_pkg[name.split(".")[0]] += self_us
+    target = next((r for r in rows if r[3] == args.module), None)
+    print(f"\nimport {args.module}: {total_ms:.0f} ms in imports ({len(rows)} modules), "
+          f"{wall_ms:.0f} ms wall incl. interpreter start\n")
+    print(f"{'package':<32} {'ms':>8} {'share':>6}")
+    for pkg, us in sorted(by_pkg.items(), key=lambda kv: -kv[1])[:args.top]:
+        print(f"{pkg:<32} {us / 1000:>8.1f} {us / 1000 / max(total_ms, 1e-9):>6.1%}")
+
+    if target is not None:
+        # Direct imports of the module, cumulative: which import line costs what.
+        # importtime lists a module after everything it imported (deeper indentation).
+        idx = rows.index(target)
+        start = idx
+        while start > 0 and rows[start - 1][2] > target[2]:
+            start -= 1
+        direct = [r for r in rows[start:idx] if r[2] == target[2] + 1]
+        print(f"\ndirect imports of {args.module} (cumulative)")
+        for self_us, cum_us, _, name in sorted(direct, key=lambda r: -r[1])[:args.top]:
+            print(f"  {name:<40} {cum_us / 1000:>8.1f} ms")
+
+    if args.budget_ms and total_ms > args.budget_ms:
+        sys.exit(f"\nover budget: {total_ms:.0f} ms > {args.budget_ms:.0f} ms")
+
+
+if __name__ == "__main__":
+    main()